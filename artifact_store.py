@@ -0,0 +1,134 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import shutil
+import sqlite3
+import threading
+import time
+
+from result_cache import file_digest
+
+logger = logging.getLogger(__name__)
+
+# 에이전트들이 같이 쓰는 아티팩트 디렉터리 (여러 호스트면 공유 마운트)
+ARTIFACT_DIR = os.getenv("A2A_ARTIFACT_DIR", "artifacts")
+
+# 종류별 파일 확장자 (PyMuPDF가 확장자로 형식을 판단하므로 PDF는 .pdf로 저장)
+KIND_SUFFIXES = {"pdf": ".pdf", "text": ".txt", "summary": ".txt"}
+
+class ArtifactStore:
+    """content-addressed 로컬 아티팩트 저장소 (PDF, 추출 본문, 요약)
+
+    내용의 sha256이 곧 아티팩트 id이고, 파일은 objects/<id 앞 2자>/<id><확장자>에 한 번만 저장된다.
+    에이전트끼리는 본문 대신 id만 주고받고, 받는 쪽은 필요한 부분만 mmap으로 읽는다.
+    index(SQLite)는 종류, 크기, 메타데이터를 기록한다. 파일은 쓰고 나서 rename하므로
+    경로가 보이면 내용이 완전하다.
+    """
+
+    def __init__(self, root: str = ARTIFACT_DIR):
+        self.root = root
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        self._lock = threading.Lock()
+        # 여러 에이전트 프로세스가 같은 index에 쓰므로 WAL + busy timeout
+        self._conn = sqlite3.connect(os.path.join(root, "index.sqlite3"), timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS artifacts ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, size INTEGER NOT NULL, "
+            "meta TEXT, created REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def object_path(self, artifact_id: str, kind: str) -> str:
+        if len(artifact_id) != 64 or any(c not in "0123456789abcdef" for c in artifact_id):
+            raise ValueError(f"Invalid artifact id: {artifact_id!r}")
+        return os.path.join(self.root, "objects", artifact_id[:2], artifact_id + KIND_SUFFIXES[kind])
+
+    def _index(self, artifact_id: str, kind: str, size: int, meta: dict = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO artifacts (id, kind, size, meta, created) VALUES (?, ?, ?, ?, ?)",
+                (artifact_id, kind, size, json.dumps(meta or {}, ensure_ascii=False), time.time())
+            )
+            self._conn.commit()
+
+    def put_bytes(self, data: bytes, kind: str, meta: dict = None) -> str:
+        artifact_id = hashlib.sha256(data).hexdigest()
+        path = self.object_path(artifact_id, kind)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        self._index(artifact_id, kind, len(data), meta)
+        return artifact_id
+
+    def put_text(self, text: str, kind: str = "text", meta: dict = None) -> str:
+        return self.put_bytes(text.encode("utf-8"), kind, meta)
+
+    def put_file(self, src_path: str, kind: str = "pdf", meta: dict = None) -> str:
+        """파일을 저장소에 추가. 같은 파일시스템이면 hard link (복사 없음), 아니면 복사"""
+        artifact_id = file_digest(src_path)
+        path = self.object_path(artifact_id, kind)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                os.link(src_path, tmp_path)
+            except OSError:
+                shutil.copyfile(src_path, tmp_path)
+            os.replace(tmp_path, path)
+        self._index(artifact_id, kind, os.path.getsize(path), meta)
+        return artifact_id
+
+    def info(self, artifact_id: str):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM artifacts WHERE id = ?", (artifact_id,)).fetchone()
+        if row is None:
+            return None
+        info = dict(row)
+        info["meta"] = json.loads(info["meta"] or "{}")
+        return info
+
+    def path(self, artifact_id: str) -> str:
+        """아티팩트 파일 경로. 없으면 FileNotFoundError"""
+        info = self.info(artifact_id)
+        kinds = [info["kind"]] if info else list(KIND_SUFFIXES)
+        for kind in kinds:
+            path = self.object_path(artifact_id, kind)
+            if os.path.exists(path):
+                return path
+        raise FileNotFoundError(f"Artifact not found: {artifact_id}")
+
+    def exists(self, artifact_id: str) -> bool:
+        try:
+            self.path(artifact_id)
+            return True
+        except (FileNotFoundError, ValueError):
+            return False
+
+    def read_slice(self, artifact_id: str, start: int = 0, length: int = None) -> bytes:
+        """mmap으로 [start, start + length) 범위만 읽음 (파일 전체를 읽지 않음)"""
+        with open(self.path(artifact_id), "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            end = size if length is None else min(size, start + length)
+            if start >= end:
+                return b""
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return mapped[start:end]
+
+    def read_text(self, artifact_id: str, max_chars: int = None) -> str:
+        """텍스트 아티팩트 (max_chars면 앞부분만: UTF-8 한 글자는 최대 4바이트)"""
+        if max_chars is None:
+            return self.read_slice(artifact_id).decode("utf-8")
+        prefix = self.read_slice(artifact_id, 0, max_chars * 4)
+        # 잘린 멀티바이트 문자는 버림
+        return prefix.decode("utf-8", errors="ignore")[:max_chars]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
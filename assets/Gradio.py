@@ -1,94 +1,128 @@
+import json
+
 import gradio as gr
 import requests
 
 # 로컬 환경에서 Coordinator Agent가 실행 중인 주소 (통상 localhost:8000)
 COORDINATOR_URL = "http://127.0.0.1:8000/summarization_workflow"
+# 스트리밍 모드: 연결은 10초, 다음 줄(논문 하나)을 기다리는 시간은 리뷰어 타임아웃보다 넉넉하게
+STREAM_TIMEOUT = (10, 900)
 
-def run_summarization(topic: str, max_results: int):
-    """
-    Gradio에서 호출되는 함수:
-    1) Coordinator Agent에 POST 요청 → JSON 결과 수신
-    2) 결과를 읽기 좋은 HTML 형식으로 가공해서 반환
-    """
-    # 입력 검증
-    if not topic.strip():
-        return "❗️ 논문 주제(topic)를 입력해주세요."
-
-    try:
-        resp = requests.post(
-            COORDINATOR_URL,
-            json={"topic": topic, "max_results": max_results},
-            timeout=120
-        )
-        resp.raise_for_status()
-    except Exception as e:
-        return f"❗️ 요청 실패:\n```\n{e}\n```"
-
-    data = resp.json()
-    report = data.get("report")
-
-    # 만약 report가 문자열(예: "검색된 논문이 없습니다.")이라면 그대로 반환
-    if isinstance(report, str):
-        return f"### 📝 결과\n\n{report}"
-
-    # report가 리스트일 경우, 각 논문별 결과를 HTML 형식으로 포맷팅
-    if not report:
-        return """
+NO_PAPERS_HTML = """
         <div style="text-align: center; padding: 2rem; color: #e53e3e;">
             <div style="font-size: 2rem; margin-bottom: 1rem;">❌</div>
             <h3>No Papers Found</h3>
             <p>No academic papers were found for your search topic. Try a different or more general term.</p>
         </div>
         """
+
+def render_paper(item: dict) -> str:
+    """논문 하나의 요약/피드백 카드 HTML"""
+    idx = item.get("paper_index", "?")
+    title = item.get("title", "제목 없음")
+    summary = item.get("summary", "")
+    feedback = item.get("feedback", "")
     
-    # --- 🌟 변경된 부분: 결과물 상단 제목 제거 🌟 ---
-    html_parts = ['<div style="padding: 1rem;">']
+    # 요약문과 피드백에서 오류 메시지 확인
+    summary_status = "❌ Error" if "실패" in summary or "❌" in summary else "✅ Success"
+    feedback_status = "❌ Error" if "실패" in feedback or "❌" in feedback else "✅ Success"
     
-    for item in report:
-        idx = item.get("paper_index", "?")
-        title = item.get("title", "제목 없음")
-        summary = item.get("summary", "")
-        feedback = item.get("feedback", "")
-        
-        # 요약문과 피드백에서 오류 메시지 확인
-        summary_status = "❌ Error" if "실패" in summary or "❌" in summary else "✅ Success"
-        feedback_status = "❌ Error" if "실패" in feedback or "❌" in feedback else "✅ Success"
+    return f"""
+    <div style="margin-bottom: 2rem; border: 1px solid #e2e8f0; border-radius: 12px; overflow: hidden; box-shadow: 0 4px 12px rgba(0,0,0,0.05);">
+        <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 1.5rem;">
+            <h3 style="margin: 0; font-size: 1.3rem; font-weight: 600;">
+                📄 Paper #{idx}: {title}
+            </h3>
+        </div>
         
-        html_parts.append(f"""
-        <div style="margin-bottom: 2rem; border: 1px solid #e2e8f0; border-radius: 12px; overflow: hidden; box-shadow: 0 4px 12px rgba(0,0,0,0.05);">
-            <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 1.5rem;">
-                <h3 style="margin: 0; font-size: 1.3rem; font-weight: 600;">
-                    📄 Paper #{idx}: {title}
-                </h3>
+        <div style="padding: 1.5rem;">
+            <div style="margin-bottom: 1.5rem;">
+                <div style="display: flex; align-items: center; margin-bottom: 0.5rem;">
+                    <h4 style="margin: 0; color: #2d3748; font-size: 1.1rem;">📝 Summary</h4>
+                    <span style="margin-left: auto; font-size: 0.9rem; color: #4a5568;">{summary_status}</span>
+                </div>
+                <div style="background: #f7fafc; border-radius: 8px; padding: 1rem; border-left: 4px solid #667eea; line-height: 1.6;">
+                    {summary}
+                </div>
             </div>
             
-            <div style="padding: 1.5rem;">
-                <div style="margin-bottom: 1.5rem;">
-                    <div style="display: flex; align-items: center; margin-bottom: 0.5rem;">
-                        <h4 style="margin: 0; color: #2d3748; font-size: 1.1rem;">📝 Summary</h4>
-                        <span style="margin-left: auto; font-size: 0.9rem; color: #4a5568;">{summary_status}</span>
-                    </div>
-                    <div style="background: #f7fafc; border-radius: 8px; padding: 1rem; border-left: 4px solid #667eea; line-height: 1.6;">
-                        {summary}
-                    </div>
+            <div>
+                <div style="display: flex; align-items: center; margin-bottom: 0.5rem;">
+                    <h4 style="margin: 0; color: #2d3748; font-size: 1.1rem;">💬 Review Feedback</h4>
+                    <span style="margin-left: auto; font-size: 0.9rem; color: #4a5568;">{feedback_status}</span>
                 </div>
-                
-                <div>
-                    <div style="display: flex; align-items: center; margin-bottom: 0.5rem;">
-                        <h4 style="margin: 0; color: #2d3748; font-size: 1.1rem;">💬 Review Feedback</h4>
-                        <span style="margin-left: auto; font-size: 0.9rem; color: #4a5568;">{feedback_status}</span>
-                    </div>
-                    <div style="background: #fff5f5; border-radius: 8px; padding: 1rem; border-left: 4px solid #e53e3e; line-height: 1.6;">
-                        {feedback}
-                    </div>
+                <div style="background: #fff5f5; border-radius: 8px; padding: 1rem; border-left: 4px solid #e53e3e; line-height: 1.6;">
+                    {feedback}
                 </div>
             </div>
         </div>
+    </div>
+    """
+
+def render_report(report: list, total: int = None) -> str:
+    """지금까지 받은 결과를 논문 번호 순서로 렌더링 (total이 주어지면 진행 상황 표시)"""
+    html_parts = ['<div style="padding: 1rem;">']
+    
+    if total is not None and len(report) < total:
+        html_parts.append(f"""
+        <div style="margin-bottom: 1rem; padding: 0.75rem 1rem; background: #ebf4ff; border-radius: 8px; color: #4c51bf;">
+            ⏳ {len(report)} / {total} papers ready — remaining results will appear as they finish
+        </div>
         """)
     
+    for item in sorted(report, key=lambda item: item.get("paper_index", 0)):
+        html_parts.append(render_paper(item))
+    
     html_parts.append("</div>")
     return "".join(html_parts)
 
+def run_summarization(topic: str, max_results: int):
+    """
+    Gradio에서 호출되는 함수 (generator):
+    1) Coordinator Agent에 스트리밍 모드로 POST 요청
+    2) 논문별 결과가 도착할 때마다 지금까지의 결과를 HTML로 렌더링해서 yield
+    """
+    # 입력 검증
+    if not topic.strip():
+        yield "❗️ 논문 주제(topic)를 입력해주세요."
+        return
+
+    report = []
+    total = None
+    try:
+        with requests.post(
+            COORDINATOR_URL,
+            json={"topic": topic, "max_results": max_results, "stream": True},
+            stream=True,
+            timeout=STREAM_TIMEOUT
+        ) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines(decode_unicode=True):
+                if not line:
+                    continue
+                event = json.loads(line)
+                if event.get("type") == "start":
+                    total = event.get("total", 0)
+                    if total:
+                        yield render_report(report, total)
+                elif event.get("type") == "paper":
+                    report.append(event)
+                    yield render_report(report, total)
+    except Exception as e:
+        if report:
+            # 이미 받은 결과는 그대로 보여주고 오류만 덧붙임
+            yield render_report(report) + f"\n\n❗️ 요청 실패:\n```\n{e}\n```"
+        else:
+            yield f"❗️ 요청 실패:\n```\n{e}\n```"
+        return
+
+    # report가 비어 있으면 검색된 논문이 없는 경우
+    if not report:
+        yield NO_PAPERS_HTML
+        return
+
+    yield render_report(report)
+
 # ─────────────────────────────────────────────────────────────────────────────────
 # Gradio 인터페이스 정의
 custom_css = """
@@ -0,0 +1,288 @@
+"""PDF 디렉터리를 HTTP 없이 한 프로세스에서 요약 → 리뷰하는 배치 파이프라인
+
+사용법 (저장소 루트에서):
+    python batch_pipeline.py downloaded_papers --output results.ndjson
+    python batch_pipeline.py corpus/ --recursive --summarize-workers 8 --review-workers 2 --output nightly.ndjson
+
+summarizer_agent / reviewer_agent 모듈을 그대로 import해서 같은 텍스트 추출, 요약 배처, 리뷰 로직과
+캐시를 쓴다 (uvicorn 서비스, JSON 직렬화, coordinator HTTP 타임아웃 없음).
+논문은 scan → extract → summarize → review 단계 큐를 따라 흐르고, 단계마다 워커 수를 따로 정한다.
+결과는 논문 하나가 끝날 때마다 NDJSON 한 줄로 바로 기록되고, 이 파일이 체크포인트다:
+같은 --output으로 다시 실행하면 이미 성공한 PDF(내용 해시 기준)는 건너뛴다.
+"""
+import argparse
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+
+import reviewer_agent
+import summarizer_agent
+from result_cache import file_digest
+
+logger = logging.getLogger(__name__)
+
+# 단계 사이 큐 크기 = 다음 단계 워커 수 x 이 값 (추출된 본문이 메모리에 쌓이지 않도록)
+# 리뷰 큐는 예외로 워커 수 x REVIEW_BATCH_MAX_SIZE
+QUEUE_FACTOR = 2
+
+def find_pdfs(input_dir: str, recursive: bool = False) -> list:
+    pattern = os.path.join(input_dir, "**", "*.pdf") if recursive else os.path.join(input_dir, "*.pdf")
+    return sorted(glob.glob(pattern, recursive=recursive))
+
+def load_checkpoint(output_path: str, retry_failed: bool = False) -> set:
+    """이미 기록된 결과의 PDF 해시 (retry_failed면 성공한 것만). 중간에 끊긴 마지막 줄은 무시"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("sha256") and (record.get("status") == "done" or not retry_failed):
+                done.add(record["sha256"])
+    return done
+
+class StageStats:
+    """단계별 처리 수와 소요 시간 (워커 시간 합)"""
+
+    def __init__(self):
+        self.stages = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        count, total = self.stages.get(stage, (0, 0.0))
+        self.stages[stage] = (count + 1, total + seconds)
+
+    def snapshot(self) -> dict:
+        return {
+            stage: {"count": count, "mean_s": round(total / count, 3), "total_s": round(total, 1)}
+            for stage, (count, total) in self.stages.items()
+        }
+
+class BatchPipeline:
+    """scan → extract → summarize → review → write 단계 파이프라인
+
+    단계마다 워커 수만큼 코루틴이 큐에서 논문을 꺼내 처리하고 다음 큐로 넘긴다.
+    실패한 논문은 남은 단계를 건너뛰고 바로 writer로 간다.
+    summarize 워커가 동시에 요약을 요청하므로 summarizer 배처가 여러 논문을 한 generate로 묶고,
+    review 워커는 큐에 쌓인 논문을 REVIEW_BATCH_MAX_SIZE개까지 모아 /review_batch 로직으로 한 번에 처리한다.
+    """
+
+    def __init__(self, pdfs: list, output_path: str, input_dir: str = ".", extract_workers: int = 2,
+                 summarize_workers: int = summarizer_agent.BATCH_MAX_SIZE, review_workers: int = 1,
+                 long_document: bool = False, retry_failed: bool = False):
+        self.pdfs = pdfs
+        self.output_path = output_path
+        self.input_dir = input_dir
+        self.workers = {
+            "extract": max(1, extract_workers),
+            "summarize": max(1, summarize_workers),
+            "review": max(1, review_workers),
+        }
+        self.long_document = long_document
+        self.skip = load_checkpoint(output_path, retry_failed)
+        self.stats = StageStats()
+        self.counts = {"done": 0, "failed": 0, "skipped": 0}
+
+    async def run(self) -> dict:
+        start = time.perf_counter()
+        queues = {
+            stage: asyncio.Queue(maxsize=workers * QUEUE_FACTOR)
+            for stage, workers in self.workers.items()
+        }
+        # 리뷰 워커는 큐에 쌓인 논문을 모아 배치로 처리하므로 워커마다 배치 하나는 대기할 수 있게
+        queues["review"] = asyncio.Queue(
+            maxsize=self.workers["review"] * max(QUEUE_FACTOR, reviewer_agent.REVIEW_BATCH_MAX_SIZE)
+        )
+        queues["write"] = asyncio.Queue()
+
+        async def scan():
+            for path in self.pdfs:
+                await queues["extract"].put({"path": path, "started": time.perf_counter()})
+
+        # (단계 코루틴, 출력 큐, 다음 단계 워커 수)
+        stages = [
+            (scan(), queues["extract"], self.workers["extract"]),
+            (self._run_workers("extract", self._extract, queues["extract"], queues["summarize"], queues["write"]),
+             queues["summarize"], self.workers["summarize"]),
+            (self._run_workers("summarize", self._summarize, queues["summarize"], queues["review"], queues["write"]),
+             queues["review"], self.workers["review"]),
+            (self._run_workers("review", self._review_batch, queues["review"], queues["write"], queues["write"], batched=True),
+             queues["write"], 1),
+        ]
+        writer = asyncio.create_task(self._write(queues["write"]))
+        tasks = [(asyncio.create_task(stage), outbox, downstream_workers) for stage, outbox, downstream_workers in stages]
+        try:
+            # 앞 단계 워커가 모두 끝나면 다음 단계 워커 수만큼 종료 신호(None)를 넣음
+            for task, outbox, downstream_workers in tasks:
+                await task
+                for _ in range(downstream_workers):
+                    await outbox.put(None)
+            await writer
+        finally:
+            for task, _, _ in tasks:
+                task.cancel()
+            writer.cancel()
+
+        elapsed = time.perf_counter() - start
+        processed = self.counts["done"] + self.counts["failed"]
+        return {
+            **self.counts,
+            "elapsed_s": round(elapsed, 1),
+            "papers_per_hour": round(processed / elapsed * 3600, 1) if elapsed and processed else 0.0,
+            "stages": self.stats.snapshot(),
+            "workers": self.workers,
+        }
+
+    async def _run_workers(self, stage: str, handler, inbox: asyncio.Queue, outbox: asyncio.Queue,
+                           failures: asyncio.Queue, batched: bool = False) -> None:
+        async def worker():
+            finished = False
+            while not finished:
+                item = await inbox.get()
+                if item is None:
+                    break
+                items = [item]
+                # batched 단계는 큐에 이미 와 있는 논문을 더 모아서 한 번에 처리
+                while batched and len(items) < reviewer_agent.REVIEW_BATCH_MAX_SIZE and not inbox.empty():
+                    item = inbox.get_nowait()
+                    if item is None:
+                        finished = True
+                        break
+                    items.append(item)
+
+                start = time.perf_counter()
+                try:
+                    if batched:
+                        await handler(items)
+                    else:
+                        await handler(items[0])
+                except Exception as e:
+                    for paper in items:
+                        paper.setdefault("error", f"{stage}: {getattr(e, 'detail', None) or e}")
+                seconds = time.perf_counter() - start
+                for paper in items:
+                    self.stats.record(stage, seconds / len(items))
+                    if paper.get("skip"):
+                        continue
+                    await (failures if "error" in paper else outbox).put(paper)
+
+        await asyncio.gather(*(worker() for _ in range(self.workers[stage])))
+
+    async def _extract(self, paper: dict) -> None:
+        paper["sha256"] = await asyncio.to_thread(file_digest, paper["path"])
+        if paper["sha256"] in self.skip:
+            paper["skip"] = True
+            self.counts["skipped"] += 1
+            return
+        paper["text"] = await asyncio.to_thread(summarizer_agent.extract_text_from_pdf, paper["path"])
+
+    async def _summarize(self, paper: dict) -> None:
+        cache_key = summarizer_agent.summary_cache_key(paper["sha256"], self.long_document)
+        cached = await asyncio.to_thread(summarizer_agent.summary_cache.get, cache_key)
+        if cached is not None:
+            paper["summary"] = cached["summary"]
+            return
+        paper["summary"] = await summarizer_agent.summarize_document(paper["text"], self.long_document)
+        # 품질 체크에서 대체된 요약은 캐시하지 않음 (다시 실행하면 재생성)
+        if paper["summary"] != summarizer_agent.FALLBACK_SUMMARY:
+            await asyncio.to_thread(summarizer_agent.summary_cache.put, cache_key, {"summary": paper["summary"]})
+
+    async def _review_batch(self, papers: list) -> None:
+        items = []
+        for paper in papers:
+            item = reviewer_agent.ReviewRequest(original_text=paper["text"], summary_text=paper["summary"])
+            try:
+                reviewer_agent.validate_review_request(item)
+            except Exception as e:
+                paper["error"] = f"review: {getattr(e, 'detail', None) or e}"
+                continue
+            items.append((paper, item))
+        if not items:
+            return
+        response = await reviewer_agent.review_batch(
+            reviewer_agent.ReviewBatchRequest(items=[item for _, item in items])
+        )
+        for (paper, _), result in zip(items, response["results"]):
+            paper["feedback"] = result["feedback"]
+
+    async def _write(self, inbox: asyncio.Queue) -> None:
+        """결과를 한 줄씩 append + flush (중간에 멈춰도 기록된 논문은 다음 실행에서 건너뜀)"""
+        with open(self.output_path, "a", encoding="utf-8") as f:
+            # 이전 실행이 줄 중간에서 끊겼으면 새 줄부터 시작
+            if f.tell() > 0:
+                with open(self.output_path, "rb") as existing:
+                    existing.seek(-1, os.SEEK_END)
+                    if existing.read(1) != b"\n":
+                        f.write("\n")
+            while True:
+                paper = await inbox.get()
+                if paper is None:
+                    break
+                status = "failed" if "error" in paper else "done"
+                self.counts[status] += 1
+                record = {
+                    "pdf": os.path.relpath(paper["path"], self.input_dir),
+                    "title": os.path.splitext(os.path.basename(paper["path"]))[0].replace("_", " "),
+                    "sha256": paper.get("sha256"),
+                    "status": status,
+                    "summary": paper.get("summary"),
+                    "feedback": paper.get("feedback"),
+                    "seconds": round(time.perf_counter() - paper["started"], 2),
+                }
+                if "error" in paper:
+                    record["error"] = paper["error"]
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                logger.info(f"[{status}] {record['pdf']} ({record['seconds']}s)")
+
+async def run_pipeline(pdfs: list, output_path: str, **options) -> dict:
+    """에이전트 모델을 이 프로세스에 로드하고 파이프라인 실행. 처리 통계 반환"""
+    # startup 이벤트와 같은 순서: 모델 로드 시작 + 배처 시작
+    await summarizer_agent.startup_event()
+    await reviewer_agent.startup_event()
+    try:
+        await asyncio.to_thread(summarizer_agent.model_lifecycle.wait)
+        await asyncio.to_thread(reviewer_agent.model_lifecycle.wait)
+        return await BatchPipeline(pdfs, output_path, **options).run()
+    finally:
+        await summarizer_agent.shutdown_event()
+        await reviewer_agent.shutdown_event()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input_dir", help="directory of PDFs")
+    parser.add_argument("--output", default="batch_results.ndjson", help="NDJSON results file (also the checkpoint)")
+    parser.add_argument("--recursive", action="store_true", help="include PDFs in subdirectories")
+    parser.add_argument("--limit", type=int, default=None, help="process at most this many PDFs")
+    parser.add_argument("--extract-workers", type=int, default=2)
+    parser.add_argument("--summarize-workers", type=int, default=summarizer_agent.BATCH_MAX_SIZE)
+    parser.add_argument("--review-workers", type=int, default=1)
+    parser.add_argument("--long-document", action="store_true", help="map-reduce summary over the whole paper")
+    parser.add_argument("--retry-failed", action="store_true", help="re-run PDFs recorded as failed")
+    args = parser.parse_args()
+
+    pdfs = find_pdfs(args.input_dir, args.recursive)[:args.limit]
+    if not pdfs:
+        parser.error(f"no PDFs in {args.input_dir}")
+    logger.info(f"{len(pdfs)} PDFs -> {args.output}")
+
+    stats = asyncio.run(run_pipeline(
+        pdfs, args.output,
+        input_dir=args.input_dir,
+        extract_workers=args.extract_workers,
+        summarize_workers=args.summarize_workers,
+        review_workers=args.review_workers,
+        long_document=args.long_document,
+        retry_failed=args.retry_failed,
+    ))
+    print(json.dumps(stats, indent=2))
+    print(f"{stats['done']} done, {stats['failed']} failed, {stats['skipped']} skipped "
+          f"in {stats['elapsed_s']}s ({stats['papers_per_hour']} papers/hour)")
+
+if __name__ == "__main__":
+    main()
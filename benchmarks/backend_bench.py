@@ -0,0 +1,115 @@
+"""CPU 추론 백엔드(torch fp32 / int8 / onnx) parity + latency 리포트
+
+사용법 (저장소 루트에서):
+    python benchmarks/backend_bench.py --agent summarizer [--backends torch int8 onnx] [--limit 4]
+    python benchmarks/backend_bench.py --agent reviewer
+
+downloaded_papers의 PDF로 기준 입력을 만들고, 각 백엔드 출력을 torch fp32 출력과 비교한다.
+(정확히 일치한 비율, 단어 단위 F1) 그리고 입력당 지연 시간과 처리량을 출력한다.
+리뷰어는 parity 비교를 위해 sampling 없이 beam search로 생성한다.
+"""
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+from collections import Counter
+
+import torch
+from transformers import AutoTokenizer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 모델은 처음 요청 때 로드되므로 에이전트 모듈 import는 가벼움 (생성 파라미터/프롬프트를 그대로 씀)
+import reviewer_agent  # noqa: E402
+import summarizer_agent  # noqa: E402
+from model_backend import BACKENDS, load_seq2seq  # noqa: E402
+from pdf_text import extract_raw_text  # noqa: E402
+from section_index import clean_and_index  # noqa: E402
+from token_budget import truncate_to_sentences, truncate_to_tokens  # noqa: E402
+
+AGENTS = {"summarizer": summarizer_agent, "reviewer": reviewer_agent}
+
+def generation_kwargs(agent: str) -> dict:
+    """에이전트의 quality 생성 파라미터 (리뷰어는 parity 비교를 위해 sampling을 끔)"""
+    if agent == "summarizer":
+        return summarizer_agent.GENERATION_KWARGS
+    kwargs = {k: v for k, v in reviewer_agent.GENERATION_KWARGS.items() if k not in ("temperature", "top_p")}
+    return {**kwargs, "do_sample": False}
+
+def reference_inputs(agent: str, tokenizer, pdf_dir: str, limit: int) -> list:
+    """에이전트와 같은 방식으로 만든 모델 입력 (summarize_document / generate_reviews 참고)"""
+    inputs = []
+    for path in sorted(glob.glob(os.path.join(pdf_dir, "*.pdf")))[:limit]:
+        index = clean_and_index(extract_raw_text(path))
+        doc_text = summarizer_agent.extract_main_content(index.text, index)
+        if agent == "summarizer":
+            inputs.append(truncate_to_sentences(tokenizer, doc_text, 900))
+        else:
+            # 요약 대신 abstract를 평가 대상으로 사용
+            abstract = index.slice(index.abstract_span()).strip()
+            excerpt = truncate_to_tokens(tokenizer, doc_text, 250)
+            inputs.append(reviewer_agent.create_review_prompt(excerpt, abstract or doc_text[:800]))
+    return inputs
+
+def run_backend(agent: str, backend: str, texts: list) -> tuple:
+    module = AGENTS[agent]
+    tokenizer, model, device = load_seq2seq(module.MODEL_NAME, backend, "cpu")
+    kwargs = generation_kwargs(agent)
+    if agent == "reviewer":
+        kwargs = {**kwargs, "pad_token_id": tokenizer.pad_token_id, "eos_token_id": tokenizer.eos_token_id}
+    outputs, latencies = [], []
+    for text in texts:
+        encoded = tokenizer(text, return_tensors="pt", max_length=module.MAX_INPUT_LENGTH, truncation=True).to(device)
+        start = time.perf_counter()
+        with torch.no_grad():
+            ids = model.generate(encoded["input_ids"], attention_mask=encoded["attention_mask"], **kwargs)
+        latencies.append(time.perf_counter() - start)
+        outputs.append(tokenizer.decode(ids[0], skip_special_tokens=True).strip())
+    del model
+    return outputs, latencies
+
+def word_f1(a: str, b: str) -> float:
+    ta, tb = Counter(a.lower().split()), Counter(b.lower().split())
+    overlap = sum((ta & tb).values())
+    if not overlap:
+        return 0.0
+    precision, recall = overlap / sum(ta.values()), overlap / sum(tb.values())
+    return 2 * precision * recall / (precision + recall)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agent", choices=sorted(AGENTS), default="summarizer")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--pdf-dir", default="downloaded_papers")
+    parser.add_argument("--limit", type=int, default=4, help="number of reference PDFs")
+    parser.add_argument("--threads", type=int, default=None, help="torch intra-op threads")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    tokenizer = AutoTokenizer.from_pretrained(AGENTS[args.agent].MODEL_NAME)
+    texts = reference_inputs(args.agent, tokenizer, args.pdf_dir, args.limit)
+    if not texts:
+        sys.exit(f"No PDFs found in {args.pdf_dir}")
+
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    reference, baseline = None, None
+    print(f"{'backend':<8} {'mean s':>8} {'p50 s':>8} {'items/s':>8} {'speedup':>8} {'exact':>6} {'F1':>6}")
+    for backend in backends:
+        try:
+            outputs, latencies = run_backend(args.agent, backend, texts)
+        except RuntimeError as e:
+            print(f"{backend:<8} skipped: {e}")
+            continue
+        mean = statistics.mean(latencies)
+        if reference is None:
+            reference, baseline = outputs, mean
+        exact = sum(o == r for o, r in zip(outputs, reference)) / len(outputs)
+        f1 = statistics.mean(word_f1(o, r) for o, r in zip(outputs, reference))
+        print(f"{backend:<8} {mean:>8.2f} {statistics.median(latencies):>8.2f} {1 / mean:>8.2f} "
+              f"{baseline / mean:>7.2f}x {exact:>6.2f} {f1:>6.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,465 @@
+"""End-to-end 부하 / 지연 시간 벤치마크 (로컬 arXiv/PDF stand-in 사용)
+
+사용법 (저장소 루트에서):
+    # 네 에이전트를 임시 디렉터리에서 띄우고, 작은 모델로 CPU에서 빠르게 측정
+    python benchmarks/load_bench.py --tiny --requests 20 --concurrency 4
+
+    # 도착률 고정(open loop, 초당 0.5개 요청), 실제 모델
+    python benchmarks/load_bench.py --rate 0.5 --requests 30 --max-results 3
+
+    # 결과 저장 후 기준 결과와 비교 (p95 등이 20% 넘게 느려지면 exit 1)
+    python benchmarks/load_bench.py --tiny --output run.json --baseline baseline.json --max-regression 0.2
+
+    # 이미 떠 있는 스택 측정 (stand-in 없이 실제 arXiv 사용)
+    python benchmarks/load_bench.py --coordinator-url http://127.0.0.1:8000 --requests 5
+
+stand-in 서버는 arXiv Atom 검색 응답과 downloaded_papers의 PDF를 돌려준다.
+--cache-mode cold(기본)면 논문마다 PDF 끝에 고유한 주석을 붙여 요약/리뷰 캐시가 맞지 않게 하고,
+warm이면 같은 PDF 바이트를 그대로 돌려줘서 캐시 경로를 측정한다.
+
+end-to-end 지연 시간은 클라이언트에서 잰 값이고, 단계별 지연 시간은 각 에이전트 /metrics
+히스토그램의 측정 전후 차이로 계산한다(버킷 상한으로 근사한 분위수).
+"""
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+import httpx
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# --tiny: CPU에서 몇 초 안에 로드되는 무작위 가중치 모델 (파이프라인 성능 회귀 확인용, 출력 품질은 의미 없음)
+TINY_MODELS = {
+    "summarizer": "sshleifer/bart-tiny-random",
+    "reviewer": "patrickvonplaten/t5-tiny-random",
+}
+DEFAULT_TOPICS = [
+    "blockchain consensus", "graph neural networks", "quantum cryptography",
+    "federated learning", "protein folding", "diffusion models",
+]
+# 기준 결과와 비교하는 지표 (end-to-end와 단계별 p95)
+REGRESSION_KEYS = ("p50", "p95", "p99")
+
+# --- local arXiv / PDF stand-in ---
+
+class StandInHandler(BaseHTTPRequestHandler):
+    pdfs = []
+    unique = True
+    latency = 0.0
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/api/query":
+            self.send_feed(parse_qs(url.query))
+        elif url.path.startswith("/pdf/") and url.path.endswith(".pdf"):
+            self.send_pdf(url.path[len("/pdf/"):-len(".pdf")])
+        else:
+            self.send_error(404)
+
+    def send_feed(self, query: dict):
+        if self.latency:
+            time.sleep(self.latency)
+        topic = query.get("search_query", ["all:"])[0].split(":", 1)[-1]
+        start = int(query.get("start", ["0"])[0])
+        count = int(query.get("max_results", ["10"])[0])
+        # 같은 topic이면 같은 논문, 다른 topic이면 다른 논문 번호
+        base = zlib.crc32(topic.encode("utf-8")) % 100000 * 100
+        entries = []
+        for paper_no in range(base + start, base + start + count):
+            name = os.path.splitext(os.path.basename(self.pdfs[paper_no % len(self.pdfs)]))[0]
+            entries.append(f"""<entry>
+<id>http://standin/abs/local-{paper_no}</id>
+<title>{escape(name.replace("_", " "))} {paper_no}</title>
+<summary>Local stand-in entry for {escape(topic)}.</summary>
+<author><name>Stand-in</name></author>
+<published>2024-01-01T00:00:00Z</published>
+<category term="cs.LG"/>
+</entry>""")
+        body = ('<?xml version="1.0" encoding="UTF-8"?>\n<feed xmlns="http://www.w3.org/2005/Atom">\n'
+                + "\n".join(entries) + "\n</feed>\n").encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/atom+xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_pdf(self, arxiv_id: str):
+        try:
+            paper_no = int(arxiv_id.rsplit("-", 1)[-1])
+        except ValueError:
+            self.send_error(404)
+            return
+        with open(self.pdfs[paper_no % len(self.pdfs)], "rb") as f:
+            body = f.read()
+        if self.unique:
+            # %%EOF 뒤의 주석은 PDF 파서가 무시하지만 파일 해시는 달라짐
+            body += f"\n% stand-in {paper_no}\n".encode("ascii")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stand_in(pdfs: list, unique: bool, latency: float) -> ThreadingHTTPServer:
+    handler = type("Handler", (StandInHandler,), {"pdfs": pdfs, "unique": unique, "latency": latency})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+# --- agent processes ---
+
+AGENT_MODULES = {
+    "coordinator": "coordinator_agent",
+    "fetcher": "fetcher_agent",
+    "summarizer": "summarizer_agent",
+    "reviewer": "reviewer_agent",
+}
+# 모델 에이전트는 로드 + warmup이 끝나야 ready
+READY_PATHS = {"summarizer": "/health/ready", "reviewer": "/health/ready"}
+
+def start_agents(args, stand_in_url: str, workdir: str) -> tuple:
+    """네 에이전트를 workdir에서 uvicorn으로 실행 (다운로드/캐시는 workdir 아래에 생김)"""
+    ports = {name: args.port_base + i for i, name in enumerate(AGENT_MODULES)}
+    urls = {name: f"http://127.0.0.1:{port}" for name, port in ports.items()}
+    env = {
+        **os.environ,
+        "FETCHER_ARXIV_API": f"{stand_in_url}/api/query",
+        "FETCHER_PDF_BASE_URL": f"{stand_in_url}/pdf",
+        "COORDINATOR_FETCHER_URLS": urls["fetcher"],
+        "COORDINATOR_SUMMARIZER_URLS": urls["summarizer"],
+        "COORDINATOR_REVIEWER_URLS": urls["reviewer"],
+        "A2A_CACHE_DIR": os.path.join(workdir, "cache"),
+        "A2A_ARTIFACT_DIR": os.path.join(workdir, "artifacts"),
+    }
+    if args.tiny:
+        env.setdefault("SUMMARIZER_MODEL", TINY_MODELS["summarizer"])
+        env.setdefault("REVIEWER_MODEL", TINY_MODELS["reviewer"])
+    processes = []
+    log = open(os.path.join(workdir, "agents.log"), "w")
+    for name, module in AGENT_MODULES.items():
+        processes.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", f"{module}:app", "--app-dir", REPO_DIR,
+             "--port", str(ports[name]), "--log-level", "warning"],
+            cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT
+        ))
+    return urls, processes
+
+async def wait_ready(client: httpx.AsyncClient, urls: dict, processes: list, timeout: float) -> dict:
+    """모든 에이전트가 ready가 될 때까지 대기. 에이전트별 실행부터 ready까지 걸린 시간(초) 반환"""
+    start = time.monotonic()
+    deadline = start + timeout
+    ready_after = {}
+    pending = dict(urls)
+    while pending:
+        for process in processes:
+            if process.poll() is not None:
+                raise RuntimeError(f"agent exited with code {process.returncode} (see agents.log)")
+        for name, url in list(pending.items()):
+            try:
+                if (await client.get(url + READY_PATHS.get(name, "/metrics"), timeout=2)).status_code == 200:
+                    del pending[name]
+                    ready_after[name] = round(time.monotonic() - start, 2)
+            except httpx.HTTPError:
+                pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"agents not ready after {timeout}s: {sorted(pending)}")
+        await asyncio.sleep(1)
+    return ready_after
+
+async def discover_agents(client: httpx.AsyncClient, coordinator_url: str) -> dict:
+    """이미 떠 있는 스택: coordinator /replicas에서 각 에이전트 replica 주소를 가져옴"""
+    urls = {"coordinator": [coordinator_url]}
+    resp = await client.get(f"{coordinator_url}/replicas", timeout=10)
+    resp.raise_for_status()
+    for name, pool in resp.json().items():
+        urls[name] = [replica["url"] for replica in pool["replicas"]]
+    return urls
+
+# --- metrics ---
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+def summarize_samples(values: list) -> dict:
+    return {
+        "count": len(values),
+        "mean": round(statistics.mean(values), 4) if values else 0.0,
+        "p50": round(percentile(values, 0.5), 4),
+        "p95": round(percentile(values, 0.95), 4),
+        "p99": round(percentile(values, 0.99), 4),
+        "max": round(max(values), 4) if values else 0.0,
+    }
+
+def bucket_quantile(buckets: dict, count: int, q: float) -> float:
+    """누적 버킷 카운트에서 분위수 (버킷 상한)"""
+    rank = q * count
+    for bound, seen in buckets.items():
+        if seen >= rank:
+            return float("inf") if bound == "+Inf" else float(bound)
+    return float("inf")
+
+async def collect_stages(client: httpx.AsyncClient, agent_urls: dict) -> dict:
+    """에이전트별(replica 합산) 단계 히스토그램 {agent/stage: {count, sum, buckets}}"""
+    stages = {}
+    for agent, urls in agent_urls.items():
+        for url in urls:
+            resp = await client.get(f"{url}/metrics", timeout=10)
+            resp.raise_for_status()
+            for stage, histogram in resp.json()["stages"].items():
+                total = stages.setdefault(f"{agent}/{stage}", {"count": 0, "sum": 0.0, "buckets": {}})
+                total["count"] += histogram["count"]
+                total["sum"] += histogram["sum"]
+                for bound, seen in histogram["buckets"].items():
+                    total["buckets"][bound] = total["buckets"].get(bound, 0) + seen
+    return stages
+
+def diff_stages(before: dict, after: dict) -> dict:
+    """측정 구간에 기록된 부분만 남겨서 분위수 계산"""
+    result = {}
+    for name, histogram in after.items():
+        previous = before.get(name, {"count": 0, "sum": 0.0, "buckets": {}})
+        count = histogram["count"] - previous["count"]
+        if count <= 0:
+            continue
+        buckets = {bound: seen - previous["buckets"].get(bound, 0) for bound, seen in histogram["buckets"].items()}
+        result[name] = {
+            "count": count,
+            "mean": round((histogram["sum"] - previous["sum"]) / count, 4),
+            "p50": bucket_quantile(buckets, count, 0.5),
+            "p95": bucket_quantile(buckets, count, 0.95),
+            "p99": bucket_quantile(buckets, count, 0.99),
+        }
+    return result
+
+# --- load generation ---
+
+def load_workload(args) -> list:
+    if args.workload:
+        with open(args.workload) as f:
+            items = [json.loads(line) for line in f if line.strip()]
+        items = [{"topic": item["topic"], "max_results": item.get("max_results", args.max_results)} for item in items]
+    else:
+        items = [
+            {"topic": f"{DEFAULT_TOPICS[i % len(DEFAULT_TOPICS)]} {i // len(DEFAULT_TOPICS)}", "max_results": args.max_results}
+            for i in range(args.requests)
+        ]
+    # 요청 수가 workload보다 많으면 반복
+    return [items[i % len(items)] for i in range(args.requests)]
+
+async def run_workflow(client: httpx.AsyncClient, coordinator_url: str, item: dict, stream: bool, timeout: float) -> dict:
+    start = time.perf_counter()
+    result = {"ok": False, "papers": 0, "failed_papers": 0, "first_result": None}
+    try:
+        payload = {**item, "stream": stream}
+        if stream:
+            async with client.stream("POST", f"{coordinator_url}/summarization_workflow", json=payload, timeout=timeout) as resp:
+                resp.raise_for_status()
+                async for line in resp.aiter_lines():
+                    if not line:
+                        continue
+                    event = json.loads(line)
+                    if event.get("type") == "paper":
+                        if result["first_result"] is None:
+                            result["first_result"] = time.perf_counter() - start
+                        result["papers"] += 1
+                        result["failed_papers"] += "❌" in event.get("summary", "") + event.get("feedback", "")
+        else:
+            resp = await client.post(f"{coordinator_url}/summarization_workflow", json=payload, timeout=timeout)
+            resp.raise_for_status()
+            report = resp.json().get("report")
+            report = report if isinstance(report, list) else []
+            result["papers"] = len(report)
+            result["failed_papers"] = sum("❌" in paper.get("summary", "") + paper.get("feedback", "") for paper in report)
+        result["ok"] = True
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["latency"] = time.perf_counter() - start
+    return result
+
+async def generate_load(client: httpx.AsyncClient, coordinator_url: str, items: list, args) -> tuple:
+    results = []
+    start = time.perf_counter()
+
+    async def one(item):
+        results.append(await run_workflow(client, coordinator_url, item, args.stream, args.timeout))
+
+    if args.rate:
+        # open loop: 포아송 도착, 응답을 기다리지 않고 다음 요청을 보냄
+        tasks = []
+        for item in items:
+            tasks.append(asyncio.create_task(one(item)))
+            await asyncio.sleep(random.expovariate(args.rate))
+        await asyncio.gather(*tasks)
+    else:
+        # closed loop: concurrency개의 가상 사용자가 응답을 받으면 다음 요청
+        queue = asyncio.Queue()
+        for item in items:
+            queue.put_nowait(item)
+
+        async def user():
+            while not queue.empty():
+                await one(queue.get_nowait())
+
+        await asyncio.gather(*(user() for _ in range(args.concurrency)))
+    return results, time.perf_counter() - start
+
+# --- report ---
+
+def build_report(args, results: list, elapsed: float, stages: dict) -> dict:
+    ok = [r for r in results if r["ok"]]
+    papers = sum(r["papers"] for r in ok)
+    report = {
+        "config": {
+            "requests": args.requests, "concurrency": args.concurrency, "rate": args.rate,
+            "max_results": args.max_results, "stream": args.stream, "tiny": args.tiny,
+            "cache_mode": args.cache_mode,
+        },
+        "elapsed_s": round(elapsed, 2),
+        "errors": len(results) - len(ok),
+        "failed_papers": sum(r["failed_papers"] for r in ok),
+        "throughput": {
+            "requests_per_s": round(len(ok) / elapsed, 4) if elapsed else 0.0,
+            "papers_per_s": round(papers / elapsed, 4) if elapsed else 0.0,
+        },
+        "end_to_end": summarize_samples([r["latency"] for r in ok]),
+        "stages": stages,
+    }
+    first = [r["first_result"] for r in ok if r["first_result"] is not None]
+    if first:
+        report["first_result"] = summarize_samples(first)
+    errors = sorted({r["error"] for r in results if not r["ok"]})
+    if errors:
+        report["error_samples"] = errors[:5]
+    return report
+
+def print_report(report: dict) -> None:
+    print(f"\nelapsed {report['elapsed_s']}s, errors {report['errors']}, failed papers {report['failed_papers']}")
+    print(f"throughput: {report['throughput']['requests_per_s']} req/s, {report['throughput']['papers_per_s']} papers/s")
+    print(f"\n{'metric':<44} {'count':>6} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+    rows = [("end_to_end", report["end_to_end"])]
+    if "first_result" in report:
+        rows.append(("first_result", report["first_result"]))
+    rows += sorted(report["stages"].items())
+    for name, row in rows:
+        print(f"{name:<44} {row['count']:>6} {row['mean']:>9} {row['p50']:>9} {row['p95']:>9} {row['p99']:>9}")
+    if "startup_s" in report:
+        print("startup (s): " + ", ".join(f"{name} {seconds}" for name, seconds in report["startup_s"].items()))
+    for error in report.get("error_samples", []):
+        print(f"error: {error}")
+
+def compare(report: dict, baseline: dict, max_regression: float) -> list:
+    """기준 결과보다 (1 + max_regression)배 넘게 느려진 지표 목록"""
+    regressions = []
+    pairs = [("end_to_end", report["end_to_end"], baseline.get("end_to_end", {}))]
+    pairs += [(name, row, baseline.get("stages", {}).get(name, {})) for name, row in report["stages"].items()]
+    for name, row, base in pairs:
+        for key in REGRESSION_KEYS:
+            if base.get(key) and row.get(key, 0) > base[key] * (1 + max_regression):
+                regressions.append(f"{name} {key}: {base[key]} -> {row[key]}")
+    if baseline.get("throughput", {}).get("papers_per_s"):
+        base_rate = baseline["throughput"]["papers_per_s"]
+        if report["throughput"]["papers_per_s"] < base_rate / (1 + max_regression):
+            regressions.append(f"papers_per_s: {base_rate} -> {report['throughput']['papers_per_s']}")
+    return regressions
+
+async def main_async(args) -> int:
+    processes, server, startup = [], None, {}
+    workdir = tempfile.mkdtemp(prefix="a2a-load-")
+    try:
+        async with httpx.AsyncClient(limits=httpx.Limits(max_connections=max(args.concurrency, 16) * 2)) as client:
+            if args.coordinator_url:
+                coordinator_url = args.coordinator_url.rstrip("/")
+                agent_urls = await discover_agents(client, coordinator_url)
+            else:
+                pdfs = sorted(glob.glob(os.path.join(args.pdf_dir, "*.pdf")))
+                if not pdfs:
+                    print(f"No PDFs in {args.pdf_dir}")
+                    return 2
+                server = start_stand_in(pdfs, args.cache_mode == "cold", args.arxiv_latency)
+                stand_in_url = f"http://127.0.0.1:{server.server_address[1]}"
+                urls, processes = start_agents(args, stand_in_url, workdir)
+                print(f"stand-in {stand_in_url}, agents starting in {workdir} ...")
+                startup = await wait_ready(client, urls, processes, args.startup_timeout)
+                coordinator_url = urls["coordinator"]
+                agent_urls = {name: [url] for name, url in urls.items()}
+
+            items = load_workload(args)
+            for item in items[:args.warmup]:
+                await run_workflow(client, coordinator_url, {**item, "topic": f"warmup {item['topic']}"}, False, args.timeout)
+
+            before = await collect_stages(client, agent_urls)
+            results, elapsed = await generate_load(client, coordinator_url, items, args)
+            after = await collect_stages(client, agent_urls)
+
+        report = build_report(args, results, elapsed, diff_stages(before, after))
+        if startup:
+            # 실행부터 ready(모델 로드 + warmup)까지, 1초 간격 polling 기준
+            report["startup_s"] = startup
+        print_report(report)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(report, f, indent=2)
+        if args.baseline:
+            with open(args.baseline) as f:
+                regressions = compare(report, json.load(f), args.max_regression)
+            for line in regressions:
+                print(f"REGRESSION {line}")
+            if regressions:
+                return 1
+        return 0 if report["errors"] == 0 else 1
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if server is not None:
+            server.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10, help="workflow requests to send")
+    parser.add_argument("--concurrency", type=int, default=2, help="closed-loop virtual users")
+    parser.add_argument("--rate", type=float, default=0.0, help="open-loop arrival rate (requests/s); overrides --concurrency")
+    parser.add_argument("--max-results", type=int, default=2, help="papers per request")
+    parser.add_argument("--workload", default=None, help='JSONL file of {"topic": ..., "max_results": ...}')
+    parser.add_argument("--stream", action="store_true", help="use the streaming workflow and record time to first result")
+    parser.add_argument("--warmup", type=int, default=1, help="requests sent before measuring")
+    parser.add_argument("--timeout", type=float, default=1800.0)
+    parser.add_argument("--tiny", action="store_true", help="use tiny random models (CPU, CI)")
+    parser.add_argument("--cache-mode", choices=["cold", "warm"], default="cold")
+    parser.add_argument("--arxiv-latency", type=float, default=0.0, help="seconds the stand-in waits per search")
+    parser.add_argument("--pdf-dir", default=os.path.join(REPO_DIR, "downloaded_papers"))
+    parser.add_argument("--port-base", type=int, default=18000)
+    parser.add_argument("--startup-timeout", type=float, default=900.0)
+    parser.add_argument("--coordinator-url", default=None, help="measure an already running stack instead")
+    parser.add_argument("--output", default=None, help="write the JSON report here")
+    parser.add_argument("--baseline", default=None, help="JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main_async(args)))
+
+if __name__ == "__main__":
+    main()
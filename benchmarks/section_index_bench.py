@@ -0,0 +1,125 @@
+"""extract_main_content / clean_text 기존 정규식 vs SectionIndex 비교 벤치마크
+
+사용법 (저장소 루트에서):
+    python benchmarks/section_index_bench.py [--size 200000] [--repeat 3] [--pdf-dir downloaded_papers]
+
+병적인 입력(종료 키워드 없는 긴 본문, "1." 토큰 다수 등)을 생성해서 두 구현의 결과가
+같은지 확인하고 실행 시간을 비교한다. PyMuPDF가 있으면 downloaded_papers의 PDF도 포함한다.
+"""
+import argparse
+import glob
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from section_index import clean_and_index  # noqa: E402
+
+def legacy_clean_text(text: str) -> str:
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'^\d+\s*$', '', text, flags=re.MULTILINE)
+    text = re.sub(r'\bREFERENCES\b.*', '', text, flags=re.DOTALL | re.IGNORECASE)
+    text = re.sub(r'\bBibliography\b.*', '', text, flags=re.DOTALL | re.IGNORECASE)
+    return text.strip()
+
+def legacy_extract_main_content(text: str) -> str:
+    abstract_match = re.search(
+        r'(?i)abstract\s*[:\-]?\s*(.*?)(?=\b(?:introduction|keywords|1\.|I\.)\b)',
+        text, re.DOTALL
+    )
+    abstract = abstract_match.group(1).strip() if abstract_match else ""
+    main_match = re.search(
+        r'(?i)(?:introduction|1\.\s*introduction).*?(?=(?:references|bibliography|acknowledgment)\b)',
+        text, re.DOTALL
+    )
+    main_content = main_match.group(0) if main_match else ""
+    return combine(abstract, main_content, text)
+
+def combine(abstract: str, main_content: str, text: str) -> str:
+    if abstract and main_content:
+        return f"Abstract: {abstract}\n\nMain Content: {main_content}"
+    if abstract:
+        return f"Abstract: {abstract}"
+    if main_content:
+        return main_content
+    return text[:3000]
+
+def new_pipeline(text: str) -> str:
+    """summarizer_agent.parse_pdf_text와 같은 흐름: 한 번 인덱싱 후 잘라내기"""
+    index = clean_and_index(text)
+    abstract = index.slice(index.abstract_span()).strip()
+    main_content = index.slice(index.main_span())
+    return combine(abstract, main_content, index.text)
+
+def filler(rng: random.Random, words: int) -> str:
+    vocab = ["the", "model", "block", "chain", "miner", "we", "show", "that", "security", "network",
+             "protocol", "latency", "results", "of", "in", "for", "data", "is", "a", "proof"]
+    return " ".join(rng.choice(vocab) for _ in range(words))
+
+def pathological_inputs(size: int) -> dict:
+    rng = random.Random(0)
+    words = size // 6
+    return {
+        # abstract / introduction가 반복되지만 종료 키워드가 없음 → 기존 정규식은 매 후보마다 끝까지 스캔
+        "no_terminators": " ".join(
+            f"abstract {filler(rng, 20)} introduction {filler(rng, 20)}" for _ in range(words // 44)
+        ),
+        # "1." 토큰과 introduction이 많고 acknowledgment는 맨 끝에만
+        "many_numbered": " ".join(
+            f"1. introduction {filler(rng, 10)} 1.5 {filler(rng, 10)}" for _ in range(words // 24)
+        ) + " acknowledgment",
+        # introduction 키워드가 아예 없는 긴 본문
+        "no_introduction": "Abstract: " + filler(rng, words),
+        # 정상적인 논문 구조
+        "well_formed": (
+            "Title Abstract: " + filler(rng, 150) + " 1. Introduction " + filler(rng, words)
+            + " Acknowledgment thanks References [1] " + filler(rng, 200)
+        ),
+    }
+
+def pdf_inputs(pdf_dir: str) -> dict:
+    try:
+        import fitz  # PyMuPDF
+    except ImportError:
+        return {}
+    texts = {}
+    for path in sorted(glob.glob(os.path.join(pdf_dir, "*.pdf"))):
+        with fitz.open(path) as doc:
+            texts[os.path.basename(path)[:40]] = "\n".join(page.get_text() for page in doc)
+    return texts
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=200_000, help="pathological input size in characters")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--pdf-dir", default="downloaded_papers")
+    args = parser.parse_args()
+
+    corpus = pathological_inputs(args.size)
+    corpus.update(pdf_inputs(args.pdf_dir))
+
+    print(f"{'input':<42} {'chars':>9} {'old ms':>10} {'new ms':>10} {'speedup':>8} {'same':>5}")
+    mismatches = 0
+    for name, text in corpus.items():
+        old = lambda: legacy_extract_main_content(legacy_clean_text(text))
+        new = lambda: new_pipeline(text)
+        same = old() == new()
+        mismatches += not same
+        old_s = best_of(old, args.repeat)
+        new_s = best_of(new, args.repeat)
+        print(f"{name:<42} {len(text):>9} {old_s * 1000:>10.1f} {new_s * 1000:>10.1f} {old_s / new_s:>7.1f}x {str(same):>5}")
+    if mismatches:
+        sys.exit(f"{mismatches} input(s) produced different output")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""워커 프로세스당 메모리 비용 측정 (공유 mmap 가중치 vs 프로세스별 사본)
+
+사용법 (저장소 루트에서, Linux):
+    python benchmarks/shared_weights_bench.py --agent summarizer --workers 4 [--mode shared private]
+
+에이전트와 같은 방식으로 모델을 로드하는 워커를 --workers개 띄우고, 모두 로드된 뒤
+(짧은 generate로 가중치 페이지를 실제로 읽은 상태에서) 각 프로세스의 RSS / PSS / private 메모리를 출력한다.
+워커 하나를 추가하는 비용은 두 번째 워커부터의 private 메모리 평균으로 보고, 모델 크기와 비교한다.
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODELS = {
+    "summarizer": "facebook/bart-large-cnn",
+    "reviewer": "google/flan-t5-large",
+}
+
+def worker(model_name: str, shared: bool, ready, measure, results) -> None:
+    # private 모드는 from_pretrained로 프로세스마다 사본을 만듦 (기본 CPU 로드도 safetensors mmap이라서)
+    if not shared:
+        os.environ["A2A_MMAP_WEIGHTS"] = "0"
+    import torch
+    from model_backend import load_seq2seq, process_memory
+
+    tokenizer, model, _ = load_seq2seq(model_name, "torch", "cpu", shared_weights=shared)
+    inputs = tokenizer("Warm up the weights of every layer.", return_tensors="pt")
+    with torch.no_grad():
+        model.generate(**inputs, max_new_tokens=8, num_beams=1)
+    model_mb = sum(p.numel() * p.element_size() for p in model.parameters()) / (1024 * 1024)
+    ready.put(os.getpid())
+    # 모든 워커가 로드된 뒤에 측정해야 PSS가 공유 페이지를 제대로 나눠서 센다
+    measure.wait()
+    results.put({"pid": os.getpid(), "model_mb": round(model_mb, 1), **process_memory()})
+
+def run_mode(model_name: str, shared: bool, workers: int) -> list:
+    ctx = multiprocessing.get_context("spawn")
+    ready, results, measure = ctx.Queue(), ctx.Queue(), ctx.Event()
+    processes = []
+    for _ in range(workers):
+        # 하나씩 띄워서 로드 중 메모리 피크가 겹치지 않도록
+        process = ctx.Process(target=worker, args=(model_name, shared, ready, measure, results))
+        process.start()
+        processes.append(process)
+        ready.get()
+    measure.set()
+    rows = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agent", choices=sorted(MODELS), default="summarizer")
+    parser.add_argument("--model", default=None, help="override the agent's model")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--mode", nargs="+", choices=["shared", "private"], default=["shared", "private"])
+    args = parser.parse_args()
+
+    model_name = args.model or MODELS[args.agent]
+    for mode in args.mode:
+        rows = run_mode(model_name, mode == "shared", args.workers)
+        print(f"\n[{mode}] {model_name} x {args.workers} workers (model weights {rows[0]['model_mb']} MB)")
+        print(f"{'pid':>8} {'rss_mb':>10} {'pss_mb':>10} {'shared_mb':>10} {'private_mb':>11}")
+        for row in rows:
+            print(f"{row['pid']:>8} {row['rss_mb']:>10} {row['pss_mb']:>10} {row['shared_mb']:>10} {row['private_mb']:>11}")
+        extra = [row["private_mb"] for row in rows[1:]] or [rows[0]["private_mb"]]
+        print(f"total PSS: {sum(row['pss_mb'] for row in rows):.1f} MB, "
+              f"cost per extra worker (private): {statistics.mean(extra):.1f} MB")
+
+if __name__ == "__main__":
+    main()
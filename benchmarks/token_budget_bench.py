@@ -0,0 +1,81 @@
+"""smart_truncate / truncate_text 기존 구현 vs token_budget 비교 벤치마크
+
+사용법 (저장소 루트에서):
+    python benchmarks/token_budget_bench.py [--pdf-dir downloaded_papers] [--repeat 3]
+
+모델 가중치는 필요 없고 토크나이저만 내려받는다.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import fitz  # PyMuPDF
+from transformers import AutoTokenizer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from token_budget import truncate_to_sentences, truncate_to_tokens  # noqa: E402
+
+def legacy_smart_truncate(tokenizer, text: str, max_tokens: int = 900) -> str:
+    """summarizer_agent.smart_truncate 기존 구현 (문장마다 다시 encode)"""
+    tokens = tokenizer.encode(text, add_special_tokens=False)
+    if len(tokens) <= max_tokens:
+        return text
+    truncated_text = ""
+    current_tokens = 0
+    for sentence in text.split('.'):
+        sentence_tokens = len(tokenizer.encode(sentence, add_special_tokens=False))
+        if current_tokens + sentence_tokens > max_tokens:
+            break
+        truncated_text += sentence + "."
+        current_tokens += sentence_tokens
+    return truncated_text
+
+def legacy_truncate_text(tokenizer, text: str, max_tokens: int = 250) -> str:
+    """reviewer_agent.truncate_text 기존 구현 (전체 encode 후 decode)"""
+    tokens = tokenizer.encode(text, add_special_tokens=False)
+    if len(tokens) <= max_tokens:
+        return text
+    return tokenizer.decode(tokens[:max_tokens], skip_special_tokens=True)
+
+def load_texts(pdf_dir: str) -> dict:
+    texts = {}
+    for path in sorted(glob.glob(os.path.join(pdf_dir, "*.pdf"))):
+        with fitz.open(path) as doc:
+            texts[os.path.basename(path)] = "\n".join(page.get_text() for page in doc)
+    return texts
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pdf-dir", default="downloaded_papers")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = load_texts(args.pdf_dir)
+    if not texts:
+        sys.exit(f"No PDFs found in {args.pdf_dir}")
+
+    cases = [
+        ("summarizer", "facebook/bart-large-cnn", 900, legacy_smart_truncate, truncate_to_sentences),
+        ("reviewer", "google/flan-t5-large", 250, legacy_truncate_text, truncate_to_tokens),
+    ]
+    print(f"{'agent':<11} {'paper':<55} {'chars':>8} {'old ms':>9} {'new ms':>9} {'speedup':>8}")
+    for agent, model_name, budget, legacy, new in cases:
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        tokenizer.model_max_length = 10 ** 9  # 긴 입력 경고 끄기
+        for name, text in texts.items():
+            old_s = best_of(lambda: legacy(tokenizer, text, budget), args.repeat)
+            new_s = best_of(lambda: new(tokenizer, text, budget), args.repeat)
+            print(f"{agent:<11} {name[:55]:<55} {len(text):>8} {old_s * 1000:>9.1f} {new_s * 1000:>9.1f} {old_s / new_s:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
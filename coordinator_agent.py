@@ -1,67 +1,402 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import requests
+import asyncio
+import json
+import os
+import uuid
+from job_store import PAPER_STAGES, JobStore
+from metrics import Metrics, request_id_var
+from replica_pool import ReplicaPool, parse_urls
 
 app = FastAPI(title="Coordinator Agent")
+metrics = Metrics("coordinator")
+metrics.install(app)
 
-FETCHER_URL = "http://127.0.0.1:8001/fetch_papers"
-SUMMARIZER_URL_SUM = "http://127.0.0.1:8002/summarize_paper"
-SUMMARIZER_URL_TEXT = "http://127.0.0.1:8002/extract_text"
-REVIEWER_URL = "http://127.0.0.1:8003/review_summary"
+# 에이전트별 replica 주소 (콤마로 구분, run_all.sh가 replica 수에 맞춰 설정)
+FETCHER_URLS = parse_urls(os.getenv("COORDINATOR_FETCHER_URLS", "http://127.0.0.1:8001"))
+SUMMARIZER_URLS = parse_urls(os.getenv("COORDINATOR_SUMMARIZER_URLS", "http://127.0.0.1:8002"))
+REVIEWER_URLS = parse_urls(os.getenv("COORDINATOR_REVIEWER_URLS", "http://127.0.0.1:8003"))
+# replica /health 확인 주기(초), 0이면 끔
+HEALTH_CHECK_INTERVAL = float(os.getenv("COORDINATOR_HEALTH_CHECK_INTERVAL", "10"))
+
+FETCH_PATH = "/fetch_papers"
+SUMMARIZE_PATH = "/summarize_paper"
+SUMMARIZE_UPLOAD_PATH = "/summarize_upload"
+FETCHER_PDF_PATH = "/pdf"
+EXTRACT_TEXT_PATH = "/extract_text"
+REVIEW_PATH = "/review_summary"
+
+# summarizer에 PDF를 넘기는 방식: path (공유 파일시스템의 경로/아티팩트 id), upload (fetcher에서 받은 PDF 바이트를 업로드)
+# upload는 summarizer를 별도 노드에 둘 때 사용
+PDF_TRANSFER = os.getenv("COORDINATOR_PDF_TRANSFER", "path")
+
+# 논문별 summarize → extract → review 체인을 동시에 몇 개까지 돌릴지
+PAPER_CONCURRENCY = int(os.getenv("COORDINATOR_PAPER_CONCURRENCY", "4"))
+# 에이전트별(replica 전체) keep-alive 커넥션 풀 크기
+POOL_MAX_CONNECTIONS = int(os.getenv("COORDINATOR_POOL_MAX_CONNECTIONS", "32"))
+
+# /jobs 단계별 워커 수 (모든 작업이 공유): 요약 단계, 리뷰 단계
+JOB_SUMMARIZE_CONCURRENCY = int(os.getenv("COORDINATOR_JOB_SUMMARIZE_CONCURRENCY", "4"))
+JOB_REVIEW_CONCURRENCY = int(os.getenv("COORDINATOR_JOB_REVIEW_CONCURRENCY", "2"))
+# 요약/리뷰 단계 실패 시 작업 안에서 다시 시도하는 횟수와 간격(초, 시도마다 늘어남)
+# summarizer/reviewer가 재시작/warmup 중이면 503을 주므로 바로 실패로 기록하지 않음
+JOB_SUMMARIZE_RETRIES = int(os.getenv("COORDINATOR_JOB_SUMMARIZE_RETRIES", "3"))
+JOB_REVIEW_RETRIES = int(os.getenv("COORDINATOR_JOB_REVIEW_RETRIES", "3"))
+JOB_RETRY_DELAY = float(os.getenv("COORDINATOR_JOB_RETRY_DELAY", "10"))
+
+# 에이전트별 ReplicaPool (startup에서 생성, shutdown에서 정리)
+clients: dict = {}
+# 작업 저장소와 실행 중인 작업 태스크, 단계별 세마포어 (startup에서 생성)
+job_store: JobStore = None
+job_tasks: dict = {}
+stage_semaphores: dict = {}
 
 class CoordinatorRequest(BaseModel):
     topic: str
     max_results: int = 3
+    # True면 논문별 결과가 준비되는 대로 NDJSON으로 스트리밍
+    stream: bool = False
+
+def _make_pool(name: str, urls: list, timeout: float, health_path: str = "/health") -> ReplicaPool:
+    return ReplicaPool(
+        name, urls,
+        timeout=timeout,
+        max_connections=POOL_MAX_CONNECTIONS,
+        health_interval=HEALTH_CHECK_INTERVAL,
+        health_path=health_path
+    )
+
+def pdf_source(paper: dict) -> dict:
+    """summarizer에 넘길 PDF 위치 (아티팩트 id가 있으면 id, 없으면 로컬 경로)"""
+    source = {"pdf_path": paper.get("local_path", "")}
+    if paper.get("pdf_artifact"):
+        source["pdf_artifact"] = paper["pdf_artifact"]
+    return source
+
+def record_profile(stage: str, data: dict) -> None:
+    """에이전트가 응답한 생성 프로파일 카운트 (부하 때문에 싼 프로파일로 처리된 비율 확인용)"""
+    if data.get("profile"):
+        metrics.inc(f"{stage}_profile_{data['profile']}")
+
+async def summarize_stage(paper: dict) -> tuple:
+    """요약 단계: (요약, 리뷰어에 넘길 원문 필드) 반환. 실패하면 요약 자리에 오류 메시지
+
+    원문 필드는 {"original_text_artifact": id} (구버전 summarizer면 {"original_text": 본문}),
+    실패하면 빈 dict
+    """
+    with metrics.timer("summarize"):
+        return await _summarize(paper)
+
+async def _summarize(paper: dict) -> tuple:
+    try:
+        if PDF_TRANSFER == "upload" and paper.get("pdf_artifact"):
+            return await _summarize_upload(paper)
+        # 요약과 추출 본문(아티팩트 id)을 한 번에 받아서 PDF를 두 번 파싱하지 않음
+        sum_resp = await clients["summarizer"].post(
+            SUMMARIZE_PATH,
+            json={**pdf_source(paper), "return_artifacts": True},
+            timeout=180
+        )
+        sum_resp.raise_for_status()
+        sum_data = sum_resp.json()
+        record_profile("summarize", sum_data)
+        if sum_data.get("text_artifact"):
+            return sum_data.get("summary", ""), {"original_text_artifact": sum_data["text_artifact"]}
+        return sum_data.get("summary", ""), {"original_text": sum_data.get("text", "")}
+    except Exception as e:
+        return f"❌ Summary generation failed: {e}", {}
+
+async def _summarize_upload(paper: dict) -> tuple:
+    """fetcher의 PDF 응답을 받는 대로 summarizer 업로드로 흘려보냄 (노드 간 공유 파일시스템 불필요)
+
+    PDF 전체를 coordinator 메모리에 올리지 않는다. 스트리밍 본문은 다시 보낼 수 없으므로
+    summarizer가 503이면 그대로 실패하고, /jobs에서는 요약 단계 재시도로 처리된다.
+    summarizer의 아티팩트 저장소는 리뷰어와 공유되지 않으므로 본문은 직접 받아서 넘긴다.
+    """
+    async with clients["fetcher"].stream("GET", f"{FETCHER_PDF_PATH}/{paper['pdf_artifact']}", timeout=60) as pdf_resp:
+        pdf_resp.raise_for_status()
+        headers = {"Content-Type": "application/pdf"}
+        if "content-length" in pdf_resp.headers:
+            headers["Content-Length"] = pdf_resp.headers["content-length"]
+        sum_resp = await clients["summarizer"].post(
+            SUMMARIZE_UPLOAD_PATH,
+            content=pdf_resp.aiter_bytes(),
+            params={"include_text": "true"},
+            headers=headers,
+            timeout=180
+        )
+    sum_resp.raise_for_status()
+    sum_data = sum_resp.json()
+    record_profile("summarize", sum_data)
+    return sum_data.get("summary", ""), {"original_text": sum_data.get("text", "")}
+
+async def review_stage(paper: dict, summary: str, original: dict) -> str:
+    """리뷰 단계: 요약이 실패했으면 건너뜀"""
+    with metrics.timer("review"):
+        return await _review(paper, summary, original)
+
+async def _review(paper: dict, summary: str, original: dict) -> str:
+    if "failed" in summary:
+        return "❌ Review skipped due to summary failure."
+    try:
+        return await request_review(paper, summary, original)
+    except Exception as e:
+        return f"❌ Review generation failed: {e}"
+
+async def request_review(paper: dict, summary: str, original: dict) -> str:
+    """리뷰어 호출. 실패하면 예외 (/jobs는 재시도하고, 동기 워크플로는 오류 메시지로 바꿈)"""
+    # 원문을 못 받았을 때만 /extract_text 호출
+    if not any(original.values()):
+        text_resp = await clients["summarizer"].post(EXTRACT_TEXT_PATH, json=pdf_source(paper), timeout=60)
+        text_resp.raise_for_status()
+        original = {"original_text": text_resp.json().get("text", "")}
+
+    # 리뷰어 타임아웃은 10분(600초)
+    rev_resp = await clients["reviewer"].post(
+        REVIEW_PATH,
+        json={**original, "summary_text": summary},
+        timeout=600
+    )
+
+    rev_resp.raise_for_status()
+    rev_data = rev_resp.json()
+    record_profile("review", rev_data)
+    return rev_data.get("feedback", "")
+
+async def process_paper(idx: int, paper: dict, semaphore: asyncio.Semaphore) -> dict:
+    """논문 하나에 대한 summarize → extract → review 체인"""
+    title = paper.get("title", "Unknown Title")
+
+    async with semaphore, metrics.timer("paper"):
+        summary, original = await summarize_stage(paper)
+        feedback = await review_stage(paper, summary, original)
+
+    return {
+        "paper_index": idx,
+        "title": title,
+        "summary": summary,
+        "feedback": feedback
+    }
+
+async def stream_report(papers: list):
+    """논문별 결과를 끝나는 순서대로 NDJSON 한 줄씩 내보냄
+
+    첫 줄은 {"type": "start", "total": N}, 이후 논문마다 {"type": "paper", ...},
+    마지막 줄은 {"type": "done"}.
+    """
+    semaphore = asyncio.Semaphore(PAPER_CONCURRENCY)
+    tasks = [
+        asyncio.create_task(process_paper(idx, paper, semaphore))
+        for idx, paper in enumerate(papers, start=1)
+    ]
+    try:
+        yield json.dumps({"type": "start", "total": len(tasks)}) + "\n"
+        for next_done in asyncio.as_completed(tasks):
+            item = await next_done
+            yield json.dumps({"type": "paper", **item}, ensure_ascii=False) + "\n"
+        yield json.dumps({"type": "done"}) + "\n"
+    finally:
+        # 클라이언트가 중간에 끊으면 남은 체인은 취소
+        for task in tasks:
+            task.cancel()
+
+async def fetch_papers(topic: str, max_results: int) -> list:
+    with metrics.timer("fetch"):
+        fetch_resp = await clients["fetcher"].post(FETCH_PATH, json={"topic": topic, "max_results": max_results}, timeout=30)
+        fetch_resp.raise_for_status()
+        return fetch_resp.json().get("papers", [])
 
 @app.post("/summarization_workflow")
 async def summarization_workflow(req: CoordinatorRequest):
     try:
-        fetch_resp = requests.post(FETCHER_URL, json={"topic": req.topic, "max_results": req.max_results}, timeout=30)
-        fetch_resp.raise_for_status()
-        papers = fetch_resp.json().get("papers", [])
+        papers = await fetch_papers(req.topic, req.max_results)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Fetcher agent failed: {e}")
 
+    if req.stream:
+        # 논문이 없으면 total 0 뒤에 바로 done
+        return StreamingResponse(stream_report(papers), media_type="application/x-ndjson")
+
     if not papers:
         return {"report": "No papers found for the given topic."}
 
-    report = []
-    for idx, paper in enumerate(papers, start=1):
-        title = paper.get("title", "Unknown Title")
-        pdf_path = paper.get("local_path", "")
-        summary, feedback = "",""
-        try:
-            sum_resp = requests.post(SUMMARIZER_URL_SUM, json={"pdf_path": pdf_path}, timeout=180)
-            sum_resp.raise_for_status()
-            summary = sum_resp.json().get("summary", "")
-        except Exception as e:
-            summary = f"❌ Summary generation failed: {e}"
+    # 요청마다 별도 세마포어: 한 요청의 느린 리뷰가 다른 요청을 막지 않음
+    semaphore = asyncio.Semaphore(PAPER_CONCURRENCY)
+    report = await asyncio.gather(*(
+        process_paper(idx, paper, semaphore)
+        for idx, paper in enumerate(papers, start=1)
+    ))
+    return {"report": list(report)}
+
+async def run_paper_stages(job_id: str, row: dict) -> None:
+    """저장된 단계부터 이어서 요약 → 리뷰 진행. 단계가 끝날 때마다 저장"""
+    idx = row["paper_index"]
+    paper = row["paper"]
+    summary = row["summary"]
+    original = {"original_text_artifact": row["text_artifact"]} if row.get("text_artifact") else {"original_text": row["text"] or ""}
+
+    if row["stage"] in ("pending", "failed"):
+        for attempt in range(JOB_SUMMARIZE_RETRIES + 1):
+            if attempt:
+                await asyncio.sleep(JOB_RETRY_DELAY * attempt)
+            async with stage_semaphores["summarize"]:
+                summary, original = await summarize_stage(paper)
+            if original:
+                break
+        if not original:
+            # 실패는 failed로 남겨서 재개(재시작 / POST /jobs/{id}/retry) 때 다시 요약
+            await asyncio.to_thread(job_store.update_paper, job_id, idx, stage="failed", summary=summary)
+            return
+        # 보통은 아티팩트 id만 기록 (구버전 summarizer면 본문)
+        await asyncio.to_thread(
+            job_store.update_paper, job_id, idx, stage="summarized", summary=summary,
+            text=original.get("original_text"), text_artifact=original.get("original_text_artifact")
+        )
 
+    feedback = None
+    for attempt in range(JOB_REVIEW_RETRIES + 1):
+        if attempt:
+            await asyncio.sleep(JOB_RETRY_DELAY * attempt)
         try:
-            if "failed" not in summary:
-                text_resp = requests.post(SUMMARIZER_URL_TEXT, json={"pdf_path": pdf_path}, timeout=60)
-                text_resp.raise_for_status()
-                original_text = text_resp.json().get("text", "")
-
-                # --- 🌟 변경된 부분: 리뷰어 타임아웃을 10분(600초)으로 늘림 🌟 ---
-                rev_resp = requests.post(
-                    REVIEWER_URL,
-                    json={"original_text": original_text, "summary_text": summary},
-                    timeout=600
-                )
-                # --- 🌟 변경된 부분 끝 🌟 ---
-
-                rev_resp.raise_for_status()
-                feedback = rev_resp.json().get("feedback", "")
-            else:
-                feedback = "❌ Review skipped due to summary failure."
+            async with stage_semaphores["review"]:
+                with metrics.timer("review"):
+                    feedback = await request_review(paper, summary, original)
+            break
         except Exception as e:
-            feedback = f"❌ Review generation failed: {e}"
-
-        report.append({
-            "paper_index": idx,
-            "title": title,
-            "summary": summary,
-            "feedback": feedback
-        })
-    return {"report": report}
\ No newline at end of file
+            error = e
+    if feedback is None:
+        # summarized와 리뷰 입력은 그대로 두고 재개 때 리뷰만 다시 시도 (오류는 feedback 자리에 보여줌)
+        await asyncio.to_thread(job_store.update_paper, job_id, idx, feedback=f"❌ Review generation failed: {error}")
+        return
+    # 리뷰가 끝나면 본문은 더 필요 없으므로 비움
+    await asyncio.to_thread(job_store.update_paper, job_id, idx, stage="done", feedback=feedback, text=None)
+
+async def run_job(job_id: str) -> None:
+    """작업 하나 실행 (재시작 후 호출되면 끝나지 않은 단계만 진행)"""
+    # 하위 에이전트 호출과 타이밍을 작업 id로 묶음 (재시작 후에도 같은 id)
+    request_id_var.set(job_id)
+    try:
+        papers = await asyncio.to_thread(job_store.get_papers, job_id)
+        if not papers:
+            job = await asyncio.to_thread(job_store.get_job, job_id)
+            await asyncio.to_thread(job_store.set_status, job_id, "fetching")
+            fetched = await fetch_papers(job["topic"], job["max_results"])
+            await asyncio.to_thread(job_store.add_papers, job_id, fetched)
+            papers = await asyncio.to_thread(job_store.get_papers, job_id)
+
+        await asyncio.to_thread(job_store.set_status, job_id, "running")
+        await asyncio.gather(*(
+            run_paper_stages(job_id, row) for row in papers if row["stage"] != "done"
+        ))
+        stages = [row["stage"] for row in await asyncio.to_thread(job_store.get_papers, job_id)]
+        failed = {"summarize": stages.count("failed"), "review": stages.count("summarized")}
+        if any(failed.values()):
+            error = ", ".join(f"{count} paper(s) failed to {stage}" for stage, count in failed.items() if count)
+            await asyncio.to_thread(job_store.set_status, job_id, "failed", error)
+        else:
+            await asyncio.to_thread(job_store.set_status, job_id, "done")
+    except asyncio.CancelledError:
+        # shutdown: 상태는 그대로 두고 다음 startup에서 이어서 진행
+        raise
+    except Exception as e:
+        await asyncio.to_thread(job_store.set_status, job_id, "failed", str(e))
+    finally:
+        job_tasks.pop(job_id, None)
+
+def start_job(job_id: str) -> None:
+    job_tasks[job_id] = asyncio.create_task(run_job(job_id))
+
+@app.post("/jobs", status_code=202)
+async def create_job(req: CoordinatorRequest):
+    """워크플로를 백그라운드 작업으로 시작하고 작업 id를 바로 반환"""
+    job_id = uuid.uuid4().hex
+    await asyncio.to_thread(job_store.create_job, job_id, req.topic, req.max_results)
+    start_job(job_id)
+    return {"job_id": job_id, "status": "queued"}
+
+@app.post("/jobs/{job_id}/retry", status_code=202)
+async def retry_job(job_id: str):
+    """실패한 논문만 다시 진행 (끝난 단계는 그대로)"""
+    job = await asyncio.to_thread(job_store.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    if job_id in job_tasks:
+        return {"job_id": job_id, "status": job["status"]}
+    await asyncio.to_thread(job_store.set_status, job_id, "queued")
+    start_job(job_id)
+    return {"job_id": job_id, "status": "queued"}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """작업 상태, 논문별 단계, 지금까지 나온 결과"""
+    job = await asyncio.to_thread(job_store.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    papers = await asyncio.to_thread(job_store.get_papers, job_id)
+
+    progress = {stage: 0 for stage in PAPER_STAGES}
+    for row in papers:
+        progress[row["stage"]] += 1
+
+    return {
+        "job_id": job_id,
+        "topic": job["topic"],
+        "status": job["status"],
+        "error": job["error"],
+        "created": job["created"],
+        "updated": job["updated"],
+        "progress": {"total": len(papers), **progress},
+        "report": [
+            {
+                "paper_index": row["paper_index"],
+                "title": row["title"],
+                "stage": row["stage"],
+                "summary": row["summary"] or "",
+                "feedback": row["feedback"] or ""
+            }
+            for row in papers
+        ]
+    }
+
+@app.get("/metrics")
+async def metrics_endpoint(format: str = "json"):
+    """단계별(fetch / summarize / review / paper) 지연 시간 히스토그램, in-flight, 에이전트별 진행 중인 요청 수"""
+    return metrics.response(format)
+
+@app.get("/replicas")
+async def replicas():
+    """에이전트별 replica 상태 (healthy 여부, 진행 중인 요청 수 등)"""
+    return {name: pool.snapshot() for name, pool in clients.items()}
+
+@app.on_event("startup")
+async def startup_event():
+    clients["fetcher"] = _make_pool("fetcher", FETCHER_URLS, timeout=30)
+    # 모델 에이전트는 로드/warmup이 끝난 replica에만 보냄 (재시작 중인 replica는 ready가 될 때까지 제외)
+    clients["summarizer"] = _make_pool("summarizer", SUMMARIZER_URLS, timeout=180, health_path="/health/ready")
+    clients["reviewer"] = _make_pool("reviewer", REVIEWER_URLS, timeout=600, health_path="/health/ready")
+    for name, pool in clients.items():
+        pool.start()
+        metrics.gauge(f"{name}_outstanding", lambda pool=pool: sum(r.outstanding for r in pool.replicas))
+        metrics.gauge(f"{name}_healthy_replicas", lambda pool=pool: sum(r.healthy for r in pool.replicas))
+    metrics.gauge("jobs_running", lambda: len(job_tasks))
+
+    global job_store
+    job_store = JobStore()
+    stage_semaphores["summarize"] = asyncio.Semaphore(JOB_SUMMARIZE_CONCURRENCY)
+    stage_semaphores["review"] = asyncio.Semaphore(JOB_REVIEW_CONCURRENCY)
+    # 이전 실행에서 끝나지 않은 작업 재개
+    for job_id in job_store.unfinished_jobs():
+        start_job(job_id)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    tasks = list(job_tasks.values())
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    job_store.close()
+
+    for client in clients.values():
+        await client.aclose()
+    clients.clear()
@@ -1,61 +1,413 @@
-import re
 import os
+import json
+import time
+import asyncio
 import traceback
-import requests
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from contextlib import aclosing, asynccontextmanager
+import httpx
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
+from metrics import Metrics, hit_ratio
+from artifact_store import ArtifactStore
 
 app = FastAPI(title="Fetcher Agent")
-ARXIV_API = "http://export.arxiv.org/api/query"
+metrics = Metrics("fetcher")
+metrics.install(app)
+# arXiv API / PDF 주소 (벤치마크에서는 로컬 stand-in 서버로 바꿔서 사용)
+ARXIV_API = os.getenv("FETCHER_ARXIV_API", "http://export.arxiv.org/api/query")
+PDF_BASE_URL = os.getenv("FETCHER_PDF_BASE_URL", "https://arxiv.org/pdf").rstrip("/")
+DOWNLOAD_DIR = "downloaded_papers"
+
+# 동시에 받을 PDF 개수 상한
+DOWNLOAD_CONCURRENCY = int(os.getenv("FETCHER_DOWNLOAD_CONCURRENCY", "4"))
+# 공유 커넥션 풀 크기
+POOL_MAX_CONNECTIONS = int(os.getenv("FETCHER_POOL_MAX_CONNECTIONS", "16"))
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# 같은 검색 결과를 재사용할 시간(초)과 최대 보관 쿼리 수
+QUERY_CACHE_TTL = float(os.getenv("FETCHER_QUERY_CACHE_TTL", "600"))
+QUERY_CACHE_SIZE = int(os.getenv("FETCHER_QUERY_CACHE_SIZE", "256"))
+
+# bulk 모드: arXiv 페이지 크기 상한과 페이지 사이 대기 시간(arXiv API 권장 3초)
+BULK_MAX_PAGE_SIZE = int(os.getenv("FETCHER_BULK_MAX_PAGE_SIZE", "200"))
+BULK_PAGE_DELAY = float(os.getenv("FETCHER_BULK_PAGE_DELAY", "3.0"))
+
+ATOM_NS = "{http://www.w3.org/2005/Atom}"
 
 # Add a User-Agent header to mimic a web browser
 HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 }
 
+# startup에서 생성되는 공유 AsyncClient
+clients: dict = {}
+# 받은 PDF를 등록하는 공유 아티팩트 저장소 (다른 에이전트에는 id만 넘김)
+artifact_store = ArtifactStore()
+# 같은 파일을 여러 요청이 동시에 받지 않도록 경로별 [lock, 대기 수] (대기가 없어지면 제거)
+download_locks: dict = {}
+
 class FetchRequest(BaseModel):
     topic: str
     max_results: int = 3
 
+class BulkFetchRequest(BaseModel):
+    topic: str
+    max_results: int = 1000
+    page_size: int = 100
+    # False면 PDF는 받지 않고 메타데이터만 스트리밍
+    download: bool = True
+
+class QueryCache:
+    """검색 결과 TTL 캐시 (정규화된 topic + paging 파라미터 기준, 크기 제한)"""
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(topic: str, start: int, max_results: int) -> tuple:
+        return (" ".join(topic.lower().split()), start, max_results)
+
+    def get(self, key: tuple):
+        item = self.entries.get(key)
+        if item is None or item[0] < time.monotonic():
+            if item is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def put(self, key: tuple, value: list) -> None:
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+query_cache = QueryCache(QUERY_CACHE_TTL, QUERY_CACHE_SIZE)
+# 지금 받고 있는 PDF 수
+active_downloads = 0
+
+metrics.gauge("query_cache_hit_ratio", lambda: hit_ratio(query_cache.hits, query_cache.misses))
+metrics.gauge("active_downloads", lambda: active_downloads)
+
+def parse_entry(elem: ET.Element) -> dict:
+    """Atom <entry> 엘리먼트 하나를 dict로 변환"""
+    id_text = (elem.findtext(f"{ATOM_NS}id") or "").strip()
+    return {
+        "arxiv_id": id_text.rsplit("/abs/", 1)[-1],
+        "title": (elem.findtext(f"{ATOM_NS}title") or "").strip().replace("\n", " "),
+        "authors": [(author.findtext(f"{ATOM_NS}name") or "").strip() for author in elem.findall(f"{ATOM_NS}author")],
+        "abstract": " ".join((elem.findtext(f"{ATOM_NS}summary") or "").split()),
+        "categories": [cat.get("term") for cat in elem.findall(f"{ATOM_NS}category") if cat.get("term")],
+        "published": (elem.findtext(f"{ATOM_NS}published") or "").strip(),
+    }
+
+async def stream_arxiv_entries(client: httpx.AsyncClient, params: dict):
+    """arXiv Atom 응답을 받는 대로 파싱해서 entry를 하나씩 yield
+
+    arxiv_query 시간은 소비자가 entry를 처리하는 동안(yield에서 멈춘 시간)을 빼고 잰다.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    root = None
+    busy = 0.0
+    start = time.perf_counter()
+    try:
+        async with client.stream("GET", ARXIV_API, params=params, headers=HEADERS, timeout=30) as resp:
+            resp.raise_for_status()
+            async for chunk in resp.aiter_bytes():
+                parser.feed(chunk)
+                for event, elem in parser.read_events():
+                    if event == "start":
+                        if root is None:
+                            root = elem
+                        continue
+                    if elem.tag == f"{ATOM_NS}entry":
+                        entry = parse_entry(elem)
+                        # 처리한 entry는 트리에서 떼어내서 메모리를 일정하게 유지
+                        if root is not None:
+                            root.remove(elem)
+                        if entry["arxiv_id"]:
+                            busy += time.perf_counter() - start
+                            start = None
+                            yield entry
+                            start = time.perf_counter()
+        parser.close()
+    finally:
+        # 소비자가 중간에 닫으면 yield에서 멈춘 상태(start None)로 여기 도달
+        if start is not None:
+            busy += time.perf_counter() - start
+        metrics.observe("arxiv_query", busy)
+
+@asynccontextmanager
+async def download_lock(local_path: str):
+    """경로별 다운로드 lock. 마지막 대기자가 끝나면 항목을 지워 download_locks가 계속 커지지 않게 함"""
+    entry = download_locks.setdefault(local_path, [asyncio.Lock(), 0])
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            download_locks.pop(local_path, None)
+
+def expected_size(resp: httpx.Response) -> int:
+    """응답 헤더로 본 전체 파일 크기 (알 수 없으면 None)
+
+    206/416은 Content-Range의 전체 크기, 200은 인코딩되지 않은 본문의 Content-Length.
+    """
+    content_range = resp.headers.get("content-range", "")
+    total = content_range.rpartition("/")[2]
+    if total.isdigit():
+        return int(total)
+    if resp.status_code == 200 and "content-encoding" not in resp.headers:
+        length = resp.headers.get("content-length", "")
+        if length.isdigit():
+            return int(length)
+    return None
+
+async def download_pdf(client: httpx.AsyncClient, pdf_url: str, local_path: str) -> None:
+    """PDF를 .part 임시 파일로 스트리밍한 뒤 원자적으로 rename
+
+    완성된 파일이 이미 있으면 건너뛰고, .part가 남아 있으면 Range 요청으로 이어받는다.
+    rename 전에 .part 크기를 서버가 알려준 전체 크기와 비교하고, 다르면 .part를 지우고 실패시킨다.
+    """
+    if os.path.exists(local_path) and os.path.getsize(local_path) > 0:
+        metrics.inc("pdf_download_skipped")
+        return
+
+    part_path = local_path + ".part"
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    headers = dict(HEADERS)
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+
+    global active_downloads
+    active_downloads += 1
+    try:
+        with metrics.timer("pdf_download"):
+            async with client.stream("GET", pdf_url, headers=headers, timeout=60, follow_redirects=True) as resp:
+                size = expected_size(resp)
+                if resp.status_code == 416:
+                    # .part가 이미 끝까지 받아진 경우에만 정상 (크기를 모르거나 다르면 아래에서 실패)
+                    if size is None:
+                        os.remove(part_path)
+                        raise RuntimeError(f"Range not satisfiable for {pdf_url} at offset {offset}")
+                else:
+                    resp.raise_for_status()
+                    # 서버가 Range를 무시하고 200을 주면 처음부터 다시 씀
+                    mode = "ab" if offset and resp.status_code == 206 else "wb"
+                    with open(part_path, mode) as f:
+                        async for chunk in resp.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                            f.write(chunk)
+                            metrics.inc("pdf_download_bytes", len(chunk))
+    finally:
+        active_downloads -= 1
+
+    actual = os.path.getsize(part_path)
+    if size is not None and actual != size:
+        # 잘린 다운로드나 어긋난 이어받기: 다음 시도는 처음부터
+        os.remove(part_path)
+        metrics.inc("pdf_download_size_mismatch")
+        raise RuntimeError(f"Incomplete download of {pdf_url}: {actual} of {size} bytes")
+    os.replace(part_path, local_path)
+
+def pdf_filename(arxiv_id: str) -> str:
+    """arXiv id로 만든 파일명 (제목은 앞부분이 같은 논문끼리 겹치므로 쓰지 않음)
+
+    옛 형식 id(hep-th/9901001v1)의 '/'는 '_'로 바꾼다.
+    """
+    name = "".join(c for c in arxiv_id.replace("/", "_") if c.isalnum() or c in "_.-")
+    if not name.strip("."):
+        raise ValueError(f"Entry has no usable arXiv id: {arxiv_id!r}")
+    return name + ".pdf"
+
+async def fetch_entry(entry: dict, semaphore: asyncio.Semaphore):
+    try:
+        title_tag = entry["title"]
+        pdf_url = f"{PDF_BASE_URL}/{entry['arxiv_id']}.pdf"
+        local_path = os.path.join(DOWNLOAD_DIR, pdf_filename(entry["arxiv_id"]))
+
+        async with semaphore, download_lock(local_path):
+            await download_pdf(clients["http"], pdf_url, local_path)
+
+        paper = {
+            **entry,
+            "pdf_url": pdf_url,
+            "local_path": os.path.abspath(local_path)
+        }
+        try:
+            paper["pdf_artifact"] = await asyncio.to_thread(
+                artifact_store.put_file, local_path, "pdf", {"arxiv_id": entry.get("arxiv_id"), "title": title_tag}
+            )
+        except Exception:
+            # 저장소에 못 넣어도 local_path로는 계속 동작
+            traceback.print_exc()
+        return paper
+    except Exception:
+        # If one paper fails, skip it and continue with the others
+        return None
+
 @app.post("/fetch_papers")
 async def fetch_papers(req: FetchRequest):
     params = {"search_query": f"all:{req.topic}", "start": 0, "max_results": req.max_results}
-    try:
-        # Add the 'headers=HEADERS' argument to the request call
-        resp = requests.get(ARXIV_API, params=params, headers=HEADERS, timeout=30)
-        resp.raise_for_status()
-    except Exception as e:
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"arXiv API request failed: {e}")
-
-    content = resp.text
-    entries = content.split("<entry>")
-    os.makedirs("downloaded_papers", exist_ok=True)
-    downloaded = []
-
-    for entry in entries[1 : req.max_results + 1]:
+    cache_key = QueryCache.make_key(req.topic, params["start"], req.max_results)
+    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+
+    # 공유 커넥션 풀 위에서 병렬 다운로드 (동시성 상한 DOWNLOAD_CONCURRENCY)
+    semaphore = asyncio.Semaphore(DOWNLOAD_CONCURRENCY)
+    tasks = []
+
+    cached = query_cache.get(cache_key)
+    if cached is not None:
+        tasks = [asyncio.create_task(fetch_entry(entry, semaphore)) for entry in cached]
+    else:
+        entries = []
         try:
-            title_tag = entry.split("<title>")[1].split("</title>")[0].strip().replace("\n", " ")
-            id_match = re.search(r'<id>http://arxiv\.org/abs/([^<]+)</id>', entry)
-            if not id_match: continue
-            arxiv_id = id_match.group(1)
-            pdf_url = f"https://arxiv.org/pdf/{arxiv_id}.pdf"
-            filename = "".join(c for c in title_tag.replace(" ", "_")[:50] if c.isalnum() or c in ["_", "."]) + ".pdf"
-            local_path = os.path.join("downloaded_papers", filename)
-
-            # Also add headers when downloading the PDF
-            pdf_data = requests.get(pdf_url, headers=HEADERS, timeout=60)
-            pdf_data.raise_for_status()
-            with open(local_path, "wb") as f:
-                f.write(pdf_data.content)
-
-            downloaded.append({
-                "title": title_tag,
-                "pdf_url": pdf_url,
-                "local_path": os.path.abspath(local_path)
-            })
-        except Exception:
-            # If one paper fails, skip it and continue with the others
-            continue
-            
-    return {"papers": downloaded}
\ No newline at end of file
+            # entry가 도착하는 대로 다운로드를 시작
+            async with aclosing(stream_arxiv_entries(clients["http"], params)) as stream:
+                async for entry in stream:
+                    if len(entries) >= req.max_results:
+                        break
+                    entries.append(entry)
+                    tasks.append(asyncio.create_task(fetch_entry(entry, semaphore)))
+        except Exception as e:
+            for task in tasks:
+                task.cancel()
+            traceback.print_exc()
+            raise HTTPException(status_code=500, detail=f"arXiv API request failed: {e}")
+        query_cache.put(cache_key, entries)
+
+    results = await asyncio.gather(*tasks)
+    downloaded = [paper for paper in results if paper is not None]
+
+    return {"papers": downloaded}
+
+async def page_arxiv_entries(topic: str, max_results: int, page_size: int):
+    """arXiv 결과를 page_size 단위로 페이징하면서 entry를 하나씩 yield"""
+    page_size = max(1, min(page_size, BULK_MAX_PAGE_SIZE))
+    start = 0
+    while start < max_results:
+        params = {
+            "search_query": f"all:{topic}",
+            "start": start,
+            "max_results": min(page_size, max_results - start),
+        }
+        count = 0
+        async with aclosing(stream_arxiv_entries(clients["http"], params)) as stream:
+            async for entry in stream:
+                count += 1
+                yield entry
+        if count == 0:
+            break
+        start += count
+        if start < max_results:
+            await asyncio.sleep(BULK_PAGE_DELAY)
+
+async def harvest_ndjson(req: BulkFetchRequest):
+    """페이징 → 다운로드 → NDJSON 출력을 bounded 큐로 연결한 파이프라인
+
+    큐 크기가 고정이라 max_results와 무관하게 메모리 사용량이 일정하다.
+    """
+    os.makedirs(DOWNLOAD_DIR, exist_ok=True)
+    entry_queue = asyncio.Queue(maxsize=DOWNLOAD_CONCURRENCY * 2)
+    result_queue = asyncio.Queue(maxsize=DOWNLOAD_CONCURRENCY * 2)
+    semaphore = asyncio.Semaphore(DOWNLOAD_CONCURRENCY)
+    done = object()
+
+    async def producer():
+        try:
+            async for entry in page_arxiv_entries(req.topic, req.max_results, req.page_size):
+                await entry_queue.put(entry)
+        except Exception as e:
+            traceback.print_exc()
+            await result_queue.put({"error": f"arXiv API request failed: {e}"})
+        finally:
+            for _ in range(DOWNLOAD_CONCURRENCY):
+                await entry_queue.put(done)
+
+    async def worker():
+        while True:
+            entry = await entry_queue.get()
+            if entry is done:
+                await result_queue.put(done)
+                return
+            if req.download:
+                paper = await fetch_entry(entry, semaphore)
+            else:
+                paper = {**entry, "pdf_url": f"{PDF_BASE_URL}/{entry['arxiv_id']}.pdf"}
+            if paper is not None:
+                await result_queue.put(paper)
+
+    tasks = [asyncio.create_task(producer())]
+    tasks += [asyncio.create_task(worker()) for _ in range(DOWNLOAD_CONCURRENCY)]
+    try:
+        finished = 0
+        while finished < DOWNLOAD_CONCURRENCY:
+            item = await result_queue.get()
+            if item is done:
+                finished += 1
+                continue
+            yield json.dumps(item, ensure_ascii=False) + "\n"
+    finally:
+        # 클라이언트가 중간에 끊어도 남은 작업 정리
+        for task in tasks:
+            task.cancel()
+
+@app.post("/fetch_papers_bulk")
+async def fetch_papers_bulk(req: BulkFetchRequest):
+    """대량 수집 모드: arXiv를 페이지 단위로 돌면서 결과를 NDJSON으로 스트리밍"""
+    if req.max_results < 1:
+        raise HTTPException(status_code=400, detail="max_results must be positive")
+    return StreamingResponse(harvest_ndjson(req), media_type="application/x-ndjson")
+
+@app.get("/pdf/{artifact_id}")
+async def get_pdf(artifact_id: str):
+    """아티팩트 id(sha256)로 PDF 바이트를 스트리밍 (공유 파일시스템이 없는 노드의 summarizer로 넘길 때)"""
+    try:
+        path = await asyncio.to_thread(artifact_store.path, artifact_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return FileResponse(path, media_type="application/pdf", headers={"X-Content-SHA256": artifact_id})
+
+@app.get("/cache_stats")
+async def cache_stats():
+    """검색 결과 캐시 통계"""
+    return {
+        "entries": len(query_cache.entries),
+        "hits": query_cache.hits,
+        "misses": query_cache.misses,
+        "ttl": query_cache.ttl,
+        "maxsize": query_cache.maxsize,
+    }
+
+@app.get("/metrics")
+async def metrics_endpoint(format: str = "json"):
+    """arXiv 조회 / PDF 다운로드 지연 시간 히스토그램, in-flight, 검색 캐시 hit ratio"""
+    return metrics.response(format)
+
+@app.get("/health")
+async def health_check():
+    """헬스 체크 (coordinator의 replica 상태 확인용)"""
+    return {"status": "healthy"}
+
+@app.on_event("startup")
+async def startup_event():
+    limits = httpx.Limits(max_connections=POOL_MAX_CONNECTIONS, max_keepalive_connections=POOL_MAX_CONNECTIONS)
+    clients["http"] = httpx.AsyncClient(limits=limits)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for client in clients.values():
+        await client.aclose()
+    clients.clear()
+    artifact_store.close()
@@ -0,0 +1,119 @@
+import logging
+import threading
+import time
+from collections import deque
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+# 요청에서 프로파일을 안 주거나 "auto"면 부하 정책이 고름
+AUTO = "auto"
+# 최근 모델 경로 지연 시간 몇 개로 p95를 계산할지
+LATENCY_WINDOW = 50
+# step-up은 p95 샘플이 이 개수 이상 모였을 때만 (step-down 직후 빈 윈도우로 바로 올라가지 않도록)
+MIN_SAMPLES = 5
+# 임계값의 이 비율 아래로 내려가야 한 단계 올림 (경계에서 오르내리지 않도록)
+RECOVER_FRACTION = 0.5
+
+class GenerationProfiles:
+    """이름 붙은 생성 파라미터 프로파일 + 부하 기반 자동 선택
+
+    profiles는 품질이 높은 순서 (예: quality → balanced → fast).
+    요청이 프로파일을 지정하면 그대로 쓰고, auto면 현재 단계의 프로파일을 쓴다.
+    대기 중인 요청 수(load_fn)나 최근 모델 경로 p95가 임계값을 넘으면 한 단계 싼 프로파일로 내리고,
+    부하가 임계값의 RECOVER_FRACTION 아래로 떨어지면 한 단계 올린다. 단계 변경 사이에는 cooldown_s를 둔다.
+    어떤 프로파일로 처리했는지는 응답과 메트릭(profile_<이름> 카운터, <stage>_<이름> 히스토그램)에 남긴다.
+    """
+
+    def __init__(self, stage: str, profiles: dict, default: str = AUTO, load_fn=None, metrics=None,
+                 max_queue: int = 8, max_p95_s: float = 0.0, cooldown_s: float = 30.0):
+        self.stage = stage
+        self.profiles = profiles
+        self.order = list(profiles)
+        self.default = default if default in profiles else AUTO
+        self.load_fn = load_fn or (lambda: 0)
+        self.metrics = metrics
+        self.max_queue = max_queue
+        self.max_p95_s = max_p95_s
+        self.cooldown_s = cooldown_s
+        self.level = 0
+        self.changed = time.monotonic()
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.steps = {"down": 0, "up": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def current(self) -> str:
+        return self.order[self.level]
+
+    def resolve(self, requested: str = None) -> str:
+        """요청에 쓸 프로파일 이름 (알 수 없는 이름이면 400)"""
+        requested = requested or self.default
+        if requested == AUTO:
+            self._adjust()
+            return self.current
+        if requested not in self.profiles:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown generation profile {requested!r}, choose from {[AUTO, *self.order]}"
+            )
+        return requested
+
+    def observe(self, profile: str, seconds: float) -> None:
+        """모델 경로로 처리한 요청 하나 기록 (캐시 hit은 p95를 낮춰 보이게 하므로 넣지 않음)"""
+        with self._lock:
+            self.latencies.append(seconds)
+        if self.metrics is not None:
+            self.metrics.observe(f"{self.stage}_{profile}", seconds)
+
+    def record(self, profile: str) -> None:
+        """응답한 요청의 프로파일 카운트 (캐시 hit 포함)"""
+        if self.metrics is not None:
+            self.metrics.inc(f"profile_{profile}")
+
+    def p95(self) -> float:
+        with self._lock:
+            latencies = sorted(self.latencies)
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+
+    def _adjust(self) -> None:
+        now = time.monotonic()
+        if now - self.changed < self.cooldown_s:
+            return
+        queue = self.load_fn()
+        p95 = self.p95()
+        overloaded = queue >= self.max_queue or (self.max_p95_s > 0 and p95 >= self.max_p95_s)
+        relaxed = queue <= self.max_queue * RECOVER_FRACTION and (
+            self.max_p95_s <= 0 or (len(self.latencies) >= MIN_SAMPLES and p95 <= self.max_p95_s * RECOVER_FRACTION)
+        )
+        with self._lock:
+            if overloaded and self.level < len(self.order) - 1:
+                self.level += 1
+                self.steps["down"] += 1
+            elif relaxed and not overloaded and self.level > 0:
+                self.level -= 1
+                self.steps["up"] += 1
+            else:
+                return
+            self.changed = now
+            # 새 프로파일의 지연 시간으로 다시 판단
+            self.latencies.clear()
+        logger.warning(f"{self.stage}: generation profile -> {self.current} (queue={queue}, p95={p95:.2f}s)")
+
+    def snapshot(self) -> dict:
+        return {
+            "default": self.default,
+            "current": self.current,
+            "profiles": self.order,
+            "recent_p95_s": round(self.p95(), 3),
+            "queue": self.load_fn(),
+            "steps": dict(self.steps),
+            "thresholds": {
+                "max_queue": self.max_queue,
+                "max_p95_s": self.max_p95_s,
+                "cooldown_s": self.cooldown_s,
+            },
+        }
@@ -0,0 +1,62 @@
+import asyncio
+import contextvars
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+class InferencePool:
+    """모델 추론 전용 워커 풀 + 제한된 admission 큐
+
+    토크나이저/generate 같은 블로킹 작업을 이벤트 루프 밖의 전용 스레드에서
+    실행해서 /health 등 다른 엔드포인트가 계속 응답하도록 한다.
+    동시에 받을 수 있는 요청 수(실행 중 + 대기)는 max_workers + max_queue로 제한하고,
+    초과하면 Retry-After 헤더와 함께 503을 바로 돌려준다.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int, retry_after: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.capacity = self.max_workers + max(0, max_queue)
+        self.retry_after = retry_after
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self.admitted = 0
+        self.rejected = 0
+
+    @contextmanager
+    def slot(self):
+        """요청 하나를 admission 큐에 넣음. 가득 찼으면 503"""
+        if self.admitted >= self.capacity:
+            self.rejected += 1
+            logger.warning(f"{self.name}: admission queue full ({self.admitted}/{self.capacity})")
+            raise HTTPException(
+                status_code=503,
+                detail=f"{self.name} is overloaded, retry later.",
+                headers={"Retry-After": str(self.retry_after)}
+            )
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.admitted -= 1
+
+    async def run(self, fn, *args, **kwargs):
+        """블로킹 함수를 전용 워커 스레드에서 실행 (요청 id 등 contextvar도 같이 넘김)"""
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self.executor, functools.partial(context.run, fn, *args, **kwargs))
+
+    def snapshot(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "capacity": self.capacity,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,124 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from result_cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+JOB_DB_PATH = os.getenv("COORDINATOR_JOB_DB", os.path.join(CACHE_DIR, "jobs.sqlite3"))
+
+# 작업 상태: queued → fetching → running → done / failed
+JOB_ACTIVE = ("queued", "fetching", "running")
+# 논문별 단계: pending(요약 전) → summarized(리뷰 전) → done, 요약이 실패하면 failed (재개 시 다시 요약)
+# 리뷰가 실패하면 summarized에 머묾 (재개 시 저장된 본문으로 리뷰만 다시)
+PAPER_STAGES = ("pending", "summarized", "failed", "done")
+
+class JobStore:
+    """coordinator의 비동기 작업 상태를 저장하는 SQLite 저장소
+
+    논문마다 현재 단계와 중간 결과(요약, 리뷰 입력용 본문)를 기록해 두므로
+    coordinator가 재시작되어도 끝난 단계는 다시 하지 않고 남은 단계부터 이어서 진행한다.
+    """
+
+    def __init__(self, path: str = JOB_DB_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, topic TEXT NOT NULL, max_results INTEGER NOT NULL, "
+            "status TEXT NOT NULL, error TEXT, created REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS papers ("
+            "job_id TEXT NOT NULL, paper_index INTEGER NOT NULL, title TEXT NOT NULL, "
+            "paper TEXT NOT NULL, stage TEXT NOT NULL, summary TEXT, text TEXT, feedback TEXT, "
+            "updated REAL NOT NULL, PRIMARY KEY (job_id, paper_index))"
+        )
+        # 이전 버전 DB: 리뷰 입력을 아티팩트 id로 기록하는 컬럼 추가
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(papers)")}
+        if "text_artifact" not in columns:
+            self._conn.execute("ALTER TABLE papers ADD COLUMN text_artifact TEXT")
+        self._conn.commit()
+
+    def create_job(self, job_id: str, topic: str, max_results: int) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, topic, max_results, status, created, updated) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, topic, max_results, now, now)
+            )
+            self._conn.commit()
+
+    def set_status(self, job_id: str, status: str, error: str = None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, updated = ? WHERE id = ?",
+                (status, error, time.time(), job_id)
+            )
+            self._conn.commit()
+
+    def add_papers(self, job_id: str, papers: list) -> None:
+        """fetch 결과 저장 (이미 저장된 논문은 그대로 둠)"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO papers (job_id, paper_index, title, paper, stage, updated) "
+                "VALUES (?, ?, ?, ?, 'pending', ?)",
+                [
+                    (job_id, idx, paper.get("title", "Unknown Title"), json.dumps(paper, ensure_ascii=False), now)
+                    for idx, paper in enumerate(papers, start=1)
+                ]
+            )
+            self._conn.execute("UPDATE jobs SET updated = ? WHERE id = ?", (now, job_id))
+            self._conn.commit()
+
+    def update_paper(self, job_id: str, paper_index: int, **fields) -> None:
+        """논문 하나의 단계/결과 갱신 (stage, summary, text, text_artifact, feedback)"""
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE papers SET {columns}, updated = ? WHERE job_id = ? AND paper_index = ?",
+                (*fields.values(), time.time(), job_id, paper_index)
+            )
+            self._conn.commit()
+
+    def get_job(self, job_id: str):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def get_papers(self, job_id: str) -> list:
+        """논문 번호 순서대로 반환 (paper는 fetcher가 준 원래 dict)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM papers WHERE job_id = ? ORDER BY paper_index", (job_id,)
+            ).fetchall()
+        papers = []
+        for row in rows:
+            item = dict(row)
+            item["paper"] = json.loads(item["paper"])
+            papers.append(item)
+        return papers
+
+    def unfinished_jobs(self) -> list:
+        """재시작 시 이어서 돌릴 작업 id (생성 순). 요약/리뷰에 실패한 논문이 남은 작업도 포함"""
+        placeholders = ", ".join("?" for _ in JOB_ACTIVE)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id FROM jobs WHERE status IN ({placeholders}) "
+                "OR (status = 'failed' AND EXISTS (SELECT 1 FROM papers WHERE job_id = jobs.id AND stage IN ('failed', 'summarized'))) "
+                "ORDER BY created", JOB_ACTIVE
+            ).fetchall()
+        return [row["id"] for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,237 @@
+import contextvars
+import os
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+from fastapi.responses import Response
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+
+# coordinator가 만들어서 하위 에이전트 호출마다 그대로 전달하는 요청 id 헤더
+REQUEST_ID_HEADER = "X-Request-ID"
+# 현재 요청의 id (미들웨어에서 설정, 태스크/to_thread로 복사되어 전달됨)
+request_id_var = contextvars.ContextVar("request_id", default=None)
+
+# 지연 시간 히스토그램 버킷 (초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+# /metrics에 같이 보여줄 최근 단계 기록 수 (요청 id로 에이전트 간 타이밍을 맞춰볼 때 사용)
+RECENT_EVENTS = int(os.getenv("A2A_METRICS_RECENT_EVENTS", "200"))
+
+def current_request_id():
+    return request_id_var.get()
+
+def hit_ratio(hits: int, misses: int) -> float:
+    lookups = hits + misses
+    return round(hits / lookups, 3) if lookups else 0.0
+
+def bucket_quantile(buckets: dict, count: int, q: float, maximum: float) -> float:
+    """누적 버킷 카운트에서 분위수 (버킷 상한으로 근사, 관측 최댓값을 넘지 않음)"""
+    if not count:
+        return 0.0
+    rank = q * count
+    for bound, seen in buckets.items():
+        if bound != "+Inf" and seen >= rank:
+            return min(float(bound), maximum)
+    return maximum
+
+def prometheus_name(name: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", name)
+
+class GaugeCollector:
+    """/metrics를 읽을 때 in-flight 수와 gauge 함수 값을 계산하는 Prometheus collector"""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def collect(self):
+        service = self.metrics.service
+        in_flight = GaugeMetricFamily("a2a_in_flight", "Requests in flight", labels=["service"])
+        in_flight.add_metric([service], self.metrics.in_flight)
+        yield in_flight
+        for name, value in self.metrics.gauge_values().items():
+            # 숫자가 아닌 gauge(None 등)는 JSON에만 보여줌
+            if isinstance(value, (int, float)):
+                gauge = GaugeMetricFamily(f"a2a_{prometheus_name(name)}", name, labels=["service"])
+                gauge.add_metric([service], value)
+                yield gauge
+
+class Metrics:
+    """에이전트 하나의 메트릭 레지스트리 (단계별 히스토그램, 카운터, 게이지)
+
+    값은 에이전트마다 따로 만든 prometheus_client CollectorRegistry에 기록하고 (한 프로세스에서
+    여러 에이전트를 import하는 batch_pipeline에서도 이름이 겹치지 않도록), JSON snapshot도 여기서 읽는다.
+
+    - observe/timer: 단계 지연 시간 (arxiv_query, pdf_download, pdf_extract, tokenize, generate ...)
+    - inc: 누적 카운터 (tokens_in, tokens_out, 캐시 hit 등)
+    - gauge: /metrics를 읽을 때 값을 계산하는 함수 (큐 길이, 캐시 hit ratio 등)
+    - install: HTTP 미들웨어로 요청 id 설정/전달, in-flight 수, 엔드포인트별 지연 시간 기록
+    워커 스레드에서도 호출되므로 lock으로 보호한다.
+    """
+
+    def __init__(self, service: str):
+        self.service = service
+        self.started = time.time()
+        self.in_flight = 0
+        self.registry = CollectorRegistry()
+        self.stage_seconds = Histogram(
+            "a2a_stage_seconds", "Stage latency in seconds", ["service", "stage"],
+            buckets=LATENCY_BUCKETS, registry=self.registry
+        )
+        # JSON snapshot용 단계별 최댓값 (Prometheus 히스토그램에는 없음)
+        self.stage_max = {}
+        self.counters = {}
+        self._counters = {}
+        self.gauges = {}
+        self.registry.register(GaugeCollector(self))
+        self.recent = deque(maxlen=RECENT_EVENTS)
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float, request_id=None) -> None:
+        """단계 하나의 소요 시간 기록. request_id를 안 주면 현재 요청 id 사용 (배치면 id 리스트)"""
+        if request_id is None:
+            request_id = current_request_id()
+        self.stage_seconds.labels(self.service, stage).observe(seconds)
+        with self._lock:
+            self.stage_max[stage] = max(self.stage_max.get(stage, 0.0), seconds)
+            self.recent.append({
+                "time": round(time.time(), 3),
+                "request_id": request_id,
+                "stage": stage,
+                "seconds": round(seconds, 6),
+            })
+
+    @contextmanager
+    def timer(self, stage: str, request_id=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start, request_id)
+
+    def inc(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+            counter = self._counters.get(name)
+            if counter is None:
+                counter = self._counters[name] = Counter(
+                    f"a2a_{prometheus_name(name)}", name, ["service"], registry=self.registry
+                )
+        counter.labels(self.service).inc(value)
+
+    def gauge(self, name: str, fn) -> None:
+        self.gauges[name] = fn
+
+    def install(self, app) -> None:
+        """요청 id 미들웨어 등록 (헤더가 없으면 새로 만들고, 응답 헤더로 돌려줌)"""
+
+        @app.middleware("http")
+        async def track_request(request, call_next):
+            request_id = request.headers.get(REQUEST_ID_HEADER) or uuid.uuid4().hex[:16]
+            token = request_id_var.set(request_id)
+            self.in_flight += 1
+            start = time.perf_counter()
+
+            def finish():
+                self.in_flight -= 1
+                # 경로 템플릿 기준 (/jobs/{job_id} 처럼 id별로 키가 늘어나지 않도록)
+                route = getattr(request.scope.get("route"), "path", "unmatched")
+                self.observe(f"http {request.method} {route}", time.perf_counter() - start, request_id)
+
+            try:
+                response = await call_next(request)
+            except BaseException:
+                finish()
+                raise
+            finally:
+                request_id_var.reset(token)
+            response.headers[REQUEST_ID_HEADER] = request_id
+            if hasattr(response, "body_iterator"):
+                # 헤더를 보낸 시점이 아니라 마지막 chunk를 보낸 뒤에 측정을 끝냄 (스트리밍 응답)
+                response.body_iterator = timed_body(response.body_iterator, finish)
+            else:
+                finish()
+            return response
+
+    def gauge_values(self) -> dict:
+        values = {}
+        for name, fn in self.gauges.items():
+            try:
+                values[name] = fn()
+            except Exception:
+                values[name] = None
+        return values
+
+    def stage_snapshots(self) -> dict:
+        """Prometheus 히스토그램 샘플에서 단계별 JSON 요약 (count, mean, p50/p95/p99, 누적 버킷)"""
+        stages = {}
+        for family in self.stage_seconds.collect():
+            for sample in family.samples:
+                stage = stages.setdefault(sample.labels["stage"], {"buckets": {}})
+                if sample.name.endswith("_bucket"):
+                    stage["buckets"][sample.labels["le"]] = int(sample.value)
+                elif sample.name.endswith("_count"):
+                    stage["count"] = int(sample.value)
+                elif sample.name.endswith("_sum"):
+                    stage["sum"] = sample.value
+        with self._lock:
+            stage_max = dict(self.stage_max)
+        snapshots = {}
+        for name, stage in stages.items():
+            count, total = stage.get("count", 0), stage.get("sum", 0.0)
+            maximum = stage_max.get(name, 0.0)
+            snapshots[name] = {
+                "count": count,
+                "sum": round(total, 6),
+                "mean": round(total / count, 6) if count else 0.0,
+                "max": round(maximum, 6),
+                "p50": bucket_quantile(stage["buckets"], count, 0.5, maximum),
+                "p95": bucket_quantile(stage["buckets"], count, 0.95, maximum),
+                "p99": bucket_quantile(stage["buckets"], count, 0.99, maximum),
+                "buckets": stage["buckets"],
+            }
+        return snapshots
+
+    def snapshot(self) -> dict:
+        stages = self.stage_snapshots()
+        with self._lock:
+            counters = dict(self.counters)
+            recent = list(self.recent)
+        gauges = self.gauge_values()
+
+        # generate 시간 기준 토큰 처리량
+        throughput = {}
+        generate_seconds = stages.get("generate", {}).get("sum", 0)
+        if generate_seconds:
+            throughput = {
+                "tokens_in_per_s": round(counters.get("tokens_in", 0) / generate_seconds, 2),
+                "tokens_out_per_s": round(counters.get("tokens_out", 0) / generate_seconds, 2),
+            }
+
+        return {
+            "service": self.service,
+            "uptime_s": round(time.time() - self.started, 1),
+            "in_flight": self.in_flight,
+            "stages": stages,
+            "counters": counters,
+            "gauges": gauges,
+            "throughput": throughput,
+            "recent": recent,
+        }
+
+    def response(self, format: str = "json"):
+        """/metrics 응답 (기본 JSON, format=prometheus면 text)"""
+        if format == "prometheus":
+            return Response(generate_latest(self.registry), media_type=CONTENT_TYPE_LATEST)
+        return self.snapshot()
+
+async def timed_body(body_iterator, finish):
+    """응답 본문 iterator를 감싸서 마지막 chunk 전송(또는 중단) 뒤에 finish를 한 번 호출"""
+    try:
+        async for chunk in body_iterator:
+            yield chunk
+    finally:
+        finish()
@@ -0,0 +1,239 @@
+import json
+import logging
+import mmap
+import os
+
+import torch
+
+# transformers는 실제로 모델을 로드할 때 import (에이전트 import / uvicorn 바인딩을 늦추지 않도록)
+
+logger = logging.getLogger(__name__)
+
+# torch: eager PyTorch (GPU면 fp16, CPU면 fp32)
+# int8:  Linear 레이어 dynamic int8 양자화 (CPU 전용)
+# onnx:  ONNX Runtime encoder/decoder (KV cache 사용, optimum[onnxruntime] 필요)
+BACKENDS = ("torch", "int8", "onnx")
+
+# export한 ONNX 모델을 저장해 두는 디렉터리 (재시작 시 다시 export하지 않음)
+ONNX_DIR = os.getenv("A2A_ONNX_DIR", "onnx_models")
+
+# CPU에서 safetensors 체크포인트를 복사 없이 mmap해서 로드 (없거나 실패하면 from_pretrained)
+MMAP_WEIGHTS = os.getenv("A2A_MMAP_WEIGHTS", "1") == "1"
+SAFETENSORS_DTYPES = {
+    "F64": torch.float64, "F32": torch.float32, "F16": torch.float16, "BF16": torch.bfloat16,
+    "I64": torch.int64, "I32": torch.int32, "I16": torch.int16, "I8": torch.int8,
+    "U8": torch.uint8, "BOOL": torch.bool,
+}
+
+# warmup generate 입력 (출력은 버림)
+WARMUP_TEXT = "This paper proposes a method and reports results on a standard benchmark."
+WARMUP_NEW_TOKENS = 8
+
+def onnx_export_path(model_name: str) -> str:
+    return os.path.join(ONNX_DIR, model_name.replace("/", "--"))
+
+def load_onnx_model(model_name: str, device: str):
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    except ImportError as e:
+        raise RuntimeError("ONNX backend requires `pip install optimum[onnxruntime]`") from e
+
+    provider = "CUDAExecutionProvider" if device == "cuda" else "CPUExecutionProvider"
+    path = onnx_export_path(model_name)
+    if os.path.isdir(path):
+        logger.info(f"Loading exported ONNX model from {path}")
+        return ORTModelForSeq2SeqLM.from_pretrained(path, use_cache=True, provider=provider)
+
+    logger.info(f"Exporting {model_name} to ONNX (first run only): {path}")
+    model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, use_cache=True, provider=provider)
+    model.save_pretrained(path)
+    return model
+
+def build_from_state_dict(model_name: str, state_dict: dict):
+    """meta 디바이스에 빈 모델을 만들고 state_dict 텐서를 복사 없이 그대로 assign
+
+    체크포인트에 없는 tied weight는 tie_weights로 채우고, 그래도 비어 있는 텐서가 있으면 실패로 본다.
+    """
+    from transformers import AutoConfig, AutoModelForSeq2SeqLM, GenerationConfig
+
+    config = AutoConfig.from_pretrained(model_name)
+    with torch.device("meta"):
+        model = AutoModelForSeq2SeqLM.from_config(config)
+    model.load_state_dict(state_dict, strict=False, assign=True)
+    model.tie_weights()
+
+    # state_dict에 없는 (non-persistent) 버퍼나 이름이 다른 키가 남아 있으면 이 방식으로는 로드 불가
+    leftover = [name for name, tensor in [*model.named_parameters(), *model.named_buffers()] if tensor.is_meta]
+    if leftover:
+        raise RuntimeError(f"Weights missing tensors: {leftover[:5]}")
+
+    # from_config는 generation_config.json을 읽지 않으므로 따로 로드
+    try:
+        model.generation_config = GenerationConfig.from_pretrained(model_name)
+    except OSError:
+        model.generation_config = GenerationConfig.from_model_config(config)
+    return model
+
+def resolve_model_file(model_name: str, filename: str):
+    """로컬 디렉터리 또는 Hugging Face Hub 캐시에서 파일 경로. 없으면 None"""
+    if os.path.isdir(model_name):
+        path = os.path.join(model_name, filename)
+        return path if os.path.exists(path) else None
+    from huggingface_hub import hf_hub_download
+    try:
+        return hf_hub_download(model_name, filename)
+    except Exception:
+        return None
+
+def safetensors_files(model_name: str) -> list:
+    """모델의 safetensors 체크포인트 파일 목록 (sharded면 전부, 없으면 빈 리스트)"""
+    index_path = resolve_model_file(model_name, "model.safetensors.index.json")
+    if index_path:
+        with open(index_path) as f:
+            shards = sorted(set(json.load(f)["weight_map"].values()))
+        paths = [resolve_model_file(model_name, shard) for shard in shards]
+        return paths if all(paths) else []
+    path = resolve_model_file(model_name, "model.safetensors")
+    return [path] if path else []
+
+def map_safetensors(path: str, dtype: torch.dtype, copied: list = None) -> dict:
+    """safetensors 파일을 copy-on-write로 mmap해서 텐서 dict 반환
+
+    헤더(8바이트 길이 + JSON)에 적힌 offset으로 바로 view를 만들므로 가중치를 읽거나 복사하지 않는다.
+    페이지는 처음 접근할 때(warmup) page cache에서 올라오고, 재시작 시에는 이미 캐시에 있다.
+    dtype이 다르거나 정렬이 맞지 않는 텐서만 복사한다 (copied 리스트가 주어지면 그 이름을 기록).
+    """
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    header_size = int.from_bytes(buffer[:8], "little")
+    header = json.loads(buffer[8:8 + header_size])
+    header.pop("__metadata__", None)
+    data_start = 8 + header_size
+    base = torch.frombuffer(buffer, dtype=torch.uint8)
+
+    tensors = {}
+    for name, entry in header.items():
+        begin, end = entry["data_offsets"]
+        raw = base[data_start + begin:data_start + end]
+        tensor_dtype = SAFETENSORS_DTYPES[entry["dtype"]]
+        mapped = True
+        try:
+            tensor = raw.view(tensor_dtype).view(entry["shape"])
+        except RuntimeError:
+            tensor = torch.empty(entry["shape"], dtype=tensor_dtype)
+            tensor.view(-1).view(torch.uint8).copy_(raw)
+            mapped = False
+        if tensor.is_floating_point() and tensor.dtype != dtype:
+            tensor = tensor.to(dtype)
+            mapped = False
+        if not mapped and copied is not None:
+            copied.append(name)
+        tensors[name] = tensor
+    return tensors
+
+def load_mmap_model(model_name: str, copied: list = None):
+    """safetensors 체크포인트를 mmap해서 fp32 CPU 모델로 로드 (from_pretrained의 가중치 복사/초기화 생략)"""
+    files = safetensors_files(model_name)
+    if not files:
+        raise FileNotFoundError(f"No safetensors checkpoint for {model_name}")
+    state_dict = {}
+    for path in files:
+        state_dict.update(map_safetensors(path, torch.float32, copied))
+    return build_from_state_dict(model_name, state_dict)
+
+def load_shared_model(model_name: str):
+    """워커 프로세스끼리 가중치를 공유하는 fp32 CPU 모델 (safetensors 체크포인트 mmap)
+
+    ACCESS_COPY 매핑은 쓰기 전까지 체크포인트 파일의 page cache 페이지를 그대로 가리키므로
+    같은 체크포인트를 mmap한 워커들은 가중치를 한 벌만 같이 쓴다. 워커를 하나 더 띄워도 가중치 메모리는 늘지 않는다.
+    dtype 변환이나 정렬 때문에 복사된 텐서는 프로세스마다 따로 잡히므로 경고로 알린다.
+    """
+    copied = []
+    model = load_mmap_model(model_name, copied)
+    if copied:
+        logger.warning(f"{len(copied)} tensors of {model_name} were copied (dtype/alignment) and are not shared: {copied[:5]}")
+    return model
+
+def warmup_generate(tokenizer, model, device: str, **generation_kwargs) -> None:
+    """짧은 generate 한 번 (encoder/decoder/lm_head 가중치 페이지와 커널을 미리 올림)"""
+    inputs = tokenizer([WARMUP_TEXT], return_tensors="pt").to(device)
+    with torch.no_grad():
+        model.generate(
+            inputs["input_ids"],
+            attention_mask=inputs.get("attention_mask"),
+            max_new_tokens=WARMUP_NEW_TOKENS,
+            **generation_kwargs
+        )
+
+def process_memory() -> dict:
+    """현재 프로세스 메모리 (MB). pss는 공유 페이지를 나눠서 센 값, private은 이 프로세스만 쓰는 양
+
+    워커 하나를 추가할 때 드는 메모리는 private에 가깝다. /proc이 없는 OS에서는 빈 dict.
+    """
+    fields = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1])
+    except OSError:
+        return {}
+    mb = lambda kb: round(kb / 1024, 1)
+    return {
+        "rss_mb": mb(fields.get("Rss", 0)),
+        "pss_mb": mb(fields.get("Pss", 0)),
+        "shared_mb": mb(fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)),
+        "private_mb": mb(fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)),
+    }
+
+def load_seq2seq(model_name: str, backend: str = "torch", device: str = "cpu", shared_weights: bool = False) -> tuple:
+    """선택한 백엔드로 seq2seq 모델 로드
+
+    (tokenizer, model, device) 반환. int8은 CPU에서만 동작하므로 device가 cpu로 바뀔 수 있다.
+    shared_weights면 torch + CPU 조합에서 워커 프로세스끼리 mmap 가중치를 공유한다.
+    그 외 CPU 로드는 safetensors 체크포인트를 mmap해서 올린다 (A2A_MMAP_WEIGHTS=0이면 from_pretrained).
+    """
+    from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+    if backend == "onnx":
+        return tokenizer, load_onnx_model(model_name, device), device
+
+    if backend == "int8" and device != "cpu":
+        logger.warning("int8 dynamic quantization runs on CPU only, falling back to CPU")
+        device = "cpu"
+
+    if shared_weights:
+        if backend == "torch" and device == "cpu":
+            try:
+                model = load_shared_model(model_name)
+                model.eval()
+                return tokenizer, model, device
+            except Exception as e:
+                logger.warning(f"Shared weights unavailable, loading a private copy: {e}")
+        else:
+            # int8은 양자화된 가중치를 새로 만들고, GPU/onnx는 각자 메모리에 올리므로 공유 대상이 아님
+            logger.warning(f"Shared weights apply to the torch backend on CPU only (got {backend} on {device})")
+
+    model = None
+    if MMAP_WEIGHTS and device == "cpu":
+        try:
+            model = load_mmap_model(model_name)
+            logger.info(f"Loaded {model_name} from memory-mapped safetensors")
+        except Exception as e:
+            logger.info(f"Memory-mapped load unavailable, using from_pretrained: {e}")
+    if model is None:
+        model = AutoModelForSeq2SeqLM.from_pretrained(
+            model_name,
+            torch_dtype=torch.float16 if device == "cuda" else torch.float32
+        )
+    if backend == "int8":
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    model = model.to(device)
+    model.eval()
+    return tokenizer, model, device
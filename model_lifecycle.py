@@ -0,0 +1,129 @@
+import logging
+import os
+import threading
+import time
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+# ready 전에 짧은 generate를 한 번 실행해서 가중치 페이지와 커널을 미리 올림
+WARMUP = os.getenv("A2A_MODEL_WARMUP", "1") == "1"
+
+IMPORTED_AT = time.time()
+
+def process_start_time() -> float:
+    """프로세스 시작 시각 (epoch, 초 단위 근사). /proc이 없으면 이 모듈을 import한 시각"""
+    try:
+        with open("/proc/self/stat") as f:
+            # 프로세스 이름에 공백이 있을 수 있어서 마지막 ')' 뒤부터 셈 (starttime은 22번째 필드)
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/stat") as f:
+            boot_time = next(int(line.split()[1]) for line in f if line.startswith("btime"))
+        return boot_time + int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration):
+        return IMPORTED_AT
+
+PROCESS_START = process_start_time()
+
+class ModelLifecycle:
+    """에이전트 모델의 로드 수명 주기
+
+    모델은 import 시점이 아니라 startup 이후 백그라운드 스레드에서 로드하고(load_fn),
+    warmup_fn으로 짧은 generate를 한 번 돌린 뒤에야 ready가 된다.
+    그동안 서버는 /health/live에 바로 응답하고, 모델이 필요한 요청은 Retry-After와 함께 503을 받는다.
+    단계별 소요 시간과 프로세스 시작부터 ready까지의 시간(cold start)은 /health/ready와 /metrics에 기록된다.
+    """
+
+    def __init__(self, name: str, load_fn, warmup_fn=None, metrics=None, retry_after: int = 10):
+        self.name = name
+        self.load_fn = load_fn
+        self.warmup_fn = warmup_fn
+        self.metrics = metrics
+        self.retry_after = retry_after
+        # 로드 상태: pending → loading → warming → ready / failed
+        self.state = "pending"
+        self.error = None
+        self.phase_started = None
+        self.timings = {}
+        self._done = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        if metrics is not None:
+            metrics.gauge("model_ready", lambda: int(self.ready))
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def start(self) -> None:
+        """백그라운드 스레드에서 로드 시작 (이미 시작했으면 무시)"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._load, name=f"{self.name}-loader", daemon=True)
+                self._thread.start()
+
+    def wait(self, timeout: float = None) -> bool:
+        """로드가 끝날 때까지 대기 (HTTP 없이 쓰는 경우). 로드에 실패했으면 RuntimeError"""
+        self.start()
+        self._done.wait(timeout)
+        if self.state == "failed":
+            raise RuntimeError(f"{self.name} model failed to load: {self.error}")
+        return self.ready
+
+    def require(self) -> None:
+        """모델이 필요한 요청 앞에서 호출. ready가 아니면 503"""
+        if self.ready:
+            return
+        if self.state == "failed":
+            raise HTTPException(status_code=503, detail=f"{self.name} model failed to load: {self.error}")
+        raise HTTPException(
+            status_code=503,
+            detail=f"{self.name} model is {self.state}, retry later.",
+            headers={"Retry-After": str(self.retry_after)}
+        )
+
+    def _run_phase(self, state: str, stage: str, fn) -> None:
+        self.state = state
+        self.phase_started = time.time()
+        start = time.perf_counter()
+        fn()
+        seconds = time.perf_counter() - start
+        self.timings[f"{stage}_s"] = round(seconds, 3)
+        if self.metrics is not None:
+            self.metrics.observe(f"model_{stage}", seconds)
+
+    def _load(self) -> None:
+        # 프로세스 시작부터 로드 시작까지 (인터프리터 + torch import 등)
+        self.timings["startup_s"] = round(time.time() - PROCESS_START, 3)
+        try:
+            self._run_phase("loading", "load", self.load_fn)
+            if self.warmup_fn is not None and WARMUP:
+                self._run_phase("warming", "warmup", self.warmup_fn)
+        except Exception as e:
+            logger.exception(f"{self.name}: model loading failed")
+            self.error = f"{type(e).__name__}: {e}"
+            self.state = "failed"
+        else:
+            cold_start = time.time() - PROCESS_START
+            self.timings["cold_start_s"] = round(cold_start, 3)
+            if self.metrics is not None:
+                self.metrics.observe("cold_start", cold_start)
+            self.state = "ready"
+            logger.info(f"{self.name}: model ready ({self.timings})")
+        finally:
+            self.phase_started = None
+            self._done.set()
+
+    def snapshot(self) -> dict:
+        snapshot = {
+            "state": self.state,
+            "ready": self.ready,
+            "uptime_s": round(time.time() - PROCESS_START, 1),
+            "timings": dict(self.timings),
+        }
+        if self.phase_started is not None:
+            snapshot["phase_elapsed_s"] = round(time.time() - self.phase_started, 1)
+        if self.error:
+            snapshot["error"] = self.error
+        return snapshot
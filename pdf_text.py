@@ -0,0 +1,78 @@
+import re
+
+import fitz  # PyMuPDF
+
+# 줄 전체가 References / Bibliography 헤딩인 경우 (번호 붙은 헤딩 포함)
+REFERENCES_HEADING = re.compile(
+    r'^\s*(?:[0-9IVX]+\.?\s*)?(?:references|bibliography)\s*$',
+    re.IGNORECASE | re.MULTILINE
+)
+
+# 병렬 추출 시 워커 작업 하나가 읽는 페이지 수 (작을수록 References 이후 낭비가 적고, 클수록 작업당 오버헤드가 적음)
+PAGES_PER_TASK = 8
+
+def open_pdf(source):
+    """파일 경로 또는 PDF 바이트(업로드)를 열기. 바이트는 파일시스템을 거치지 않고 메모리에서 바로 연다"""
+    if isinstance(source, (bytes, bytearray)):
+        return fitz.open(stream=source, filetype="pdf")
+    return fitz.open(source)
+
+def read_pages(doc, start: int, stop: int) -> tuple:
+    """start~stop 페이지 텍스트를 순서대로 읽고, References 헤딩을 만나면 그 앞까지만 읽고 멈춤
+
+    (페이지 텍스트 리스트, 헤딩을 만났는지) 반환
+    """
+    texts = []
+    for page_no in range(start, stop):
+        text = doc[page_no].get_text()
+        match = REFERENCES_HEADING.search(text)
+        if match:
+            texts.append(text[:match.start()])
+            return texts, True
+        texts.append(text)
+    return texts, False
+
+def read_page_range(source, start: int, stop: int) -> tuple:
+    """프로세스 풀 워커용: 파일(또는 전달받은 바이트)을 직접 열어서 read_pages 실행"""
+    with open_pdf(source) as doc:
+        return read_pages(doc, start, stop)
+
+def task_source(doc, source, start: int, stop: int) -> tuple:
+    """워커 작업 인자 (source, start, stop). 파일 경로는 그대로 넘기고,
+    메모리 PDF는 전체 바이트 대신 해당 페이지만 담은 작은 PDF를 넘긴다"""
+    if not isinstance(source, (bytes, bytearray)):
+        return source, start, stop
+    with fitz.open() as part:
+        part.insert_pdf(doc, from_page=start, to_page=stop - 1)
+        return part.tobytes(), 0, stop - start
+
+def extract_raw_text(source, executor=None, parallel_min_pages: int = 32, workers: int = 1) -> str:
+    """PDF 원문 텍스트 추출 (References 이후 페이지는 읽지 않음). source는 파일 경로 또는 PDF 바이트
+
+    페이지 수가 parallel_min_pages 이상이고 executor가 주어지면 PAGES_PER_TASK 페이지씩 나눠
+    프로세스 풀에서 병렬로 읽는다. 앞 구간부터 순서대로 결과를 받으면서 workers개까지만 미리 제출하므로,
+    헤딩이 나온 뒤에는 이미 실행 중인 구간(최대 workers - 1개)만 더 읽고 나머지는 제출하지 않는다.
+    """
+    with open_pdf(source) as doc:
+        page_count = doc.page_count
+        if executor is None or workers <= 1 or page_count < parallel_min_pages:
+            texts, _ = read_pages(doc, 0, page_count)
+            return "\n".join(texts) + "\n"
+
+        ranges = [(start, min(start + PAGES_PER_TASK, page_count)) for start in range(0, page_count, PAGES_PER_TASK)]
+        futures = {}
+        submitted = 0
+        texts = []
+        try:
+            for i in range(len(ranges)):
+                while submitted < len(ranges) and submitted < i + workers:
+                    futures[submitted] = executor.submit(read_page_range, *task_source(doc, source, *ranges[submitted]))
+                    submitted += 1
+                part, stopped = futures.pop(i).result()
+                texts.extend(part)
+                if stopped:
+                    break
+        finally:
+            for future in futures.values():
+                future.cancel()
+    return "\n".join(texts) + "\n"
@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import random
+from contextlib import asynccontextmanager
+
+import httpx
+
+from metrics import REQUEST_ID_HEADER, current_request_id
+
+logger = logging.getLogger(__name__)
+
+# 요청이 replica에 도달하지 못한 오류: 해당 replica를 제외하고 다른 replica로 재시도
+RETRYABLE_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.RemoteProtocolError)
+# 연결 자체가 안 된 오류 (본문을 보내기 전이라 스트리밍 본문도 다른 replica로 다시 보낼 수 있음)
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+# health 응답의 status 값 중 요청을 보내도 되는 것 (/health: healthy, /health/ready: ready)
+HEALTHY_STATUSES = ("healthy", "ready")
+
+def parse_urls(value: str) -> list:
+    """콤마로 구분된 replica 주소 목록 (끝의 / 제거)"""
+    return [url.strip().rstrip("/") for url in value.split(",") if url.strip()]
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.healthy = True
+        self.failures = 0
+        self.requests = 0
+        self.last_error = None
+
+class ReplicaPool:
+    """에이전트 하나의 replica 목록 + least-outstanding-requests 라우팅
+
+    - 요청마다 진행 중인 요청이 가장 적은 healthy replica를 고른다 (같으면 무작위)
+    - 연결 오류면 그 replica를 제외(eject)하고, 503(admission 큐 가득 참)이면 제외하지 않고 다른 replica로 재시도한다
+    - 백그라운드에서 각 replica의 /health를 주기적으로 확인해서 제외/복귀시킨다
+    - healthy replica가 하나도 없으면 전체 목록에서 고른다 (fail-open)
+    """
+
+    def __init__(self, name: str, urls: list, timeout: float, max_connections: int,
+                 health_interval: float = 10.0, health_path: str = "/health"):
+        if not urls:
+            raise ValueError(f"{name}: at least one replica URL is required")
+        self.name = name
+        self.replicas = [Replica(url) for url in urls]
+        self.health_interval = health_interval
+        self.health_path = health_path
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.client = httpx.AsyncClient(timeout=timeout, limits=limits)
+        self._health_task = None
+
+    def pick(self, exclude=()) -> Replica:
+        candidates = [r for r in self.replicas if r.healthy and r not in exclude]
+        if not candidates:
+            candidates = [r for r in self.replicas if r not in exclude] or self.replicas
+        least = min(r.outstanding for r in candidates)
+        return random.choice([r for r in candidates if r.outstanding == least])
+
+    def eject(self, replica: Replica, reason: str) -> None:
+        if replica.healthy:
+            logger.warning(f"{self.name}: ejecting {replica.url} ({reason})")
+        replica.healthy = False
+        replica.failures += 1
+        replica.last_error = reason
+
+    async def request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """replica 하나를 골라 요청. 연결 오류나 503이면 다른 replica로 (replica 수만큼) 재시도
+
+        content가 async iterator(스트리밍 본문)면 한 번만 보낼 수 있으므로 연결 전 오류만 재시도한다.
+        """
+        self._add_request_id(kwargs)
+        replayable = not hasattr(kwargs.get("content"), "__aiter__")
+        tried = []
+        while True:
+            replica = self.pick(exclude=tried)
+            tried.append(replica)
+            last_attempt = len(tried) >= len(self.replicas)
+            replica.outstanding += 1
+            replica.requests += 1
+            try:
+                resp = await self.client.request(method, replica.url + path, **kwargs)
+            except RETRYABLE_ERRORS as e:
+                self.eject(replica, f"{type(e).__name__}: {e}")
+                if last_attempt or not (replayable or isinstance(e, CONNECT_ERRORS)):
+                    raise
+                continue
+            finally:
+                replica.outstanding -= 1
+            if resp.status_code == 503 and replayable and not last_attempt:
+                # admission 큐가 가득 찬 replica: 제외하지 않고 다른 replica로
+                continue
+            return resp
+
+    @asynccontextmanager
+    async def stream(self, method: str, path: str, **kwargs):
+        """응답 본문을 메모리에 올리지 않는 요청 (async with ... as resp: resp.aiter_bytes())
+
+        응답 헤더를 받기 전의 연결 오류와 503만 다른 replica로 재시도한다.
+        """
+        self._add_request_id(kwargs)
+        tried = []
+        while True:
+            replica = self.pick(exclude=tried)
+            tried.append(replica)
+            last_attempt = len(tried) >= len(self.replicas)
+            replica.outstanding += 1
+            replica.requests += 1
+            try:
+                try:
+                    resp = await self.client.send(self.client.build_request(method, replica.url + path, **kwargs), stream=True)
+                except RETRYABLE_ERRORS as e:
+                    self.eject(replica, f"{type(e).__name__}: {e}")
+                    if last_attempt:
+                        raise
+                    continue
+                if resp.status_code == 503 and not last_attempt:
+                    await resp.aclose()
+                    continue
+                try:
+                    yield resp
+                finally:
+                    await resp.aclose()
+                return
+            finally:
+                replica.outstanding -= 1
+
+    def _add_request_id(self, kwargs: dict) -> None:
+        """현재 요청 id를 하위 에이전트로 전달"""
+        request_id = current_request_id()
+        if request_id:
+            kwargs["headers"] = {**kwargs.get("headers", {}), REQUEST_ID_HEADER: request_id}
+
+    async def post(self, path: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", path, **kwargs)
+
+    async def check_health(self) -> None:
+        async def check(replica: Replica):
+            try:
+                resp = await self.client.get(replica.url + self.health_path, timeout=5)
+                ok = resp.status_code == 200 and resp.json().get("status") in HEALTHY_STATUSES
+                reason = f"health status {resp.status_code}"
+            except Exception as e:
+                ok, reason = False, f"{type(e).__name__}: {e}"
+            if ok:
+                if not replica.healthy:
+                    logger.info(f"{self.name}: {replica.url} is healthy again")
+                replica.healthy = True
+            else:
+                self.eject(replica, reason)
+
+        await asyncio.gather(*(check(replica) for replica in self.replicas))
+
+    async def _health_loop(self) -> None:
+        while True:
+            await self.check_health()
+            await asyncio.sleep(self.health_interval)
+
+    def start(self) -> None:
+        if self._health_task is None and self.health_interval > 0:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def aclose(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        await self.client.aclose()
+
+    def snapshot(self) -> dict:
+        return {
+            "replicas": [
+                {
+                    "url": r.url,
+                    "healthy": r.healthy,
+                    "outstanding": r.outstanding,
+                    "requests": r.requests,
+                    "failures": r.failures,
+                    "last_error": r.last_error,
+                }
+                for r in self.replicas
+            ]
+        }
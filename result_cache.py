@@ -0,0 +1,103 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.getenv("A2A_CACHE_DIR", "cache")
+CACHE_MAX_ENTRIES = int(os.getenv("A2A_CACHE_MAX_ENTRIES", "10000"))
+CACHE_MAX_MB = float(os.getenv("A2A_CACHE_MAX_MB", "256"))
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """파일 내용의 sha256 (청크 단위로 읽음)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def make_key(*parts) -> str:
+    """콘텐츠 해시, 모델 이름, 생성 파라미터, 프롬프트 버전 등을 묶어서 캐시 키 생성"""
+    payload = json.dumps(parts, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ResultCache:
+    """SQLite 기반 영속 결과 캐시 (LRU + 용량 제한)
+
+    키는 콘텐츠 주소(make_key)이고 값은 JSON으로 저장된다.
+    항목 수 또는 총 바이트가 한도를 넘으면 가장 오래 접근되지 않은 항목부터 지운다.
+    run_all.sh 재시작 후에도 디스크에 남아 있으므로 같은 논문은 바로 응답할 수 있다.
+    """
+
+    def __init__(self, name: str, cache_dir: str = CACHE_DIR,
+                 max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = int(CACHE_MAX_MB * 1024 * 1024)):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, f"{name}.sqlite3")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON entries(last_access)")
+        self._conn.commit()
+
+    def get(self, key: str):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, value) -> None:
+        data = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, data, len(data.encode("utf-8")), time.time())
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        while count > self.max_entries or total > self.max_bytes:
+            row = self._conn.execute("SELECT key, size FROM entries ORDER BY last_access LIMIT 1").fetchone()
+            if row is None:
+                break
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (row[0],))
+            count -= 1
+            total -= row[1]
+            self.evictions += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "entries": count,
+            "bytes": total,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,49 +1,138 @@
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 import torch
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+from model_backend import load_seq2seq, process_memory, warmup_generate
+from model_lifecycle import ModelLifecycle
+from generation_profiles import GenerationProfiles
+from inference_pool import InferencePool
+from result_cache import ResultCache, make_key
+from artifact_store import ArtifactStore
+from token_budget import truncate_to_tokens
+from metrics import Metrics, hit_ratio
 import logging
 import gc
+import re
+import os
+import asyncio
+import hashlib
+import time
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Simple Reviewer Agent")
+metrics = Metrics("reviewer")
+metrics.install(app)
 
 # 전역 변수
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
-MODEL_NAME = "google/flan-t5-large"
+# 추론 백엔드: torch (fp32/fp16), int8 (dynamic 양자화, CPU), onnx (ONNX Runtime)
+BACKEND = os.getenv("REVIEWER_BACKEND", "torch")
+# uvicorn --workers로 여러 프로세스를 띄울 때 mmap 가중치를 공유 (torch + CPU)
+SHARED_WEIGHTS = os.getenv("REVIEWER_SHARED_WEIGHTS", "0") == "1"
+MODEL_NAME = os.getenv("REVIEWER_MODEL", "google/flan-t5-large")
 MAX_INPUT_LENGTH = 512
 MAX_OUTPUT_LENGTH = 256
 
-# 모델 초기화
-logger.info(f"Loading model: {MODEL_NAME} on {DEVICE}")
-try:
-    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-    model = AutoModelForSeq2SeqLM.from_pretrained(
-        MODEL_NAME,
-        torch_dtype=torch.float16 if DEVICE == "cuda" else torch.float32
-    ).to(DEVICE)
-    model.eval()
-    logger.info("Model loaded successfully")
-except Exception as e:
-    logger.error(f"Failed to load model: {e}")
-    raise RuntimeError(f"Model loading failed: {e}")
+# 리뷰 생성 파라미터 (캐시 키에도 포함됨)
+GENERATION_KWARGS = {
+    "max_new_tokens": 120,
+    "num_beams": 3,
+    "early_stopping": True,
+    "do_sample": True,
+    "temperature": 0.8,
+    "top_p": 0.9,
+    "repetition_penalty": 1.2,
+    "no_repeat_ngram_size": 3,
+}
+# 이름 붙은 리뷰 생성 프로파일 (품질 순). quality는 기존 파라미터 그대로라 기존 캐시 키가 유지됨
+REVIEW_PROFILES = {
+    "quality": GENERATION_KWARGS,
+    # beam 없이 sampling만
+    "balanced": {**GENERATION_KWARGS, "max_new_tokens": 100, "num_beams": 1, "early_stopping": False},
+    # greedy + 짧은 출력
+    "fast": {
+        "max_new_tokens": 60,
+        "num_beams": 1,
+        "do_sample": False,
+        "repetition_penalty": 1.2,
+        "no_repeat_ngram_size": 3,
+    },
+}
+# 리뷰 프롬프트(create_review_prompt)가 바뀌면 올려서 기존 캐시를 무효화
+PROMPT_VERSION = "v2"
+
+# 추론 워커 풀 설정
+INFERENCE_WORKERS = int(os.getenv("REVIEWER_INFERENCE_WORKERS", "1"))
+INFERENCE_MAX_QUEUE = int(os.getenv("REVIEWER_INFERENCE_MAX_QUEUE", "16"))
+INFERENCE_RETRY_AFTER = int(os.getenv("REVIEWER_INFERENCE_RETRY_AFTER", "30"))
+# /review_batch에서 한 번의 generate에 넣을 최대 항목 수
+REVIEW_BATCH_MAX_SIZE = int(os.getenv("REVIEWER_BATCH_MAX_SIZE", "8"))
+# 생성 프로파일: 기본 프로파일 (auto면 부하에 따라 자동 선택)
+PROFILE_DEFAULT = os.getenv("REVIEWER_PROFILE", "auto")
+# 대기 요청 수 / 최근 모델 경로 p95(초, 0이면 끔)가 이 값을 넘으면 한 단계 싼 프로파일로
+PROFILE_MAX_QUEUE = int(os.getenv("REVIEWER_PROFILE_MAX_QUEUE", "8"))
+PROFILE_MAX_P95_S = float(os.getenv("REVIEWER_PROFILE_MAX_P95_S", "0"))
+PROFILE_COOLDOWN_S = float(os.getenv("REVIEWER_PROFILE_COOLDOWN_S", "30"))
+# 원문을 아티팩트 id로 받을 때 읽는 앞부분 길이 (프롬프트는 250토큰으로 자른 뒤 앞 600자만 쓰므로 충분)
+ORIGINAL_TEXT_PREFIX_CHARS = 2000
+
+# 모델 초기화 (startup 이후 백그라운드에서 로드, model_lifecycle)
+tokenizer = None
+model = None
+
+def load_model():
+    global tokenizer, model, DEVICE
+    logger.info(f"Loading model: {MODEL_NAME} on {DEVICE} (backend: {BACKEND})")
+    try:
+        tokenizer, model, DEVICE = load_seq2seq(MODEL_NAME, BACKEND, DEVICE, shared_weights=SHARED_WEIGHTS)
+        logger.info("Model loaded successfully")
+    except Exception as e:
+        logger.error(f"Failed to load model: {e}")
+        raise RuntimeError(f"Model loading failed: {e}")
+
+def warmup_model():
+    warmup_generate(tokenizer, model, DEVICE, num_beams=GENERATION_KWARGS["num_beams"])
+
+model_lifecycle = ModelLifecycle("reviewer", load_model, warmup_model, metrics, retry_after=INFERENCE_RETRY_AFTER)
+
+inference_pool = InferencePool("reviewer", INFERENCE_WORKERS, INFERENCE_MAX_QUEUE, INFERENCE_RETRY_AFTER)
+review_cache = ResultCache("reviewer")
+review_profiles = GenerationProfiles(
+    "review", REVIEW_PROFILES, PROFILE_DEFAULT,
+    load_fn=lambda: inference_pool.admitted,
+    metrics=metrics,
+    max_queue=PROFILE_MAX_QUEUE,
+    max_p95_s=PROFILE_MAX_P95_S,
+    cooldown_s=PROFILE_COOLDOWN_S
+)
+artifact_store = ArtifactStore()
+
+metrics.gauge("inference_admitted", lambda: inference_pool.admitted)
+metrics.gauge("inference_rejected", lambda: inference_pool.rejected)
+metrics.gauge("generation_profile_level", lambda: review_profiles.level)
+metrics.gauge("review_cache_hit_ratio", lambda: hit_ratio(review_cache.hits, review_cache.misses))
 
 class ReviewRequest(BaseModel):
-    original_text: str
-    summary_text: str
+    original_text: str = ""
+    summary_text: str = ""
+    # 본문/요약 대신 아티팩트 저장소 id로 받을 수 있음 (원문은 필요한 앞부분만 mmap으로 읽음)
+    original_text_artifact: str = None
+    summary_artifact: str = None
+    # 생성 프로파일 (quality / balanced / fast / auto, 없으면 REVIEWER_PROFILE)
+    profile: str = None
+
+class ReviewBatchRequest(BaseModel):
+    items: list[ReviewRequest]
+    # 배치 전체에 쓰는 생성 프로파일 (항목별 profile은 무시)
+    profile: str = None
 
 def truncate_text(text: str, max_tokens: int = 300) -> str:
-    """토큰 기반으로 텍스트 자르기"""
+    """토큰 기반으로 텍스트 자르기 (앞부분만 토크나이징, decode 없이 원문을 자름)"""
     try:
-        tokens = tokenizer.encode(text, add_special_tokens=False)
-        if len(tokens) <= max_tokens:
-            return text
-        
-        truncated_tokens = tokens[:max_tokens]
-        return tokenizer.decode(truncated_tokens, skip_special_tokens=True)
+        return truncate_to_tokens(tokenizer, text, max_tokens)
     except Exception as e:
         logger.warning(f"Token truncation failed: {e}")
         return text[:max_tokens * 3]
@@ -75,23 +164,32 @@ Response:"""
     
     return prompt
 
-def check_summary_basic_quality(summary_text: str) -> str:
-    """기본적인 요약 품질 체크"""
-    summary_lower = summary_text.lower()
-    missing_elements = []
-    
-    # 각 핵심 요소 체크
-    if not any(word in summary_lower for word in ["method", "approach", "technique", "algorithm", "framework"]):
-        missing_elements.append("methodology description")
-    
-    if not any(word in summary_lower for word in ["result", "finding", "performance", "outcome", "achieve"]):
-        missing_elements.append("key results or findings")
-    
-    if not any(word in summary_lower for word in ["objective", "goal", "purpose", "problem", "address"]):
-        missing_elements.append("research objectives")
-    
-    if not any(word in summary_lower for word in ["significant", "important", "novel", "contribution", "advance"]):
-        missing_elements.append("research significance")
+# 기본 품질 체크 기준: (누락 시 표시할 항목, 키워드) - 키워드가 하나라도 포함되면 통과
+QUALITY_CRITERIA = [
+    ("methodology description", ["method", "approach", "technique", "algorithm", "framework"]),
+    ("key results or findings", ["result", "finding", "performance", "outcome", "achieve"]),
+    ("research objectives", ["objective", "goal", "purpose", "problem", "address"]),
+    ("research significance", ["significant", "important", "novel", "contribution", "advance"]),
+]
+# 모든 기준의 키워드를 하나의 패턴으로 미리 컴파일 (그룹 이름 c<i> = i번째 기준)
+# lookahead라서 키워드끼리 겹쳐도 놓치지 않고, 한 번의 스캔으로 전부 검사한다
+CRITERIA_PATTERN = re.compile("(?=(?:" + "|".join(
+    f"(?P<c{i}>{'|'.join(re.escape(word) for word in words)})"
+    for i, (_, words) in enumerate(QUALITY_CRITERIA)
+) + "))")
+# 누락 항목이 이 개수 이상이면 모델을 거치지 않고 바로 피드백 반환
+PRECHECK_THRESHOLD = 3
+
+def check_summary_basic_quality(summary_text: str) -> list:
+    """기본적인 요약 품질 체크 (사전 컴파일된 멀티 패턴으로 한 번에 검사)"""
+    found = set()
+    for match in CRITERIA_PATTERN.finditer(summary_text.lower()):
+        found.add(match.lastgroup)
+        if len(found) == len(QUALITY_CRITERIA):
+            break
+    missing_elements = [
+        label for i, (label, _) in enumerate(QUALITY_CRITERIA) if f"c{i}" not in found
+    ]
     
     # 요약이 너무 짧은지 체크
     if len(summary_text.split()) < 25:
@@ -99,11 +197,59 @@ def check_summary_basic_quality(summary_text: str) -> str:
     
     return missing_elements
 
-@app.post("/review_summary")
-async def review_summary(req: ReviewRequest):
-    """요약 검토 API 엔드포인트"""
+def generate_reviews(pairs: list, profile: str = "quality") -> list:
+    """(원문, 요약) 쌍들을 패딩된 하나의 배치로 추론 (블로킹, 워커 스레드에서 호출)"""
+    # 텍스트 길이 조정 후 프롬프트 생성
+    prompts = [
+        create_review_prompt(truncate_text(original_text, max_tokens=250), summary_text)
+        for original_text, summary_text in pairs
+    ]
+    
+    # 토크나이징
+    with metrics.timer("tokenize"):
+        inputs = tokenizer(
+            prompts, 
+            return_tensors="pt", 
+            max_length=MAX_INPUT_LENGTH, 
+            truncation=True,
+            padding=True
+        ).to(DEVICE)
+    
+    logger.info(f"Input batch: {inputs['input_ids'].shape[0]} x {inputs['input_ids'].shape[1]} tokens")
     
-    # 입력 검증
+    # 모델 추론
+    with metrics.timer("generate"), torch.no_grad():
+        output_ids = model.generate(
+            inputs['input_ids'],
+            attention_mask=inputs.get('attention_mask'),
+            pad_token_id=tokenizer.pad_token_id,
+            eos_token_id=tokenizer.eos_token_id,
+            **REVIEW_PROFILES[profile]
+        )
+    metrics.inc("tokens_in", int(inputs['attention_mask'].sum()))
+    metrics.inc("tokens_out", int((output_ids != tokenizer.pad_token_id).sum()))
+    
+    # 디코딩
+    return [tokenizer.decode(ids, skip_special_tokens=True) for ids in output_ids]
+
+def generate_review(original_text: str, summary_text: str, profile: str = "quality") -> str:
+    """단일 요약에 대한 모델 리뷰"""
+    return generate_reviews([(original_text, summary_text)], profile)[0]
+
+def load_review_inputs(req: ReviewRequest) -> None:
+    """아티팩트 id로 온 입력을 필요한 만큼만 읽어서 채움 (블로킹)"""
+    try:
+        if req.original_text_artifact and not req.original_text:
+            req.original_text = artifact_store.read_text(req.original_text_artifact, ORIGINAL_TEXT_PREFIX_CHARS)
+        if req.summary_artifact and not req.summary_text:
+            req.summary_text = artifact_store.read_text(req.summary_artifact)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+def validate_review_request(req: ReviewRequest) -> None:
+    """입력 검증"""
     if not req.original_text or not req.summary_text:
         raise HTTPException(status_code=400, detail="Original text and summary are required.")
     
@@ -112,96 +258,123 @@ async def review_summary(req: ReviewRequest):
     
     if len(req.original_text) < 100:
         raise HTTPException(status_code=400, detail="Original text is too short for review.")
+
+def review_cache_key(req: ReviewRequest, profile: str = "quality") -> str:
+    """원문 + 요약 해시 + 모델 + 프로파일 생성 파라미터 + 프롬프트 버전
+
+    아티팩트 id는 원문 전체의 sha256이므로 본문을 직접 보낸 요청과 같은 키가 된다.
+    """
+    return make_key(
+        req.original_text_artifact or hashlib.sha256(req.original_text.encode("utf-8")).hexdigest(),
+        hashlib.sha256(req.summary_text.encode("utf-8")).hexdigest(),
+        MODEL_NAME, BACKEND, REVIEW_PROFILES[profile], PROMPT_VERSION
+    )
+
+async def cached_review(req: ReviewRequest, profile: str):
+    """고른 프로파일 또는 더 좋은 프로파일로 캐시된 리뷰. (피드백, 프로파일) 또는 None"""
+    order = review_profiles.order
+    for candidate in order[:order.index(profile) + 1]:
+        cached = await asyncio.to_thread(review_cache.get, review_cache_key(req, candidate))
+        if cached is not None:
+            return cached["feedback"], candidate
+    return None
+
+def precheck_feedback(missing_basic: list) -> str:
+    """기본 체크에서 문제가 많을 때 모델 없이 주는 피드백"""
+    return f"Missing elements: {', '.join(missing_basic)}. The summary needs more comprehensive coverage of the research."
+
+def compose_feedback(ai_feedback: str, missing_basic: list) -> str:
+    """모델 출력을 정리하고 기본 체크 결과와 결합"""
+    # 프롬프트 부분 제거
+    response_indicators = ["Response:", "Answer:", "Review:", "Missing elements:", "Evaluation:"]
+    for indicator in response_indicators:
+        if indicator in ai_feedback:
+            ai_feedback = ai_feedback.split(indicator)[-1].strip()
+            break
+    
+    # AI 응답 품질 체크
+    if (ai_feedback and 
+        len(ai_feedback.split()) > 8 and 
+        len(ai_feedback) < 250 and
+        not any(phrase in ai_feedback.lower() for phrase in ["i cannot", "as an ai", "original paper excerpt"])):
+        
+        # 기본 체크 결과와 AI 결과 결합
+        if missing_basic:
+            return f"Missing elements: {', '.join(missing_basic)}. {ai_feedback}"
+        return ai_feedback
+    
+    # AI 응답이 부적절한 경우 기본 체크 결과 사용
+    if missing_basic:
+        return f"Missing elements: {', '.join(missing_basic)}."
+    return "Summary covers most essential elements but could benefit from more specific details."
+
+def fallback_feedback(missing_basic: list) -> str:
+    """모델 추론이 실패했을 때의 피드백"""
+    if missing_basic:
+        return f"Missing elements: {', '.join(missing_basic)}."
+    return "Summary appears adequate but detailed analysis unavailable."
+
+def shorten_feedback(final_feedback: str) -> str:
+    """최종 정리 (너무 긴 경우 앞의 두 문장만)"""
+    if len(final_feedback) > 200:
+        sentences = final_feedback.split('.')[:2]
+        final_feedback = '. '.join(s.strip() for s in sentences if s.strip())
+        if final_feedback and not final_feedback.endswith('.'):
+            final_feedback += '.'
+    return final_feedback
+
+@app.post("/review_summary")
+async def review_summary(req: ReviewRequest):
+    """요약 검토 API 엔드포인트"""
+    
+    await asyncio.to_thread(load_review_inputs, req)
+    validate_review_request(req)
+    # 요청 지정 프로파일, 아니면 부하 정책이 고른 프로파일 (응답의 profile은 실제로 리뷰를 만든 프로파일)
+    profile = review_profiles.resolve(req.profile)
+    start = time.perf_counter()
     
     try:
         logger.info(f"Processing review - Original: {len(req.original_text)} chars, Summary: {len(req.summary_text)} chars")
         
         # 1. 기본 품질 체크 먼저 수행
-        missing_basic = check_summary_basic_quality(req.summary_text)
+        with metrics.timer("precheck"):
+            missing_basic = check_summary_basic_quality(req.summary_text)
         
         # 2. 기본 체크에서 문제가 많다면 AI 모델 없이 응답
-        if len(missing_basic) >= 3:
-            feedback = f"Missing elements: {', '.join(missing_basic)}. The summary needs more comprehensive coverage of the research."
+        if len(missing_basic) >= PRECHECK_THRESHOLD:
             logger.info("Basic quality check failed, returning structured feedback")
-            return {"feedback": feedback}
+            metrics.observe("review_precheck_path", time.perf_counter() - start)
+            return {"feedback": precheck_feedback(missing_basic), "profile": "precheck"}
         
-        # 3. AI 모델을 사용한 상세 분석
-        try:
-            # 텍스트 길이 조정
-            original_truncated = truncate_text(req.original_text, max_tokens=250)
-            prompt = create_review_prompt(original_truncated, req.summary_text)
-            
-            logger.info("Using AI model for detailed review")
-            
-            # 토크나이징
-            inputs = tokenizer(
-                prompt, 
-                return_tensors="pt", 
-                max_length=MAX_INPUT_LENGTH, 
-                truncation=True,
-                padding=True
-            ).to(DEVICE)
-            
-            logger.info(f"Input token length: {inputs['input_ids'].shape[1]}")
-            
-            # 모델 추론
-            with torch.no_grad():
-                output_ids = model.generate(
-                    inputs['input_ids'],
-                    attention_mask=inputs.get('attention_mask'),
-                    max_new_tokens=120,
-                    num_beams=3,
-                    early_stopping=True,
-                    do_sample=True,
-                    temperature=0.8,
-                    top_p=0.9,
-                    pad_token_id=tokenizer.pad_token_id,
-                    eos_token_id=tokenizer.eos_token_id,
-                    repetition_penalty=1.2,
-                    no_repeat_ngram_size=3
-                )
-            
-            # 디코딩
-            ai_feedback = tokenizer.decode(output_ids[0], skip_special_tokens=True)
-            
-            # 프롬프트 부분 제거
-            response_indicators = ["Response:", "Answer:", "Review:", "Missing elements:", "Evaluation:"]
-            for indicator in response_indicators:
-                if indicator in ai_feedback:
-                    ai_feedback = ai_feedback.split(indicator)[-1].strip()
-                    break
-            
-            # AI 응답 품질 체크
-            if (ai_feedback and 
-                len(ai_feedback.split()) > 8 and 
-                len(ai_feedback) < 250 and
-                not any(phrase in ai_feedback.lower() for phrase in ["i cannot", "as an ai", "original paper excerpt"])):
+        # 3. 캐시 확인 (더 좋은 프로파일의 리뷰가 있으면 그것을 씀)
+        cached = await cached_review(req, profile)
+        if cached is not None:
+            feedback, served = cached
+            logger.info(f"Review cache hit ({served})")
+            review_profiles.record(served)
+            metrics.observe("review_cache_path", time.perf_counter() - start)
+            return {"feedback": feedback, "profile": served}
+        cache_key = review_cache_key(req, profile)
+        
+        # 4. AI 모델을 사용한 상세 분석 (모델 로드 중이거나 admission 큐가 가득 차면 503 + Retry-After)
+        model_lifecycle.require()
+        cacheable = True
+        with inference_pool.slot():
+            try:
+                logger.info("Using AI model for detailed review")
+                
+                # 토크나이징/추론은 전용 워커 스레드에서 실행
+                model_start = time.perf_counter()
+                ai_feedback = await inference_pool.run(generate_review, req.original_text, req.summary_text, profile)
+                review_profiles.observe(profile, time.perf_counter() - model_start)
+                final_feedback = compose_feedback(ai_feedback, missing_basic)
                 
-                # 기본 체크 결과와 AI 결과 결합
-                if missing_basic:
-                    final_feedback = f"Missing elements: {', '.join(missing_basic)}. {ai_feedback}"
-                else:
-                    final_feedback = ai_feedback
-            else:
-                # AI 응답이 부적절한 경우 기본 체크 결과 사용
-                if missing_basic:
-                    final_feedback = f"Missing elements: {', '.join(missing_basic)}."
-                else:
-                    final_feedback = "Summary covers most essential elements but could benefit from more specific details."
-                    
-        except Exception as e:
-            logger.warning(f"AI model failed, using basic feedback: {e}")
-            if missing_basic:
-                final_feedback = f"Missing elements: {', '.join(missing_basic)}."
-            else:
-                final_feedback = "Summary appears adequate but detailed analysis unavailable."
+            except Exception as e:
+                logger.warning(f"AI model failed, using basic feedback: {e}")
+                cacheable = False
+                final_feedback = fallback_feedback(missing_basic)
         
-        # 최종 정리 (너무 긴 경우 자르기)
-        if len(final_feedback) > 200:
-            sentences = final_feedback.split('.')[:2]
-            final_feedback = '. '.join(s.strip() for s in sentences if s.strip())
-            if final_feedback and not final_feedback.endswith('.'):
-                final_feedback += '.'
+        final_feedback = shorten_feedback(final_feedback)
         
         # GPU 메모리 정리
         if DEVICE == "cuda":
@@ -209,8 +382,18 @@ async def review_summary(req: ReviewRequest):
         
         logger.info(f"Review completed: {final_feedback[:80]}...")
         
-        return {"feedback": final_feedback}
+        # 모델 실패로 대체된 피드백은 캐시하지 않음
+        served = profile if cacheable else "fallback"
+        if cacheable:
+            await asyncio.to_thread(review_cache.put, cache_key, {"feedback": final_feedback})
         
+        review_profiles.record(served)
+        metrics.observe("review_model_path", time.perf_counter() - start)
+        return {"feedback": final_feedback, "profile": served}
+        
+    except HTTPException:
+        raise
+    
     except torch.cuda.OutOfMemoryError:
         logger.error("GPU memory insufficient")
         if DEVICE == "cuda":
@@ -223,14 +406,126 @@ async def review_summary(req: ReviewRequest):
             torch.cuda.empty_cache()
         raise HTTPException(status_code=500, detail=f"Review failed: {str(e)}")
 
+@app.post("/review_batch")
+async def review_batch(req: ReviewBatchRequest):
+    """여러 (원문, 요약) 쌍을 한 번에 검토. 결과는 입력 순서대로 반환"""
+    if not req.items:
+        raise HTTPException(status_code=400, detail="At least one item is required.")
+    
+    for i, item in enumerate(req.items):
+        try:
+            await asyncio.to_thread(load_review_inputs, item)
+            validate_review_request(item)
+        except HTTPException as e:
+            raise HTTPException(status_code=400, detail=f"Item {i}: {e.detail}")
+    profile = review_profiles.resolve(req.profile)
+    
+    try:
+        results = [None] * len(req.items)
+        profiles = [profile] * len(req.items)
+        pending = []
+        
+        # 1. 기본 품질 체크 + 캐시 확인: 통과 못 한 항목은 모델 없이 바로 결과
+        for i, item in enumerate(req.items):
+            with metrics.timer("precheck"):
+                missing_basic = check_summary_basic_quality(item.summary_text)
+            if len(missing_basic) >= PRECHECK_THRESHOLD:
+                results[i] = precheck_feedback(missing_basic)
+                profiles[i] = "precheck"
+                metrics.inc("batch_precheck_items")
+                continue
+            cached = await cached_review(item, profile)
+            if cached is not None:
+                results[i], profiles[i] = cached
+                review_profiles.record(profiles[i])
+                metrics.inc("batch_cache_items")
+                continue
+            pending.append((i, missing_basic, review_cache_key(item, profile)))
+        metrics.inc("batch_model_items", len(pending))
+        
+        logger.info(f"Batch review - {len(req.items)} items, {len(pending)} sent to model")
+        
+        # 2. 남은 항목만 REVIEW_BATCH_MAX_SIZE 단위로 묶어서 batched generate
+        if pending:
+            model_lifecycle.require()
+            with inference_pool.slot():
+                for start in range(0, len(pending), REVIEW_BATCH_MAX_SIZE):
+                    chunk = pending[start:start + REVIEW_BATCH_MAX_SIZE]
+                    pairs = [(req.items[i].original_text, req.items[i].summary_text) for i, _, _ in chunk]
+                    try:
+                        model_start = time.perf_counter()
+                        outputs = await inference_pool.run(generate_reviews, pairs, profile)
+                        review_profiles.observe(profile, time.perf_counter() - model_start)
+                    except Exception as e:
+                        logger.warning(f"AI model failed, using basic feedback: {e}")
+                        outputs = None
+                    for j, (i, missing_basic, cache_key) in enumerate(chunk):
+                        if outputs is None:
+                            results[i] = shorten_feedback(fallback_feedback(missing_basic))
+                            profiles[i] = "fallback"
+                            continue
+                        results[i] = shorten_feedback(compose_feedback(outputs[j], missing_basic))
+                        review_profiles.record(profile)
+                        await asyncio.to_thread(review_cache.put, cache_key, {"feedback": results[i]})
+        
+        # GPU 메모리 정리
+        if DEVICE == "cuda":
+            torch.cuda.empty_cache()
+        
+        return {
+            "results": [
+                {"feedback": feedback, "profile": served}
+                for feedback, served in zip(results, profiles)
+            ]
+        }
+    
+    except HTTPException:
+        raise
+    
+    except Exception as e:
+        logger.error(f"Batch review failed: {e}")
+        if DEVICE == "cuda":
+            torch.cuda.empty_cache()
+        raise HTTPException(status_code=500, detail=f"Review failed: {str(e)}")
+
+@app.get("/cache_stats")
+async def cache_stats():
+    """리뷰 캐시 통계 (hit/miss, 항목 수, 용량)"""
+    return review_cache.snapshot()
+
+@app.get("/metrics")
+async def metrics_endpoint(format: str = "json"):
+    """단계별 지연 시간 히스토그램 (precheck vs 모델 경로 포함), in-flight, 토큰 처리량, 캐시 hit ratio"""
+    return metrics.response(format)
+
+@app.get("/health/live")
+async def health_live():
+    """프로세스가 요청을 받을 수 있는지 (모델 로드 중에도 200)"""
+    return {"status": "alive", "model_state": model_lifecycle.state}
+
+@app.get("/health/ready")
+async def health_ready():
+    """모델 로드와 warmup이 끝났는지 (아니면 503 + 진행 상황)"""
+    body = {"status": "ready" if model_lifecycle.ready else model_lifecycle.state, "model": MODEL_NAME, **model_lifecycle.snapshot()}
+    if not model_lifecycle.ready:
+        return JSONResponse(status_code=503, content=body)
+    return body
+
 @app.get("/health")
 async def health_check():
     """헬스 체크 엔드포인트"""
     return {
-        "status": "healthy",
+        "status": "healthy" if model_lifecycle.ready else model_lifecycle.state,
         "model": MODEL_NAME,
+        "model_lifecycle": model_lifecycle.snapshot(),
         "device": DEVICE,
-        "cuda_available": torch.cuda.is_available()
+        "backend": BACKEND,
+        "cuda_available": torch.cuda.is_available(),
+        "inference_pool": inference_pool.snapshot(),
+        "generation_profiles": review_profiles.snapshot(),
+        "shared_weights": SHARED_WEIGHTS,
+        "pid": os.getpid(),
+        "memory": process_memory()
     }
 
 @app.get("/")
@@ -240,7 +535,8 @@ async def root():
         "service": "Simple Reviewer Agent",
         "model": MODEL_NAME,
         "device": DEVICE,
-        "endpoints": ["/review_summary", "/health"]
+        "backend": BACKEND,
+        "endpoints": ["/review_summary", "/review_batch", "/cache_stats", "/metrics", "/health", "/health/live", "/health/ready"]
     }
 
 # 애플리케이션 시작시 로그
@@ -249,11 +545,15 @@ async def startup_event():
     logger.info("Simple Reviewer Agent started")
     logger.info(f"Model: {MODEL_NAME}")
     logger.info(f"Device: {DEVICE}")
+    model_lifecycle.start()
 
 # 종료시 정리
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down Reviewer Agent")
+    inference_pool.shutdown()
+    review_cache.close()
+    artifact_store.close()
     if DEVICE == "cuda":
         torch.cuda.empty_cache()
     gc.collect()
\ No newline at end of file
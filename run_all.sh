@@ -5,17 +5,55 @@ trap "trap - SIGTERM && kill -- -$$" SIGINT SIGTERM EXIT
 # 사용할 Conda 환경 이름
 CONDA_ENV_NAME="a2a-gpu"
 
+# 에이전트별 replica 수 (환경 변수로 지정, 기본 1개)
+# replica 포트는 기본 포트부터 10씩 증가: summarizer 8002, 8012, ... / reviewer 8003, 8013, ...
+SUMMARIZER_REPLICAS=${SUMMARIZER_REPLICAS:-1}
+REVIEWER_REPLICAS=${REVIEWER_REPLICAS:-1}
+# replica 하나당 uvicorn 워커 프로세스 수 (2 이상이면 워커끼리 mmap 가중치를 공유)
+SUMMARIZER_WORKERS=${SUMMARIZER_WORKERS:-1}
+REVIEWER_WORKERS=${REVIEWER_WORKERS:-1}
+[ "$SUMMARIZER_WORKERS" -gt 1 ] && export SUMMARIZER_SHARED_WEIGHTS=${SUMMARIZER_SHARED_WEIGHTS:-1}
+[ "$REVIEWER_WORKERS" -gt 1 ] && export REVIEWER_SHARED_WEIGHTS=${REVIEWER_SHARED_WEIGHTS:-1}
+
 # Conda 환경 활성화
 echo "Activating Conda environment: $CONDA_ENV_NAME"
 source ~/anaconda3/etc/profile.d/conda.sh
 conda activate $CONDA_ENV_NAME
 
+# replica끼리 CPU 코어를 나눠 쓰도록 프로세스당 torch 스레드 수 제한 (직접 지정했으면 그대로 사용)
+MODEL_PROCESSES=$((SUMMARIZER_REPLICAS * SUMMARIZER_WORKERS + REVIEWER_REPLICAS * REVIEWER_WORKERS))
+THREADS_PER_REPLICA=$(( $(nproc) / MODEL_PROCESSES ))
+[ "$THREADS_PER_REPLICA" -lt 1 ] && THREADS_PER_REPLICA=1
+export OMP_NUM_THREADS=${OMP_NUM_THREADS:-$THREADS_PER_REPLICA}
+
+# coordinator에 넘길 replica 주소 목록
+SUMMARIZER_URLS=""
+for ((i = 0; i < SUMMARIZER_REPLICAS; i++)); do
+    SUMMARIZER_URLS+="${SUMMARIZER_URLS:+,}http://127.0.0.1:$((8002 + 10 * i))"
+done
+REVIEWER_URLS=""
+for ((i = 0; i < REVIEWER_REPLICAS; i++)); do
+    REVIEWER_URLS+="${REVIEWER_URLS:+,}http://127.0.0.1:$((8003 + 10 * i))"
+done
+export COORDINATOR_SUMMARIZER_URLS=$SUMMARIZER_URLS
+export COORDINATOR_REVIEWER_URLS=$REVIEWER_URLS
+# replica / 워커가 늘어나면 coordinator가 동시에 보내는 논문 수도 늘림
+export COORDINATOR_PAPER_CONCURRENCY=${COORDINATOR_PAPER_CONCURRENCY:-$((4 * SUMMARIZER_REPLICAS * SUMMARIZER_WORKERS))}
+export COORDINATOR_JOB_SUMMARIZE_CONCURRENCY=${COORDINATOR_JOB_SUMMARIZE_CONCURRENCY:-$((4 * SUMMARIZER_REPLICAS * SUMMARIZER_WORKERS))}
+export COORDINATOR_JOB_REVIEW_CONCURRENCY=${COORDINATOR_JOB_REVIEW_CONCURRENCY:-$((2 * REVIEWER_REPLICAS * REVIEWER_WORKERS))}
+
 # 각 에이전트를 백그라운드에서 실행 (&)
 echo "Starting all agent servers..."
+echo "Summarizer replicas: $SUMMARIZER_URLS"
+echo "Reviewer replicas: $REVIEWER_URLS"
 uvicorn fetcher_agent:app --port 8001 &
-uvicorn summarizer_agent:app --port 8002 &
+for ((i = 0; i < SUMMARIZER_REPLICAS; i++)); do
+    uvicorn summarizer_agent:app --port $((8002 + 10 * i)) --workers $SUMMARIZER_WORKERS &
+done
 uvicorn coordinator_agent:app --port 8000 &
-uvicorn reviewer_agent:app --port 8003 &
+for ((i = 0; i < REVIEWER_REPLICAS; i++)); do
+    uvicorn reviewer_agent:app --port $((8003 + 10 * i)) --workers $REVIEWER_WORKERS &
+done
 
 # 모든 백그라운드 작업이 끝날 때까지 스크립트가 종료되지 않도록 대기
-wait
\ No newline at end of file
+wait
@@ -0,0 +1,143 @@
+import bisect
+import re
+
+# 한 번의 스캔으로 모든 위치에서 검사하는 패턴 (lookahead라 겹치는 후보도 놓치지 않음)
+# 맨 앞의 문자 집합 검사 덕분에 후보가 될 수 없는 위치는 정규식 엔진이 빠르게 건너뜀
+# - abstract_end: 기존 Abstract 정규식의 종료 조건 \b(introduction|keywords|1\.|I\.)\b
+# - references / bibliography / acknowledgment: 뒤쪽 \b만 요구 (앞쪽 경계는 사용할 때 확인)
+# - numbered: "2. Related Work" 같은 번호 붙은 섹션 헤딩
+TOKEN_PATTERN = re.compile(
+    r"""(?=[abikr0-9])(?=
+        (?P<abstract>abstract)
+      | (?P<introduction>introduction)
+      | (?P<references>references\b)
+      | (?P<bibliography>bibliography\b)
+      | (?P<acknowledgment>acknowledgment\b)
+      | (?P<keywords>\bkeywords\b)
+      | (?P<numbered>(?-i:\b\d{1,2}\.\s+[A-Z][a-z]))
+      | (?P<dotted>\b(?:1|I)\.\b)
+    )""",
+    re.IGNORECASE | re.VERBOSE
+)
+NUMBERED_INTRO = re.compile(r'1\.\s*$')
+ABSTRACT_PREFIX = re.compile(r'\s*[:\-]?\s*')
+# 잘라낸 끝부분에서 다시 스캔할 길이 (가장 긴 토큰보다 넉넉하게)
+TAIL_RESCAN = 64
+
+def is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+class SectionIndex:
+    """본문을 한 번만 스캔해서 섹션 헤딩 후보의 offset을 기록하는 인덱스
+
+    extract_main_content / clean_text에서 쓰던 lazy `.*?` + lookahead 정규식을 대체한다.
+    각 종류별 위치는 정렬된 리스트로 저장되어, "X 다음에 처음 나오는 Y"를 bisect로 찾는다.
+    """
+
+    KINDS = ("abstract", "introduction", "references", "bibliography",
+             "acknowledgment", "keywords", "numbered", "dotted")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.offsets = {kind: [] for kind in self.KINDS}
+        self.scan(0)
+
+    def scan(self, start: int) -> None:
+        for match in TOKEN_PATTERN.finditer(self.text, start):
+            self.offsets[match.lastgroup].append(match.start())
+
+    def truncated(self, end: int) -> "SectionIndex":
+        """text[:end]에 대한 인덱스. 앞부분 offset은 재사용하고 끝부분만 다시 스캔"""
+        index = SectionIndex.__new__(SectionIndex)
+        index.text = self.text[:end]
+        tail = max(0, end - TAIL_RESCAN)
+        index.offsets = {
+            kind: positions[:bisect.bisect_left(positions, tail)]
+            for kind, positions in self.offsets.items()
+        }
+        index.scan(tail)
+        return index
+
+    def first(self, kinds, start: int = 0):
+        """start 이후 처음 나오는 kinds 중 하나의 offset (없으면 None)"""
+        best = None
+        for kind in kinds:
+            positions = self.offsets[kind]
+            i = bisect.bisect_left(positions, start)
+            if i < len(positions) and (best is None or positions[i] < best):
+                best = positions[i]
+        return best
+
+    def first_word(self, kinds, start: int = 0):
+        """앞쪽도 단어 경계인 첫 위치 (\\bREFERENCES\\b 조건)"""
+        text = self.text
+        candidates = sorted(
+            pos for kind in kinds
+            for pos in self.offsets[kind][bisect.bisect_left(self.offsets[kind], start):]
+        )
+        for pos in candidates:
+            if pos == 0 or not is_word_char(text[pos - 1]):
+                return pos
+        return None
+
+    def references_start(self):
+        """References / Bibliography 헤딩(단어)이 처음 나오는 위치"""
+        return self.first_word(("references", "bibliography"))
+
+    def abstract_span(self):
+        """Abstract 본문 구간 (시작, 끝). 종료 조건(Introduction, Keywords, 1., I.)이 없으면 None"""
+        start = self.first(("abstract",))
+        if start is None:
+            return None
+        body = ABSTRACT_PREFIX.match(self.text, start + len("abstract")).end()
+        end = self.first_abstract_end(body)
+        if end is None:
+            return None
+        return body, end
+
+    def first_abstract_end(self, start: int):
+        text = self.text
+        candidates = []
+        for pos in self.offsets["introduction"][bisect.bisect_left(self.offsets["introduction"], start):]:
+            # \bintroduction\b
+            if (pos == 0 or not is_word_char(text[pos - 1])) and \
+                    (pos + 12 >= len(text) or not is_word_char(text[pos + 12])):
+                candidates.append(pos)
+                break
+        for kind in ("keywords", "dotted"):
+            pos = self.first((kind,), start)
+            if pos is not None:
+                candidates.append(pos)
+        return min(candidates) if candidates else None
+
+    def main_span(self):
+        """Introduction부터 References / Bibliography / Acknowledgment 직전까지 (시작, 끝)"""
+        intro = self.first(("introduction",))
+        if intro is None:
+            return None
+        end = self.first(("references", "bibliography", "acknowledgment"), intro + len("introduction"))
+        if end is None:
+            return None
+        # "1. Introduction" 형태면 번호부터 포함
+        prefix = NUMBERED_INTRO.search(self.text, max(0, intro - 64), intro)
+        start = prefix.start() if prefix else intro
+        return start, end
+
+    def slice(self, span) -> str:
+        return self.text[span[0]:span[1]] if span else ""
+
+def clean_and_index(text: str) -> SectionIndex:
+    """clean_text와 같은 정리(공백 정리, References/Bibliography 이후 제거)를 한 뒤 인덱스 반환
+
+    References 위치는 인덱스에서 찾고, 잘라낸 본문은 끝부분만 다시 스캔하므로
+    전체 텍스트는 한 번만 스캔한다.
+    """
+    text = re.sub(r'\s+', ' ', text)
+    # 페이지 번호 제거
+    text = re.sub(r'^\d+\s*$', '', text, flags=re.MULTILINE)
+    text = text.strip()
+    index = SectionIndex(text)
+    cut = index.references_start()
+    if cut is not None:
+        index = index.truncated(len(text[:cut].rstrip()))
+    return index
@@ -1,9 +1,28 @@
-import fitz  # PyMuPDF
 import torch
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
-from fastapi import FastAPI, HTTPException
+from model_backend import load_seq2seq, process_memory, warmup_generate
+from model_lifecycle import ModelLifecycle
+from generation_profiles import GenerationProfiles
+from metrics import Metrics, current_request_id, hit_ratio
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+from python_multipart.multipart import MultipartParser, parse_options_header
 from pydantic import BaseModel
-import re
+from inference_pool import InferencePool
+from result_cache import ResultCache, file_digest, make_key
+from artifact_store import ArtifactStore
+from token_budget import sentence_prefix
+from pdf_text import extract_raw_text
+from section_index import SectionIndex, clean_and_index
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+import multiprocessing
+import threading
+import tempfile
+import hashlib
+import os
+import time
+import asyncio
+import functools
 import logging
 
 # 로깅 설정
@@ -11,54 +30,179 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Simple Summarizer Agent")
+metrics = Metrics("summarizer")
+metrics.install(app)
 
 # --- Model and Device Setup ---
 DEVICE = "cuda" if torch.cuda.is_available() else "cpu"
-MODEL_NAME = "facebook/bart-large-cnn"
+# 추론 백엔드: torch (fp32/fp16), int8 (dynamic 양자화, CPU), onnx (ONNX Runtime)
+BACKEND = os.getenv("SUMMARIZER_BACKEND", "torch")
+# uvicorn --workers로 여러 프로세스를 띄울 때 mmap 가중치를 공유 (torch + CPU)
+SHARED_WEIGHTS = os.getenv("SUMMARIZER_SHARED_WEIGHTS", "0") == "1"
+MODEL_NAME = os.getenv("SUMMARIZER_MODEL", "facebook/bart-large-cnn")
 MAX_INPUT_LENGTH = 1024
 MAX_OUTPUT_LENGTH = 512
 
-logger.info(f"Loading model: {MODEL_NAME} on {DEVICE}")
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-model = AutoModelForSeq2SeqLM.from_pretrained(
-    MODEL_NAME,
-    torch_dtype=torch.float16 if DEVICE == "cuda" else torch.float32
-).to(DEVICE)
-model.eval()
-logger.info("Model loaded successfully")
+# 요약 생성 파라미터 (캐시 키에도 포함됨)
+GENERATION_KWARGS = {
+    "max_length": MAX_OUTPUT_LENGTH,
+    "min_length": 150,  # 충분한 길이 보장
+    "num_beams": 4,
+    "length_penalty": 1.2,
+    "early_stopping": True,
+    "do_sample": False,
+    "repetition_penalty": 1.2,
+    "no_repeat_ngram_size": 3,
+}
+# long-document 모드에서 청크별 중간 요약에 쓰는 파라미터 (짧고 가볍게)
+CHUNK_GENERATION_KWARGS = {
+    "max_length": 160,
+    "min_length": 40,
+    "num_beams": 2,
+    "length_penalty": 1.0,
+    "early_stopping": True,
+    "do_sample": False,
+    "repetition_penalty": 1.2,
+    "no_repeat_ngram_size": 3,
+}
+# 이름 붙은 최종 요약 프로파일 (품질 순). quality는 기존 파라미터 그대로라 기존 캐시 키가 유지됨
+SUMMARY_PROFILES = {
+    "quality": GENERATION_KWARGS,
+    "balanced": {**GENERATION_KWARGS, "num_beams": 2, "min_length": 100, "max_length": 320},
+    # greedy + 짧은 출력 (length_penalty / early_stopping은 beam search에서만 의미가 있어서 뺌)
+    "fast": {
+        "max_length": 200,
+        "min_length": 60,
+        "num_beams": 1,
+        "do_sample": False,
+        "repetition_penalty": 1.2,
+        "no_repeat_ngram_size": 3,
+    },
+}
+# 텍스트 추출/자르기 로직이 바뀌면 올려서 기존 캐시를 무효화
+PROMPT_VERSION = "v2"
+# 최종 요약이 품질 체크를 통과하지 못했을 때 대신 돌려주는 문구 (캐시하지 않음)
+FALLBACK_SUMMARY = "Unable to generate meaningful summary. The paper content may be too complex or insufficient."
+
+# --- Long-document (map-reduce) 설정 ---
+# 본문 중 요약에 사용할 최대 토큰 수와 청크당 토큰 수
+LONG_DOC_TOKEN_BUDGET = int(os.getenv("SUMMARIZER_LONG_DOC_TOKEN_BUDGET", "16384"))
+LONG_DOC_CHUNK_TOKENS = int(os.getenv("SUMMARIZER_LONG_DOC_CHUNK_TOKENS", "900"))
+# 동시에 배처에 넣을 청크 수
+LONG_DOC_CHUNK_CONCURRENCY = int(os.getenv("SUMMARIZER_LONG_DOC_CHUNK_CONCURRENCY", "8"))
+# reduce 단계 최대 깊이 (청크 요약이 한 번에 안 들어가면 다시 묶어서 요약)
+LONG_DOC_MAX_REDUCE_DEPTH = 3
+
+# 추출된 문서를 프로세스 내에 몇 개까지 보관할지 (path + mtime 기준 LRU)
+EXTRACT_CACHE_SIZE = int(os.getenv("SUMMARIZER_EXTRACT_CACHE_SIZE", "64"))
+
+# --- PDF 추출 설정 ---
+# 페이지 수가 이 이상이면 프로세스 풀에서 페이지 병렬 추출 (PDF_PROCESSES <= 1이면 비활성)
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("SUMMARIZER_PDF_PARALLEL_MIN_PAGES", "32"))
+PDF_PROCESSES = int(os.getenv("SUMMARIZER_PDF_PROCESSES", str(min(4, os.cpu_count() or 1))))
+
+# --- PDF 업로드 설정 (공유 파일시스템 없이 다른 노드에서 PDF 바이트를 보낼 때) ---
+# 업로드 최대 크기 (넘으면 413), 메모리에 두는 크기 (넘으면 임시 파일로 spool)
+UPLOAD_MAX_BYTES = int(float(os.getenv("SUMMARIZER_UPLOAD_MAX_MB", "64")) * 1024 * 1024)
+UPLOAD_SPOOL_BYTES = int(float(os.getenv("SUMMARIZER_UPLOAD_SPOOL_MB", "8")) * 1024 * 1024)
+# multipart 본문에서 파일 파트 외에 허용하는 바이트 (boundary, 파트 헤더, 다른 필드)
+UPLOAD_MULTIPART_OVERHEAD = 64 * 1024
+
+# --- Micro-batching 설정 ---
+# 최대 BATCH_MAX_SIZE개 또는 BATCH_WAIT_MS 동안 요청을 모아서 한 번에 generate
+BATCH_MAX_SIZE = int(os.getenv("SUMMARIZER_BATCH_MAX_SIZE", "4"))
+BATCH_WAIT_MS = float(os.getenv("SUMMARIZER_BATCH_WAIT_MS", "50"))
+# 입력 토큰 길이를 이 폭으로 버킷팅해서 패딩 낭비를 줄임
+BATCH_BUCKET_WIDTH = int(os.getenv("SUMMARIZER_BATCH_BUCKET_WIDTH", "256"))
+
+# --- 추론 워커 풀 설정 ---
+INFERENCE_WORKERS = int(os.getenv("SUMMARIZER_INFERENCE_WORKERS", "1"))
+INFERENCE_MAX_QUEUE = int(os.getenv("SUMMARIZER_INFERENCE_MAX_QUEUE", "16"))
+INFERENCE_RETRY_AFTER = int(os.getenv("SUMMARIZER_INFERENCE_RETRY_AFTER", "30"))
+
+# --- 생성 프로파일 설정 ---
+# 기본 프로파일 (auto면 부하에 따라 자동 선택)
+PROFILE_DEFAULT = os.getenv("SUMMARIZER_PROFILE", "auto")
+# 대기 요청 수 / 최근 모델 경로 p95(초, 0이면 끔)가 이 값을 넘으면 한 단계 싼 프로파일로
+PROFILE_MAX_QUEUE = int(os.getenv("SUMMARIZER_PROFILE_MAX_QUEUE", "8"))
+PROFILE_MAX_P95_S = float(os.getenv("SUMMARIZER_PROFILE_MAX_P95_S", "0"))
+PROFILE_COOLDOWN_S = float(os.getenv("SUMMARIZER_PROFILE_COOLDOWN_S", "30"))
+
+# 모델은 startup 이후 백그라운드에서 로드 (model_lifecycle)
+tokenizer = None
+model = None
+
+def load_model():
+    global tokenizer, model, DEVICE
+    logger.info(f"Loading model: {MODEL_NAME} on {DEVICE} (backend: {BACKEND})")
+    tokenizer, model, DEVICE = load_seq2seq(MODEL_NAME, BACKEND, DEVICE, shared_weights=SHARED_WEIGHTS)
+    logger.info("Model loaded successfully")
+
+def warmup_model():
+    warmup_generate(tokenizer, model, DEVICE, num_beams=GENERATION_KWARGS["num_beams"])
+
+model_lifecycle = ModelLifecycle("summarizer", load_model, warmup_model, metrics, retry_after=INFERENCE_RETRY_AFTER)
+
+inference_pool = InferencePool("summarizer", INFERENCE_WORKERS, INFERENCE_MAX_QUEUE, INFERENCE_RETRY_AFTER)
+summary_cache = ResultCache("summarizer")
+summary_profiles = GenerationProfiles(
+    "summarize", SUMMARY_PROFILES, PROFILE_DEFAULT,
+    load_fn=lambda: inference_pool.admitted,
+    metrics=metrics,
+    max_queue=PROFILE_MAX_QUEUE,
+    max_p95_s=PROFILE_MAX_P95_S,
+    cooldown_s=PROFILE_COOLDOWN_S
+)
+# PDF / 추출 본문 / 요약을 id로 주고받는 공유 아티팩트 저장소
+artifact_store = ArtifactStore()
+
+# 페이지 병렬 추출용 프로세스 풀 (처음 필요할 때 생성)
+# 모델을 들고 있는 프로세스를 fork하지 않도록 spawn 사용
+pdf_executor = None
+pdf_executor_lock = threading.Lock()
+
+def get_pdf_executor():
+    global pdf_executor
+    if PDF_PROCESSES <= 1:
+        return None
+    with pdf_executor_lock:
+        if pdf_executor is None:
+            pdf_executor = ProcessPoolExecutor(
+                max_workers=PDF_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+    return pdf_executor
 
 # --- Request Body Models ---
 class PathRequest(BaseModel):
-    pdf_path: str
+    pdf_path: str = ""
+    # 아티팩트 저장소의 PDF id (있으면 pdf_path 대신 사용)
+    pdf_artifact: str = None
+
+class SummarizeRequest(PathRequest):
+    # True면 요약과 함께 추출된 본문도 돌려줌 (/extract_text 재호출 불필요)
+    include_text: bool = False
+    # True면 본문 전체를 청크로 나눠 요약한 뒤 다시 요약 (map-reduce)
+    long_document: bool = False
+    # True면 추출 본문과 요약을 아티팩트 저장소에 넣고 id를 돌려줌 (text_artifact, summary_artifact)
+    return_artifacts: bool = False
+    # 생성 프로파일 (quality / balanced / fast / auto, 없으면 SUMMARIZER_PROFILE)
+    profile: str = None
 
 def clean_text(text: str) -> str:
-    """기본적인 텍스트 정리"""
-    # 연속된 공백을 하나로
-    text = re.sub(r'\s+', ' ', text)
-    # 페이지 번호 제거
-    text = re.sub(r'^\d+\s*$', '', text, flags=re.MULTILINE)
-    # 참조 섹션 제거
-    text = re.sub(r'\bREFERENCES\b.*', '', text, flags=re.DOTALL | re.IGNORECASE)
-    text = re.sub(r'\bBibliography\b.*', '', text, flags=re.DOTALL | re.IGNORECASE)
-    
-    return text.strip()
+    """기본적인 텍스트 정리 (공백 정리, 페이지 번호 및 참조 섹션 제거)"""
+    return clean_and_index(text).text
 
-def extract_main_content(text: str) -> str:
-    """Abstract와 주요 내용 추출"""
+def extract_main_content(text: str, index: SectionIndex = None) -> str:
+    """Abstract와 주요 내용 추출 (SectionIndex 기반, 선형 시간)"""
+    if index is None:
+        index = SectionIndex(text)
     
     # Abstract 찾기
-    abstract_match = re.search(
-        r'(?i)abstract\s*[:\-]?\s*(.*?)(?=\b(?:introduction|keywords|1\.|I\.)\b)', 
-        text, re.DOTALL
-    )
-    abstract = abstract_match.group(1).strip() if abstract_match else ""
+    abstract = index.slice(index.abstract_span()).strip()
     
-    # Introduction부터 Conclusion까지 추출 (References 전까지)
-    main_match = re.search(
-        r'(?i)(?:introduction|1\.\s*introduction).*?(?=(?:references|bibliography|acknowledgment)\b)',
-        text, re.DOTALL
-    )
-    main_content = main_match.group(0) if main_match else ""
+    # Introduction부터 Conclusion까지 추출 (References / Acknowledgment 전까지)
+    main_content = index.slice(index.main_span())
     
     # Abstract + Main Content 결합
     if abstract and main_content:
@@ -73,45 +217,102 @@ def extract_main_content(text: str) -> str:
     
     return combined
 
-def smart_truncate(text: str, max_tokens: int = 900) -> str:
-    """토큰 기반으로 텍스트 자르기"""
-    tokens = tokenizer.encode(text, add_special_tokens=False)
-    
-    if len(tokens) <= max_tokens:
-        return text
-    
-    # 문장 단위로 자르기
-    sentences = text.split('.')
-    truncated_text = ""
-    current_tokens = 0
-    
-    for sentence in sentences:
-        sentence_tokens = len(tokenizer.encode(sentence, add_special_tokens=False))
-        if current_tokens + sentence_tokens > max_tokens:
-            break
-        truncated_text += sentence + "."
-        current_tokens += sentence_tokens
-    
-    return truncated_text
+def smart_truncate(text: str, max_tokens: int = 900) -> tuple:
+    """토큰 기반으로 텍스트 자르기 (한 번만 토크나이징, 문장 단위로 자름)
+
+    (잘린 텍스트, 토큰 수)를 반환하고, 토큰 수는 배처의 길이 버킷팅에 그대로 쓴다.
+    """
+    return sentence_prefix(tokenizer, text, max_tokens)
 
 def extract_text_from_pdf(pdf_path: str) -> str:
-    """PDF에서 텍스트 추출 및 전처리"""
+    """PDF에서 텍스트 추출 (path + mtime 기준 LRU 캐시)"""
     try:
-        logger.info(f"Extracting text from PDF: {pdf_path}")
-        
-        doc = fitz.open(pdf_path)
-        raw_text = ""
-        
-        for page in doc:
-            raw_text += page.get_text() + "\n"
+        stat = os.stat(pdf_path)
+    except OSError as e:
+        logger.error(f"PDF text extraction failed: {e}")
+        raise HTTPException(status_code=500, detail=f"PDF extraction failed: {str(e)}")
+    return cached_extract(os.path.abspath(pdf_path), stat.st_mtime_ns, stat.st_size)
+
+@functools.lru_cache(maxsize=EXTRACT_CACHE_SIZE)
+def cached_extract(pdf_path: str, mtime_ns: int, size: int) -> str:
+    """mtime/size가 바뀌면 키가 달라져서 다시 파싱됨"""
+    return parse_pdf_text(pdf_path)
+
+class UploadBuffer:
+    """업로드 PDF 버퍼: UPLOAD_SPOOL_BYTES까지는 메모리, 넘으면 임시 PDF 파일로 넘김
+
+    메모리에 있으면 PyMuPDF가 바이트를 바로 열고(파일을 만들지 않음), 파일로 넘어간 큰 업로드는
+    경로로 열어서 다시 메모리로 읽어 들이지 않는다 (페이지 병렬 추출 워커에도 경로만 전달).
+    """
+
+    def __init__(self, spool_bytes: int):
+        self.spool_bytes = spool_bytes
+        self.data = bytearray()
+        self.path = None
+        self._file = None
+        self.size = 0
+
+    def write(self, chunk: bytes) -> None:
+        self.size += len(chunk)
+        if self._file is None and len(self.data) + len(chunk) > self.spool_bytes:
+            fd, self.path = tempfile.mkstemp(prefix="upload-", suffix=".pdf")
+            self._file = os.fdopen(fd, "wb")
+            self._file.write(self.data)
+            self.data = bytearray()
+        if self._file is not None:
+            self._file.write(chunk)
+        else:
+            self.data += chunk
+
+    def head(self, size: int) -> bytes:
+        if self._file is None:
+            return bytes(self.data[:size])
+        self._file.flush()
+        with open(self.path, "rb") as f:
+            return f.read(size)
+
+    def source(self):
+        """PyMuPDF에 넘길 PDF (메모리면 바이트, 넘쳤으면 임시 파일 경로)"""
+        if self._file is not None:
+            self._file.flush()
+            return self.path
+        return bytes(self.data)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+        self.data = bytearray()
+
+def extract_text_from_upload(buffer: UploadBuffer) -> str:
+    """업로드된 PDF에서 텍스트 추출 (작은 업로드는 메모리에서 바로 엶)"""
+    return parse_pdf_text(buffer.source())
+
+def parse_pdf_text(source) -> str:
+    """PDF에서 텍스트 추출 및 전처리 (source는 파일 경로 또는 PDF 바이트)"""
+    try:
+        label = source if isinstance(source, str) else f"<upload, {len(source)} bytes>"
+        logger.info(f"Extracting text from PDF: {label}")
         
-        doc.close()
+        # References 헤딩 이후 페이지는 읽지 않고, 큰 문서는 프로세스 풀에서 페이지 병렬 추출
+        with metrics.timer("pdf_extract"):
+            raw_text = extract_raw_text(
+                source,
+                executor=get_pdf_executor(),
+                parallel_min_pages=PDF_PARALLEL_MIN_PAGES,
+                workers=PDF_PROCESSES
+            )
         
         logger.info(f"Raw text length: {len(raw_text)} characters")
         
         # 텍스트 정리
-        cleaned_text = clean_text(raw_text)
-        main_content = extract_main_content(cleaned_text)
+        # 텍스트를 한 번만 스캔해서 섹션 인덱스를 만들고 그 인덱스로 잘라냄
+        with metrics.timer("section_index"):
+            index = clean_and_index(raw_text)
+            main_content = extract_main_content(index.text, index)
         
         logger.info(f"Processed text length: {len(main_content)} characters")
         
@@ -124,87 +325,524 @@ def extract_text_from_pdf(pdf_path: str) -> str:
         logger.error(f"PDF text extraction failed: {e}")
         raise HTTPException(status_code=500, detail=f"PDF extraction failed: {str(e)}")
 
+def resolve_pdf_path(req: PathRequest) -> str:
+    """요청의 PDF 파일 경로 (pdf_artifact가 있으면 아티팩트 저장소의 경로)
+
+    아티팩트를 못 찾으면 (다른 작업 디렉터리에서 뜬 에이전트 등) 같이 온 pdf_path를 쓴다.
+    이때 req.pdf_artifact를 비워서 캐시 키는 파일 내용으로 다시 계산되게 한다.
+    """
+    if req.pdf_artifact:
+        try:
+            return artifact_store.path(req.pdf_artifact)
+        except (ValueError, FileNotFoundError) as e:
+            if not req.pdf_path:
+                raise HTTPException(status_code=400 if isinstance(e, ValueError) else 404, detail=str(e))
+            logger.warning(f"Artifact lookup failed, using pdf_path instead: {e}")
+            req.pdf_artifact = None
+    if not req.pdf_path or not req.pdf_path.lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Valid PDF path required")
+    return req.pdf_path
+
 @app.post("/extract_text")
 async def extract_text_endpoint(req: PathRequest):
     """PDF에서 텍스트 추출"""
-    if not req.pdf_path or not req.pdf_path.lower().endswith(".pdf"):
-        raise HTTPException(status_code=400, detail="Valid PDF path required")
-    
-    text = extract_text_from_pdf(req.pdf_path)
+    pdf_path = await asyncio.to_thread(resolve_pdf_path, req)
+    text = await asyncio.to_thread(extract_text_from_pdf, pdf_path)
     return {"text": text}
 
-@app.post("/summarize_paper")
-async def summarize_paper(req: PathRequest):
-    """논문 요약 생성"""
-    if not req.pdf_path or not req.pdf_path.lower().endswith(".pdf"):
-        raise HTTPException(status_code=400, detail="Valid PDF path required")
-    
-    try:
-        # 1. 텍스트 추출
-        doc_text = extract_text_from_pdf(req.pdf_path)
-        
-        # 2. 토큰 길이에 맞게 조정
-        truncated_text = smart_truncate(doc_text)
-        
-        logger.info(f"Input text length: {len(truncated_text)} characters")
-        
-        # 3. 토크나이징
+def generation_kwargs(mode: str, profile: str = "quality") -> dict:
+    """청크 중간 요약은 항상 CHUNK_GENERATION_KWARGS, 최종 요약은 프로파일 파라미터"""
+    if mode == "chunk":
+        return CHUNK_GENERATION_KWARGS
+    return SUMMARY_PROFILES[profile]
+
+def generate_summaries(texts: list, mode: str = "summary", request_ids: list = None, profile: str = "quality") -> list:
+    """여러 입력을 하나의 배치로 묶어 요약 생성"""
+    with metrics.timer("tokenize", request_ids):
         inputs = tokenizer(
-            truncated_text, 
-            return_tensors="pt", 
-            max_length=MAX_INPUT_LENGTH, 
+            texts,
+            return_tensors="pt",
+            max_length=MAX_INPUT_LENGTH,
             truncation=True,
             padding=True
         ).to(DEVICE)
-        
-        # 4. 요약 생성
-        with torch.no_grad():
-            summary_ids = model.generate(
-                inputs["input_ids"],
-                attention_mask=inputs.get("attention_mask"),
-                max_length=MAX_OUTPUT_LENGTH,
-                min_length=150,  # 충분한 길이 보장
-                num_beams=4,
-                length_penalty=1.2,
-                early_stopping=True,
-                do_sample=False,
-                repetition_penalty=1.2,
-                no_repeat_ngram_size=3
-            )
-        
-        # 5. 디코딩
-        summary = tokenizer.decode(summary_ids[0], skip_special_tokens=True)
-        summary = summary.strip()
-        
-        # 6. 품질 체크
-        if not summary or len(summary.split()) < 30:
+
+    with metrics.timer("generate", request_ids), torch.no_grad():
+        summary_ids = model.generate(
+            inputs["input_ids"],
+            attention_mask=inputs.get("attention_mask"),
+            **generation_kwargs(mode, profile)
+        )
+    metrics.inc("tokens_in", int(inputs["attention_mask"].sum()))
+    metrics.inc("tokens_out", int((summary_ids != tokenizer.pad_token_id).sum()))
+
+    summaries = []
+    for ids in summary_ids:
+        summary = tokenizer.decode(ids, skip_special_tokens=True).strip()
+        # 품질 체크 (최종 요약에만 적용)
+        if mode == "summary" and (not summary or len(summary.split()) < 30):
             logger.warning("Generated summary too short")
-            summary = "Unable to generate meaningful summary. The paper content may be too complex or insufficient."
-        
-        # GPU 메모리 정리
-        if DEVICE == "cuda":
-            torch.cuda.empty_cache()
-        
-        logger.info(f"Summary generated: {len(summary)} characters")
-        
-        return {"summary": summary}
-        
-    except Exception as e:
-        logger.error(f"Summarization failed: {e}")
-        
-        if DEVICE == "cuda":
-            torch.cuda.empty_cache()
-            
+            summary = FALLBACK_SUMMARY
+        summaries.append(summary)
+
+    # GPU 메모리 정리
+    if DEVICE == "cuda":
+        torch.cuda.empty_cache()
+
+    return summaries
+
+class SummaryBatcher:
+    """요청 간 micro-batching 스케줄러
+
+    대기 중인 요약 요청을 최대 max_batch_size개 또는 max_wait_ms 동안 모은 뒤,
+    (생성 모드, 프로파일)과 입력 토큰 길이 기준으로 버킷을 나눠 버킷마다 한 번씩 generate를 실행한다.
+    토큰 길이는 제출하는 쪽이 budget 계산(smart_truncate / split_into_chunks)에서 센 값을 받는다.
+    """
+
+    def __init__(self, max_batch_size: int, max_wait_ms: float, bucket_width: int):
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self.bucket_width = max(1, bucket_width)
+        self.queue = None
+        self._worker = None
+        self.stats = {
+            "batches": 0,
+            "items": 0,
+            "max_batch_size": 0,
+            "batch_size_counts": {},
+        }
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    async def submit(self, text: str, tokens: int, mode: str = "summary", profile: str = "quality") -> str:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((text, tokens, (mode, profile), future, current_request_id()))
+        return await future
+
+    async def _collect(self) -> list:
+        """첫 요청을 기다린 뒤 윈도우 안에 도착한 요청들을 모음"""
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    def _bucket(self, batch: list) -> list:
+        """입력 토큰 길이로 정렬 후 같은 모드/프로파일, 같은 길이 구간끼리 묶음"""
+        buckets = {}
+        for item in sorted(batch, key=lambda item: item[1]):
+            _, tokens, key, *_ = item
+            buckets.setdefault((key, min(tokens, MAX_INPUT_LENGTH) // self.bucket_width), []).append(item)
+        return list(buckets.values())
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            for bucket in self._bucket(batch):
+                self._record(len(bucket))
+                texts = [text for text, *_ in bucket]
+                mode, profile = bucket[0][2]
+                request_ids = [request_id for *_, request_id in bucket]
+                try:
+                    summaries = await inference_pool.run(generate_summaries, texts, mode, request_ids, profile)
+                except Exception as e:
+                    for *_, future, _ in bucket:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for (*_, future, _), summary in zip(bucket, summaries):
+                    if not future.done():
+                        future.set_result(summary)
+
+    def _record(self, size: int):
+        self.stats["batches"] += 1
+        self.stats["items"] += size
+        self.stats["max_batch_size"] = max(self.stats["max_batch_size"], size)
+        counts = self.stats["batch_size_counts"]
+        counts[size] = counts.get(size, 0) + 1
+
+    def snapshot(self) -> dict:
+        batches = self.stats["batches"]
+        return {
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "batches": batches,
+            "items": self.stats["items"],
+            "avg_batch_size": round(self.stats["items"] / batches, 2) if batches else 0.0,
+            "max_batch_size": self.stats["max_batch_size"],
+            "batch_size_counts": dict(self.stats["batch_size_counts"]),
+            "config": {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "bucket_width": self.bucket_width,
+            },
+        }
+
+batcher = SummaryBatcher(BATCH_MAX_SIZE, BATCH_WAIT_MS, BATCH_BUCKET_WIDTH)
+
+metrics.gauge("batch_queue_depth", lambda: batcher.queue.qsize() if batcher.queue else 0)
+metrics.gauge("inference_admitted", lambda: inference_pool.admitted)
+metrics.gauge("inference_rejected", lambda: inference_pool.rejected)
+metrics.gauge("generation_profile_level", lambda: summary_profiles.level)
+metrics.gauge("summary_cache_hit_ratio", lambda: hit_ratio(summary_cache.hits, summary_cache.misses))
+metrics.gauge("extract_cache_hit_ratio", lambda: hit_ratio(cached_extract.cache_info().hits, cached_extract.cache_info().misses))
+
+def split_into_chunks(text: str, chunk_tokens: int, token_budget: int) -> list:
+    """토큰 budget 안에서 본문을 chunk_tokens 크기의 청크로 나눔 ((청크, 토큰 수) 리스트)
+
+    한 번만 토크나이징하고 offset mapping으로 원문을 잘라내며,
+    가능하면 청크 끝을 문장 끝('.')에 맞춘다.
+    """
+    encoding = tokenizer(
+        text,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        truncation=True,
+        max_length=token_budget
+    )
+    offsets = encoding["offset_mapping"]
+    chunks = []
+    start = 0
+    while start < len(offsets):
+        end = min(start + chunk_tokens, len(offsets))
+        if end < len(offsets):
+            # 청크 후반부에서 문장 끝을 찾아 그 뒤에서 자름
+            for i in range(end - 1, start + chunk_tokens // 2, -1):
+                if text[offsets[i][1] - 1:offsets[i][1]] == ".":
+                    end = i + 1
+                    break
+        chunk = text[offsets[start][0]:offsets[end - 1][1]].strip()
+        if chunk:
+            chunks.append((chunk, end - start))
+        start = end
+    return chunks
+
+async def summarize_long_document(doc_text: str, profile: str = "quality") -> str:
+    """map-reduce 요약: 청크별 요약(batched) → 청크 요약들을 다시 요약 (최종 요약에만 프로파일 적용)"""
+    chunks = await inference_pool.run(split_into_chunks, doc_text, LONG_DOC_CHUNK_TOKENS, LONG_DOC_TOKEN_BUDGET)
+    logger.info(f"Long-document mode: {len(chunks)} chunks")
+    if len(chunks) <= 1:
+        single_input, tokens = await inference_pool.run(smart_truncate, chunks[0][0] if chunks else doc_text)
+        return await batcher.submit(single_input, tokens, profile=profile)
+
+    semaphore = asyncio.Semaphore(LONG_DOC_CHUNK_CONCURRENCY)
+
+    async def summarize_chunk(chunk: str, tokens: int) -> str:
+        async with semaphore:
+            return await batcher.submit(chunk, tokens, mode="chunk")
+
+    for _ in range(LONG_DOC_MAX_REDUCE_DEPTH):
+        # map: 배처가 동시에 들어온 청크들을 한 번의 generate로 묶어줌
+        partials = await asyncio.gather(*(summarize_chunk(chunk, tokens) for chunk, tokens in chunks))
+        combined = " ".join(partial for partial in partials if partial)
+        chunks = await inference_pool.run(split_into_chunks, combined, LONG_DOC_CHUNK_TOKENS, LONG_DOC_TOKEN_BUDGET)
+        if len(chunks) <= 1:
+            break
+
+    # reduce: 청크 요약들을 하나의 최종 요약으로
+    reduce_input, tokens = await inference_pool.run(smart_truncate, " ".join(chunk for chunk, _ in chunks))
+    return await batcher.submit(reduce_input, tokens, profile=profile)
+
+def summary_cache_key(pdf_hash: str, long_document: bool = False, profile: str = "quality") -> str:
+    """PDF 내용 해시 + 모델 + 프로파일 생성 파라미터 + 프롬프트 버전 (+ long-document 설정)"""
+    mode_key = ()
+    if long_document:
+        mode_key = ("long", CHUNK_GENERATION_KWARGS, LONG_DOC_TOKEN_BUDGET, LONG_DOC_CHUNK_TOKENS)
+    return make_key(pdf_hash, MODEL_NAME, BACKEND, SUMMARY_PROFILES[profile], PROMPT_VERSION, *mode_key)
+
+async def summarize_document(doc_text: str, long_document: bool = False, profile: str = "quality") -> str:
+    """추출된 본문 → 요약 (모델이 로드된 상태에서 호출)"""
+    if long_document:
+        # 본문 전체를 청크 단위로 요약 후 reduce
+        return await summarize_long_document(doc_text, profile)
+    
+    # 토큰 길이에 맞게 조정
+    truncated_text, tokens = await inference_pool.run(smart_truncate, doc_text)
+    
+    logger.info(f"Input text length: {len(truncated_text)} characters ({tokens} tokens)")
+    
+    # 배치 스케줄러를 통해 요약 생성
+    return await batcher.submit(truncated_text, tokens, profile=profile)
+
+async def text_outputs(req: SummarizeRequest, extract, summary: str, doc_text: str = None, text_artifact: str = None) -> dict:
+    """요청에 따라 추출 본문(include_text)과 본문/요약 아티팩트 id(return_artifacts)
+
+    extract는 본문이 필요할 때만 호출하는 블로킹 함수 (PDF 경로 또는 업로드 버퍼에서 추출)
+    """
+    outputs = {}
+    # 캐시에 기록된 본문 아티팩트가 아직 있으면 PDF를 다시 파싱하지 않음
+    if text_artifact and not await asyncio.to_thread(artifact_store.exists, text_artifact):
+        text_artifact = None
+    if doc_text is None and (req.include_text or (req.return_artifacts and not text_artifact)):
+        doc_text = await asyncio.to_thread(extract)
+    if req.include_text:
+        outputs["text"] = doc_text
+    if req.return_artifacts:
+        if not text_artifact:
+            text_artifact = await asyncio.to_thread(artifact_store.put_text, doc_text, "text")
+        outputs["text_artifact"] = text_artifact
+        outputs["summary_artifact"] = await asyncio.to_thread(artifact_store.put_text, summary, "summary")
+    return outputs
+
+def upload_too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Upload exceeds {UPLOAD_MAX_BYTES} bytes")
+
+async def multipart_file_chunks(request: Request, boundary: bytes):
+    """multipart 본문을 받는 대로 파싱해서 첫 번째 파일 파트의 데이터만 내보냄
+
+    Starlette의 request.form()처럼 본문 전체를 먼저 spool하지 않으므로 Content-Length가 없는
+    chunked 업로드도 UPLOAD_MAX_BYTES + UPLOAD_MULTIPART_OVERHEAD를 넘는 순간 413으로 끊긴다.
+    """
+    headers, field, value = {}, [], []
+    state = {"in_file": False, "done": False}
+    pending = []
+
+    def on_part_begin():
+        headers.clear()
+
+    def on_header_field(data, start, end):
+        field.append(data[start:end])
+
+    def on_header_value(data, start, end):
+        value.append(data[start:end])
+
+    def on_header_end():
+        headers[b"".join(field).lower()] = b"".join(value)
+        field.clear()
+        value.clear()
+
+    def on_headers_finished():
+        _, options = parse_options_header(headers.get(b"content-disposition"))
+        state["in_file"] = not state["done"] and b"filename" in options
+
+    def on_part_data(data, start, end):
+        if state["in_file"]:
+            pending.append(data[start:end])
+
+    def on_part_end():
+        if state["in_file"]:
+            state["in_file"] = False
+            state["done"] = True
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > UPLOAD_MAX_BYTES + UPLOAD_MULTIPART_OVERHEAD:
+            raise upload_too_large()
+        parser.write(chunk)
+        if pending:
+            yield b"".join(pending)
+            pending.clear()
+        # 파일 파트를 다 받았으면 나머지 필드는 읽지 않음
+        if state["done"]:
+            return
+    raise HTTPException(status_code=400, detail="Multipart upload needs a complete PDF file part")
+
+async def upload_chunks(request: Request):
+    """업로드 본문을 받는 대로 청크 단위로 내보냄 (multipart면 첫 번째 파일 파트, 아니면 raw 본문 스트림)"""
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type == b"multipart/form-data":
+        if not options.get(b"boundary"):
+            raise HTTPException(status_code=400, detail="Multipart upload without boundary")
+        async for chunk in multipart_file_chunks(request, options[b"boundary"]):
+            yield chunk
+    else:
+        async for chunk in request.stream():
+            if chunk:
+                yield chunk
+
+async def receive_upload(request: Request) -> tuple:
+    """업로드된 PDF를 bounded 버퍼에 받으면서 sha256 계산. (버퍼, sha256) 반환, 버퍼는 호출한 쪽에서 닫음
+
+    UPLOAD_SPOOL_BYTES까지는 메모리, 넘으면 임시 파일(UploadBuffer)에 두고
+    UPLOAD_MAX_BYTES를 넘는 순간 413. Content-Length가 이미 크면 본문을 읽기 전에 거절한다.
+    """
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > UPLOAD_MAX_BYTES + UPLOAD_MULTIPART_OVERHEAD:
+        raise upload_too_large()
+    buffer = UploadBuffer(UPLOAD_SPOOL_BYTES)
+    digest = hashlib.sha256()
+    try:
+        with metrics.timer("upload"):
+            async for chunk in upload_chunks(request):
+                if buffer.size + len(chunk) > UPLOAD_MAX_BYTES:
+                    raise upload_too_large()
+                digest.update(chunk)
+                buffer.write(chunk)
+        # PDF 헤더는 앞 1024바이트 안에 있어야 함
+        if b"%PDF-" not in buffer.head(1024):
+            raise HTTPException(status_code=400, detail="Upload is not a PDF")
+    except BaseException:
+        buffer.close()
+        raise
+    metrics.inc("upload_bytes", buffer.size)
+    return buffer, digest.hexdigest()
+
+@app.post("/summarize_paper")
+async def summarize_paper(req: SummarizeRequest):
+    """논문 요약 생성"""
+    pdf_path = await asyncio.to_thread(resolve_pdf_path, req)
+    
+    # 아티팩트 id는 이미 PDF 내용의 sha256이므로 다시 읽지 않음
+    try:
+        pdf_hash = req.pdf_artifact or await asyncio.to_thread(file_digest, pdf_path)
+    except OSError as e:
         raise HTTPException(status_code=500, detail=f"Summarization failed: {str(e)}")
+    return await summarize_pdf(req, pdf_hash, functools.partial(extract_text_from_pdf, pdf_path))
+
+@app.post("/summarize_upload")
+async def summarize_upload(request: Request, include_text: bool = False, long_document: bool = False,
+                           return_artifacts: bool = False, profile: str = None):
+    """업로드된 PDF 바이트 요약 (raw application/pdf 본문 또는 multipart 파일, 공유 파일시스템 불필요)
+
+    옵션은 /summarize_paper와 같고 query string으로 받는다.
+    본문을 읽기 전에 모델 상태와 admission을 확인한다 (로드 중이거나 큐가 가득 찬 replica가
+    PDF 전체를 받은 뒤에야 503을 주면 coordinator의 스트리밍 업로드는 다시 보낼 수 없음).
+    """
+    req = SummarizeRequest(include_text=include_text, long_document=long_document,
+                           return_artifacts=return_artifacts, profile=profile)
+    model_lifecycle.require()
+    with inference_pool.slot():
+        buffer, pdf_hash = await receive_upload(request)
+        try:
+            return await summarize_pdf(req, pdf_hash, functools.partial(extract_text_from_upload, buffer), admitted=True)
+        finally:
+            buffer.close()
+
+async def summarize_pdf(req: SummarizeRequest, pdf_hash: str, extract, admitted: bool = False) -> dict:
+    """캐시 확인 → 본문 추출 → 요약 (extract는 PDF 경로 또는 업로드 버퍼에서 본문을 꺼내는 블로킹 함수)
+
+    admitted면 호출한 쪽이 이미 model_lifecycle.require()와 admission slot을 잡은 상태.
+
+    응답의 profile은 실제로 요약을 만든 생성 프로파일 (캐시 hit이면 캐시된 요약의 프로파일)
+    """
+    # 요청 지정 프로파일, 아니면 부하 정책이 고른 프로파일
+    profile = summary_profiles.resolve(req.profile)
+    
+    # 0. 캐시 확인 (PDF 내용 해시 + 모델 + 생성 파라미터 + 프롬프트 버전)
+    # 부하 때문에 싼 프로파일이 골라졌어도 더 좋은 프로파일의 요약이 캐시에 있으면 그것을 씀
+    order = summary_profiles.order
+    for candidate in order[:order.index(profile) + 1]:
+        cached = await asyncio.to_thread(summary_cache.get, summary_cache_key(pdf_hash, req.long_document, candidate))
+        if cached is not None:
+            logger.info(f"Summary cache hit: {pdf_hash[:12]} ({candidate})")
+            summary_profiles.record(candidate)
+            response = {"summary": cached["summary"], "profile": candidate}
+            response.update(await text_outputs(req, extract, cached["summary"], text_artifact=cached.get("text_artifact")))
+            return response
+    cache_key = summary_cache_key(pdf_hash, req.long_document, profile)
+    
+    # 모델 로드/warmup 중이거나 큐가 가득 차면 여기서 바로 503 + Retry-After
+    if not admitted:
+        model_lifecycle.require()
+    with nullcontext() if admitted else inference_pool.slot():
+        try:
+            start = time.perf_counter()
+            
+            # 1. 텍스트 추출
+            doc_text = await asyncio.to_thread(extract)
+            
+            # 2-3. 토큰 길이 조정 후 배치 스케줄러로 요약 (long_document면 map-reduce)
+            summary = await summarize_document(doc_text, req.long_document, profile)
+            summary_profiles.observe(profile, time.perf_counter() - start)
+            # 품질 체크에서 대체된 요약은 캐시하지 않음 (다음 요청에서 다시 생성)
+            cacheable = summary != FALLBACK_SUMMARY
+            served = profile if cacheable else "fallback"
+            summary_profiles.record(served)
+            
+            logger.info(f"Summary generated: {len(summary)} characters (profile: {served})")
+            
+            response = {"summary": summary, "profile": served}
+            response.update(await text_outputs(req, extract, summary, doc_text=doc_text))
+            
+            # 본문 아티팩트 id도 같이 기록 (다음 캐시 hit에서 PDF를 다시 파싱하지 않도록)
+            if cacheable:
+                entry = {"summary": summary}
+                if "text_artifact" in response:
+                    entry["text_artifact"] = response["text_artifact"]
+                await asyncio.to_thread(summary_cache.put, cache_key, entry)
+            
+            return response
+            
+        except Exception as e:
+            logger.error(f"Summarization failed: {e}")
+            
+            if DEVICE == "cuda":
+                torch.cuda.empty_cache()
+                
+            raise HTTPException(status_code=500, detail=f"Summarization failed: {str(e)}")
+
+@app.get("/batch_stats")
+async def batch_stats():
+    """배치 스케줄러 통계 (큐 길이, 배치 크기 분포)"""
+    stats = batcher.snapshot()
+    stats["inference_pool"] = inference_pool.snapshot()
+    stats["extract_cache"] = cached_extract.cache_info()._asdict()
+    return stats
+
+@app.get("/cache_stats")
+async def cache_stats():
+    """요약 캐시 통계 (hit/miss, 항목 수, 용량)"""
+    return summary_cache.snapshot()
+
+@app.get("/metrics")
+async def metrics_endpoint(format: str = "json"):
+    """단계별 지연 시간 히스토그램, in-flight, 큐 길이, 토큰 처리량, 캐시 hit ratio (format=prometheus 지원)"""
+    return metrics.response(format)
+
+@app.get("/health/live")
+async def health_live():
+    """프로세스가 요청을 받을 수 있는지 (모델 로드 중에도 200)"""
+    return {"status": "alive", "model_state": model_lifecycle.state}
+
+@app.get("/health/ready")
+async def health_ready():
+    """모델 로드와 warmup이 끝났는지 (아니면 503 + 진행 상황)"""
+    body = {"status": "ready" if model_lifecycle.ready else model_lifecycle.state, "model": MODEL_NAME, **model_lifecycle.snapshot()}
+    if not model_lifecycle.ready:
+        return JSONResponse(status_code=503, content=body)
+    return body
 
 @app.get("/health")
 async def health_check():
     """헬스 체크"""
     return {
-        "status": "healthy",
+        "status": "healthy" if model_lifecycle.ready else model_lifecycle.state,
         "model": MODEL_NAME,
+        "model_lifecycle": model_lifecycle.snapshot(),
         "device": DEVICE,
-        "cuda_available": torch.cuda.is_available()
+        "backend": BACKEND,
+        "cuda_available": torch.cuda.is_available(),
+        "inference_pool": inference_pool.snapshot(),
+        "generation_profiles": summary_profiles.snapshot(),
+        "shared_weights": SHARED_WEIGHTS,
+        "pid": os.getpid(),
+        "memory": process_memory()
     }
 
 @app.get("/")
@@ -214,7 +852,8 @@ async def root():
         "service": "Simple Summarizer Agent",
         "model": MODEL_NAME,
         "device": DEVICE,
-        "endpoints": ["/summarize_paper", "/extract_text", "/health"]
+        "backend": BACKEND,
+        "endpoints": ["/summarize_paper", "/summarize_upload", "/extract_text", "/batch_stats", "/cache_stats", "/metrics", "/health", "/health/live", "/health/ready"]
     }
 
 # 시작시 로그
@@ -222,4 +861,16 @@ async def root():
 async def startup_event():
     logger.info("Simple Summarizer Agent started")
     logger.info(f"Model: {MODEL_NAME}")
-    logger.info(f"Device: {DEVICE}")
\ No newline at end of file
+    logger.info(f"Device: {DEVICE}")
+    model_lifecycle.start()
+    batcher.start()
+    logger.info(f"Batching: max_batch_size={BATCH_MAX_SIZE}, max_wait_ms={BATCH_WAIT_MS}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await batcher.stop()
+    inference_pool.shutdown()
+    summary_cache.close()
+    artifact_store.close()
+    if pdf_executor is not None:
+        pdf_executor.shutdown(wait=False, cancel_futures=True)
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""토큰 budget 유틸리티 (summarizer / reviewer 공용)
+
+텍스트를 한 번만 토크나이징하고 offset mapping으로 원문을 잘라낸다.
+문장마다 다시 encode하거나 토큰을 decode해서 되돌리는 과정이 없다.
+"""
+
+# 토큰 하나가 차지하는 문자 수의 넉넉한 상한 (영어 BPE/SentencePiece 기준 평균 4자 안팎)
+CHARS_PER_TOKEN = 8
+
+def prefix_offsets(tokenizer, text: str, max_tokens: int) -> tuple:
+    """앞부분만 토크나이징해서 (offsets, 전체가 budget 안에 들어가는지) 반환
+
+    max_tokens * CHARS_PER_TOKEN 문자까지만 토크나이저에 넣고,
+    그 안에 토큰이 모자라면 범위를 두 배로 늘려 다시 시도한다.
+    """
+    window = max_tokens * CHARS_PER_TOKEN
+    while True:
+        chunk = text[:window]
+        offsets = tokenizer(
+            chunk,
+            add_special_tokens=False,
+            return_offsets_mapping=True
+        )["offset_mapping"]
+        if len(offsets) > max_tokens:
+            return offsets[:max_tokens], False
+        if window >= len(text):
+            return offsets, True
+        window *= 2
+
+def truncate_to_tokens(tokenizer, text: str, max_tokens: int) -> str:
+    """앞에서부터 max_tokens 토큰까지의 원문을 그대로 반환"""
+    offsets, fits = prefix_offsets(tokenizer, text, max_tokens)
+    if fits or not offsets:
+        return text
+    return text[:offsets[-1][1]]
+
+def truncate_to_sentences(tokenizer, text: str, max_tokens: int) -> str:
+    """max_tokens 안에 들어가는 가장 긴 문장 단위('.' 기준) prefix를 반환
+
+    첫 문장부터 budget을 넘으면 토큰 경계에서 자른다.
+    """
+    return sentence_prefix(tokenizer, text, max_tokens)[0]
+
+def sentence_prefix(tokenizer, text: str, max_tokens: int) -> tuple:
+    """truncate_to_sentences와 같은 prefix와 그 토큰 수 (special token 제외)
+
+    같은 offset으로 길이까지 세므로 배치 버킷팅을 위해 다시 토크나이징할 필요가 없다.
+    """
+    offsets, fits = prefix_offsets(tokenizer, text, max_tokens)
+    if fits or not offsets:
+        return text, len(offsets)
+    limit = offsets[-1][1]
+    cut = text.rfind(".", 0, limit)
+    if cut <= 0:
+        return text[:limit], len(offsets)
+    return text[:cut + 1], sum(1 for _, end in offsets if end <= cut + 1)